@@ -0,0 +1,89 @@
+"""
+Microbenchmark for the excluded artists lookup of NicheTrackFinder: a dict of exclusion dicts checked against their
+date and reason (the old way, built from the whole requests cache entry) vs the ExclusionFilter built from the mbids alone.
+
+Reports the memory kept by each (tracemalloc, not counting the query results they're built from), the time to build
+them and the cost of a lookup. Runs without a db, on synthetic exclusions.
+
+Usage (from backend/):
+    python -m scripts.benchmarks.exclusion_filter [--exclusions 100000]
+"""
+import uuid
+import random
+import timeit
+import argparse
+import tracemalloc
+
+from datetime import datetime, timedelta, timezone
+
+from src.services.playlist_maker.utils.exclusion_filter import ExclusionFilter
+
+LOOKUPS = 200000
+SEED    = 0
+REASONS = [
+    "Too Many Followers / Listeners / Plays",
+    "Ratio of Listeners to Plays Too Small",
+    "Artist Does Not Sing in the Requested Language",
+    "Too Few Followers / Listeners / Plays"
+]
+EARLIEST_DATE = datetime.now(timezone.utc) - timedelta(days=182)
+
+def make_documents(n: int) -> list[dict]:
+    """Exclusions as the driver gives them back"""
+    now = datetime.now(timezone.utc)
+    return([{
+        'name'           : f'artist {i}',
+        'mbid'           : str(uuid.UUID(int=random.getrandbits(128), version=4)),
+        'reason_excluded': random.choice(REASONS),
+        'date_excluded'  : now - timedelta(days=random.randint(0, 365))
+    } for i in range(n)])
+
+def build_dict(documents: list[dict]) -> dict[str, dict]:
+    # The entries were pydantic models dumped back to dicts
+    return({doc['mbid']: dict(doc) for doc in documents})
+
+def dict_excluded(excluded: dict[str, dict], mbid: str) -> bool:
+    entry = excluded.get(mbid, None)
+    return(bool(entry) and (
+        (entry.get('date_excluded') > EARLIEST_DATE) or
+        (entry.get('reason_excluded') == REASONS[0]) or
+        (entry.get('reason_excluded') == REASONS[2])
+    ))
+
+def build_filter(live_mbids: list[str]) -> ExclusionFilter:
+    return(ExclusionFilter(live_mbids))
+
+def kept_bytes(build: callable) -> tuple[any, int]:
+    """Build a structure, returning it and the memory it keeps"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built  = build()
+    after  = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return((built, after - before))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exclusions', type=int, default=100000)
+    args = parser.parse_args()
+
+    random.seed(SEED)
+    documents  = make_documents(args.exclusions)
+    # The db only returns the live exclusions' mbids
+    live_mbids = [doc['mbid'] for doc in documents if dict_excluded({doc['mbid']: doc}, doc['mbid'])]
+    # Half of the lookups are excluded artists, like a genre screened many times before
+    mbids      = [random.choice(documents)['mbid'] if (random.random() < 0.5) else str(uuid.uuid4()) for _ in range(LOOKUPS)]
+
+    excluded_dict, dict_bytes     = kept_bytes(lambda: build_dict(documents))
+    excluded_filter, filter_bytes = kept_bytes(lambda: build_filter(live_mbids))
+    assert(all(dict_excluded(excluded_dict, mbid) == (mbid in excluded_filter) for mbid in mbids))
+
+    dict_build_s    = timeit.timeit(lambda: build_dict(documents), number=3) / 3
+    filter_build_s  = timeit.timeit(lambda: build_filter(live_mbids), number=3) / 3
+    dict_lookup_s   = timeit.timeit(lambda: [dict_excluded(excluded_dict, mbid) for mbid in mbids], number=1)
+    filter_lookup_s = timeit.timeit(lambda: [mbid in excluded_filter for mbid in mbids], number=1)
+
+    print(f'{args.exclusions} exclusions ({len(excluded_filter)} live), {LOOKUPS} lookups')
+    print(f'{"":<8} {"memory":>12} {"build":>12} {"lookup":>14}')
+    print(f'{"dict":<8} {dict_bytes / 2**20:9.2f} MiB {dict_build_s * 1e3:9.1f} ms {dict_lookup_s / LOOKUPS * 1e9:8.0f} ns/call')
+    print(f'{"filter":<8} {filter_bytes / 2**20:9.2f} MiB {filter_build_s * 1e3:9.1f} ms {filter_lookup_s / LOOKUPS * 1e9:8.0f} ns/call')
@@ -0,0 +1,177 @@
+"""
+End-to-end benchmark for NicheTrackFinder.find_niche_tracks over a fixed set of genres, runnable offline.
+
+Record once against the live APIs (the genres' artists are copied from the configured Mongo, everything else
+starts empty), then replay the recorded responses as often as needed with no network and a mongomock DB:
+
+Usage (from backend/):
+    python -m scripts.benchmarks.generation record
+    python -m scripts.benchmarks.generation replay [--throttle] [--genres jazz punk]
+
+Reports, per genre: wall time, tracks accepted, API calls (total and per accepted track), replay fixture misses
+and DB operations. Replays skip the rate limits unless --throttle is given, so they measure our own overhead.
+The pipeline's threads can finish artists in a different order than when recording, so a replay can need a
+response that was never recorded; those are counted as misses (and handled like any failed request).
+Requires mongomock (pip install mongomock). mongomock 4.3 can't run the bulk writes of pymongo 4.11+ (their UpdateOne
+takes a sort), which the exclusion, metrics and cache flushes use, so replays need pymongo<4.11; they stop if it can't.
+"""
+import json
+import time
+import random
+import argparse
+import mongomock
+
+from collections import Counter
+from pathlib     import Path
+from pymongo     import MongoClient, UpdateOne, version as pymongo_version
+
+from src.utils.http_recording   import configure_http_recording, get_http_call_counts, reset_http_call_counts
+from src.utils.rate_limiter     import configure_rate_limit
+from src.utils.util             import RequestType, Language, NicheLevel
+from src.utils.musicbrainz_util import get_mb_genre
+from src.utils.metrics          import GenerationMetrics, collect_metrics
+
+from src.services.genre_handling.valid_genres import genre_is_spotify
+
+from src.db.DB            import DB
+from src.db.config_loader import load_config
+
+GENRES       = ['jazz', 'punk', 'emo', 'folk', 'ambient']
+FIXTURES_DIR = Path('fixtures/generation')
+SEED         = 0
+
+# Service by API host
+API_HOSTS = {
+    'ws.audioscrobbler.com': 'lastfm',
+    'musicbrainz.org'      : 'musicbrainz',
+    'api.spotify.com'      : 'spotify'
+}
+
+# What the generator needs from an artist document
+ARTIST_SNAPSHOT_PROJECTION = {'_id': 0, 'id': 1, 'name': 1, 'genres.name': 1, 'random_key': 1, 'work_languages': 1}
+
+class CountingCollection:
+    """Collection wrapper counting the operations sent to it"""
+    def __init__(self, collection, counts: Counter) -> None:
+        self._collection = collection
+        self._counts     = counts
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._collection, name)
+        if (not callable(attribute)):
+            return(attribute)
+        def counted(*args, **kwargs):
+            self._counts[name] += 1
+            return(attribute(*args, **kwargs))
+        return(counted)
+
+def snapshot_artists(genres: list[str], path: Path) -> None:
+    """Copy the genres' artists from the configured Mongo"""
+    client = MongoClient(load_config()['MONGO_URI'])
+    artists = {}
+    for genre in genres:
+        mb_genre = get_mb_genre(genre) if genre_is_spotify(genre) else genre
+        for artist in client.get_default_database()['artists'].find({'genres.name': mb_genre}, ARTIST_SNAPSHOT_PROJECTION):
+            artists[artist['id']] = artist
+    client.close()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(list(artists.values()), file)
+    print(f'Snapshot of {len(artists)} artists saved to {path}')
+
+def check_bulk_writes(database: mongomock.Database) -> None:
+    """Make sure mongomock can run the bulk writes of the installed pymongo. The db writes of a generation only log
+    their failures, so the db operations and cache hits would be silently wrong"""
+    probe = database['benchmark_probe']
+    try:
+        probe.bulk_write([UpdateOne({'_id': 0}, {'$set': {'ok': True}}, upsert=True)], ordered=False)
+    except TypeError as e:
+        raise SystemExit(f'mongomock can\'t run bulk writes with pymongo {pymongo_version} ({e}), install pymongo<4.11')
+    finally:
+        probe.drop()
+
+def use_offline_db(artists_path: Path, db_operations: Counter) -> None:
+    """Point DB at a mongomock database seeded with the artist snapshot, counting operations"""
+    client = mongomock.MongoClient('mongodb://localhost/niche_benchmark')
+    with open(artists_path, 'r') as file:
+        client.get_default_database()['artists'].insert_many(json.load(file))
+
+    check_bulk_writes(client.get_default_database())
+
+    db = DB.use_client(client)
+    database = db.db
+    db.get_collection = lambda name: CountingCollection(database[name], db_operations)
+
+def run_genre(genre: str, db_operations: Counter) -> dict[str, any]:
+    """Generate for a genre, returning the measurements"""
+    from src.services._shared_classes.PlaylistRequest import PlaylistRequest
+    from src.services.playlist_maker.NicheTrackFinder import NicheTrackFinder
+
+    random.seed(SEED)
+    reset_http_call_counts()
+    db_operations.clear()
+
+    t0      = time.perf_counter()
+    metrics = GenerationMetrics()
+    with collect_metrics(metrics):
+        # Added to the offline db, the finder updates its stats as it goes
+        req    = PlaylistRequest(0, Language.ANY, NicheLevel.ONLY_KINDA, 120, 10000, genre, False)
+        tracks = NicheTrackFinder(req).find_niche_tracks()
+    wall    = time.perf_counter() - t0
+
+    calls, misses = get_http_call_counts()
+    by_service = Counter()
+    for host, count in calls.items():
+        by_service[API_HOSTS.get(host, host)] += count
+    return({
+        'genre'     : genre,
+        'wall_s'    : wall,
+        'tracks'    : len(tracks),
+        'api_calls' : by_service,
+        'misses'    : sum(misses.values()),
+        'db_ops'    : sum(db_operations.values()),
+        'stages'    : dict(metrics.stage_seconds)
+    })
+
+def report(results: list[dict[str, any]]) -> None:
+    print(f'\n{"genre":<12}{"wall s":>9}{"tracks":>8}{"calls":>8}{"calls/track":>13}{"lastfm":>8}{"mb":>6}{"spotify":>9}{"misses":>8}{"db ops":>8}')
+    for result in results:
+        calls = sum(result['api_calls'].values())
+        per_track = calls / result['tracks'] if result['tracks'] else float('nan')
+        print(f'{result['genre']:<12}{result['wall_s']:>9.2f}{result['tracks']:>8}{calls:>8}{per_track:>13.1f}'
+              f'{result['api_calls']['lastfm']:>8}{result['api_calls']['musicbrainz']:>6}{result['api_calls']['spotify']:>9}'
+              f'{result['misses']:>8}{result['db_ops']:>8}')
+    print('\nbusy seconds per stage (summed over workers)')
+    for result in results:
+        print(f'{result['genre']:<12}' + '  '.join(f'{stage} {secs:.2f}' for stage, secs in result['stages'].items()))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='End-to-end generation benchmark (record / replay)')
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--genres', nargs='+', default=GENRES)
+    parser.add_argument('--fixtures', type=Path, default=FIXTURES_DIR)
+    parser.add_argument('--throttle', action='store_true', help='Keep the API rate limits when replaying')
+    args = parser.parse_args()
+
+    artists_path  = args.fixtures / 'artists.json'
+    db_operations = Counter()
+
+    if (args.mode == 'record'):
+        snapshot_artists(args.genres, artists_path)
+    configure_http_recording(args.mode, args.fixtures / 'http')
+    use_offline_db(artists_path, db_operations)
+
+    if ((args.mode == 'replay') and (not args.throttle)):
+        for request_type in RequestType:
+            configure_rate_limit(request_type, 1e9, 1000)
+
+    from src.auth.SpotifyUser import spotify_user
+    if (args.mode == 'record'):
+        from config.personal_init import token
+        spotify_user.initialize(token)
+    else:
+        # The token is not part of the fixtures
+        spotify_user.initialize_from_access_token('replay')
+
+    report([run_genre(genre, db_operations) for genre in args.genres])
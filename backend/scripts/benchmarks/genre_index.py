@@ -0,0 +1,45 @@
+"""
+Microbenchmark for the genre lookups in valid_genres: re-parsing genres.json and scanning it on every call (the old way)
+vs the in-memory GenreIndex.
+
+Usage (from backend/):
+    python -m scripts.benchmarks.genre_index
+"""
+import timeit
+
+from src.services.genre_handling.valid_genres import get_genre_dict_list, genre_is_spotify, convert_genre, genres, get_genre_index
+
+ITERATIONS = 2000
+
+def genre_is_spotify_scan(genre: str) -> bool:
+    data = get_genre_dict_list()
+    return(next((item for item in data if item.get('SPOTIFY', '') == genre), None) is not None)
+
+def convert_genre_scan(from_service: str, to_service: str, genre: str) -> str:
+    data = get_genre_dict_list()
+    entry = next((item for item in data if item.get(from_service, '') == genre), None)
+    if(entry):
+        return(entry[to_service])
+
+def genres_scan() -> list[str]:
+    return([genre.get('SPOTIFY') or genre.get('MUSICBRAINZ') for genre in get_genre_dict_list()])
+
+def report(name: str, old: callable, new: callable) -> None:
+    old_s = timeit.timeit(old, number=ITERATIONS)
+    new_s = timeit.timeit(new, number=ITERATIONS)
+    print(f'{name:<18} scan: {old_s / ITERATIONS * 1e6:9.2f} us/call   index: {new_s / ITERATIONS * 1e6:7.2f} us/call   ({old_s / new_s:.0f}x)')
+
+if __name__ == '__main__':
+    # Later entries are the worst case for the scan
+    last = [genre for genre in get_genre_dict_list() if genre.get('SPOTIFY')][-1]
+    # Build the index outside of the timings
+    get_genre_index()
+
+    assert(genre_is_spotify_scan(last['SPOTIFY']) == genre_is_spotify(last['SPOTIFY']))
+    assert(convert_genre_scan('SPOTIFY', 'LASTFM', last['SPOTIFY']) == convert_genre('SPOTIFY', 'LASTFM', last['SPOTIFY']))
+    assert(genres_scan() == genres())
+
+    print(f'{len(genres())} genres, {ITERATIONS} calls each')
+    report('genre_is_spotify', lambda: genre_is_spotify_scan(last['SPOTIFY']), lambda: genre_is_spotify(last['SPOTIFY']))
+    report('convert_genre', lambda: convert_genre_scan('SPOTIFY', 'LASTFM', last['SPOTIFY']), lambda: convert_genre('SPOTIFY', 'LASTFM', last['SPOTIFY']))
+    report('genres', genres_scan, genres)
@@ -0,0 +1,48 @@
+"""
+Benchmark for loading settings: re-reading .env for every client (the old way, one LastFMRequests per Artist)
+vs the settings loaded once and the shared clients.
+
+Usage (from backend/):
+    python -m scripts.benchmarks.settings_load
+"""
+import time
+import timeit
+
+import src.utils.settings as settings_module
+
+from src.utils.settings                   import load_settings
+from src.auth.LastFMRequests              import LastFMRequests
+from src.services._shared_classes.Artist import Artist
+
+ARTISTS = 5000
+
+# Count the .env reads
+env_reads    = 0
+_load_dotenv = settings_module.load_dotenv
+def counting_load_dotenv(*args, **kwargs) -> bool:
+    global env_reads
+    env_reads += 1
+    return(_load_dotenv(*args, **kwargs))
+settings_module.load_dotenv = counting_load_dotenv
+
+def artist_per_client() -> Artist:
+    return(Artist('name', 'mbid', LastFMRequests(load_settings())))
+
+def artist_shared_client() -> Artist:
+    return(Artist('name', 'mbid'))
+
+def report(name: str, fn: callable) -> None:
+    global env_reads
+    env_reads = 0
+    seconds   = timeit.timeit(fn, number=ARTISTS)
+    print(f'{name:<14} {seconds / ARTISTS * 1e6:9.2f} us/artist   {ARTISTS / seconds:10.0f} artists/s   .env reads: {env_reads}')
+
+if __name__ == '__main__':
+    # What startup pays, once (the old way paid it for every client)
+    start = time.perf_counter()
+    load_settings()
+    print(f'startup: settings loaded in {(time.perf_counter() - start) * 1e3:.2f} ms')
+
+    print(f'{ARTISTS} artists')
+    report('per client', artist_per_client)
+    report('shared', artist_shared_client)
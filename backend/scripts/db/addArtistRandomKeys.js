@@ -0,0 +1,41 @@
+/**
+ * addArtistRandomKeys.js
+ *
+ * Gives every artist without one a 'random_key' (uniform in [0, 1)) and indexes it with the genre,
+ * so artists in a genre can be streamed in random order (see ArtistsDAO.iter_artist_chunks_in_genre).
+ *
+ * Usage:
+ *   node addArtistRandomKeys.js
+ */
+
+const connectToDatabase = require( './db' );
+
+( async () => {
+  let client;
+  try {
+    // Connect to the database
+    client = await connectToDatabase();
+    const db = client.db(); // Use the default database from the URI
+
+    // Get the Artist collection
+    const artistCollection = db.collection( 'artists' );
+
+    // Assign the keys server side
+    const result = await artistCollection.updateMany(
+      { random_key: { $exists: false } },
+      [ { $set: { random_key: { $rand: {} } } } ],
+    );
+    console.log( `Added random keys to ${result.modifiedCount} artists.` );
+
+    // Create the index
+    await artistCollection.createIndex( { 'genres.name': 1, random_key: 1 } );
+    console.log( 'Index on genres.name, random_key created.' );
+  } catch( error ) {
+    console.error( 'Error adding random keys:', error );
+  } finally {
+    // Close the connection
+    if( client ) {
+      await client.close();
+    }
+  }
+} )();
@@ -0,0 +1,172 @@
+#!/usr/bin/env node
+
+/**
+ * addArtistWorkLanguages.js
+ *
+ * Computes each artist's work language distribution from the MusicBrainz work dump (JSONL) and stores it on the
+ * artist as 'work_languages' ({ iso 639-3 code: number of works }), so the validator doesn't have to ask the
+ * MusicBrainz API (artist/<mbid>?inc=works, 1 request per second) for it. Artists with no works with a language in the
+ * dump are left without it (and cleared of the {} earlier runs gave them), so the validator asks the API, whose answer is
+ * cached, rather than ruling them out for good on a dump made before their works were added or linked.
+ *
+ * Usage:
+ *   node addArtistWorkLanguages.js --input <work_dump_file>
+ *
+ * Example:
+ *   node addArtistWorkLanguages.js -i ~/Desktop/niche/data/work
+ */
+
+const fs = require( 'fs' );
+const readline = require( 'readline' );
+const path = require( 'path' );
+const { exit } = require( 'process' );
+
+const connectToDatabase = require( './db' );
+
+// Artist updates sent per bulk write
+const BATCH_SIZE = 1000;
+
+// Function to display usage instructions
+function showUsage() {
+  const scriptName = path.basename( process.argv[ 1 ] );
+  console.log( `
+Usage:
+  node ${scriptName} --input <work_dump_file>
+
+Options:
+  --input, -i        Path to the MusicBrainz work dump (JSONL). (Required)
+  --help, -h         Show this help message.
+
+Example:
+  node ${scriptName} -i ~/Desktop/niche/data/work
+    ` );
+}
+
+// Function to parse command-line arguments
+function parseArgs() {
+  const args = process.argv.slice( 2 );
+  const argObj = {};
+
+  for( let i = 0; i < args.length; i++ ) {
+    switch( args[ i ] ) {
+      case '--input':
+      case '-i':
+        argObj.input = args[ ++i ];
+        break;
+      case '--help':
+      case '-h':
+        showUsage();
+        exit( 0 );
+        break;
+      default:
+        console.error( `Unknown argument: ${args[ i ]}` );
+        showUsage();
+        exit( 1 );
+        break;
+    }
+  }
+
+  // Validate required arguments
+  if( !argObj.input ) {
+    console.error( 'Error: --input is required.' );
+    showUsage();
+    exit( 1 );
+  }
+
+  return( argObj );
+}
+
+// Count the languages of the works of each artist related to them (composer, lyricist, writer, ...)
+async function countWorkLanguages( inputPath ) {
+  // artist mbid -> { language code -> works }
+  const artistLanguages = new Map();
+  let totalLines = 0;
+
+  const rl = readline.createInterface( {
+    input:     fs.createReadStream( inputPath, { encoding: 'utf8' } ),
+    crlfDelay: Infinity,
+  } );
+
+  for await ( const line of rl ) {
+    totalLines += 1;
+    if( !line ) {
+      continue;
+    }
+
+    const work = JSON.parse( line );
+    const language = work.language;
+    if( language ) {
+      // An artist can be related to the same work more than once (e.g. composer and lyricist)
+      const artistIds = new Set( ( work.relations || [] )
+        .filter( ( relation ) => relation[ 'target-type' ] === 'artist' && relation.artist )
+        .map( ( relation ) => relation.artist.id ) );
+
+      artistIds.forEach( ( artistId ) => {
+        if( !artistLanguages.has( artistId ) ) {
+          artistLanguages.set( artistId, {} );
+        }
+        const counts = artistLanguages.get( artistId );
+        counts[ language ] = ( counts[ language ] || 0 ) + 1;
+      } );
+    }
+
+    // Display progress every 1 million lines
+    if( totalLines % 1_000_000 === 0 ) {
+      console.log( `Processed ${totalLines} works...` );
+    }
+  }
+
+  console.log( `Processed ${totalLines} works, found languages for ${artistLanguages.size} artists.` );
+  return( artistLanguages );
+}
+
+// Entry point
+( async () => {
+  const args = parseArgs();
+
+  // Check if input file exists
+  if( !fs.existsSync( args.input ) ) {
+    console.error( `Error: Input file does not exist at path '${args.input}'.` );
+    exit( 1 );
+  }
+
+  let client;
+  try {
+    const artistLanguages = await countWorkLanguages( args.input );
+
+    // Connect to the database
+    client = await connectToDatabase();
+    const db = client.db(); // Use the default database from the URI
+
+    // Get the Artist collection
+    const artistCollection = db.collection( 'artists' );
+
+    // Earlier runs set {} on the artists with no works in their dump
+    const cleared = await artistCollection.updateMany(
+      { work_languages: {} },
+      { $unset: { work_languages: '' } },
+    );
+    console.log( `Cleared empty work languages from ${cleared.modifiedCount} artists.` );
+
+    let batch = [];
+    let modified = 0;
+    for( const [ artistId, counts ] of artistLanguages ) {
+      batch.push( { updateOne: { filter: { id: artistId }, update: { $set: { work_languages: counts } } } } );
+      if( batch.length >= BATCH_SIZE ) {
+        modified += ( await artistCollection.bulkWrite( batch, { ordered: false } ) ).modifiedCount;
+        batch = [];
+      }
+    }
+    if( batch.length ) {
+      modified += ( await artistCollection.bulkWrite( batch, { ordered: false } ) ).modifiedCount;
+    }
+    console.log( `Set work languages on ${modified} artists.` );
+  } catch( error ) {
+    console.error( 'Error adding work languages:', error );
+  } finally {
+    // Close the connection
+    if( client ) {
+      await client.close();
+    }
+  }
+} )();
@@ -0,0 +1,25 @@
+// scripts/createArtistIdIndex.js
+const connectToDatabase = require( './db' );
+
+( async () => {
+  let client;
+  try {
+    // Connect to the database
+    client = await connectToDatabase();
+    const db = client.db(); // Use the default database from the URI
+
+    // Get the Artist collection
+    const artistCollection = db.collection( 'artists' );
+
+    // Create the index (artist metrics are written by mbid)
+    await artistCollection.createIndex( { id: 1 } );
+    console.log( 'Index on id created.' );
+  } catch( error ) {
+    console.error( 'Error creating index:', error );
+  } finally {
+    // Close the connection
+    if( client ) {
+      await client.close();
+    }
+  }
+} )();
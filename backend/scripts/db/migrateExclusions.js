@@ -0,0 +1,106 @@
+/**
+ * migrateExclusions.js
+ *
+ * Moves the 'excluded' arrays of the 'requests_cache' collection into the 'exclusions' collection (one document per
+ * (request params, artist)), skipping the exclusions which have gone stale. Safe to run more than once.
+ *
+ * Usage:
+ *   node migrateExclusions.js
+ *
+ * Example:
+ *   ENV=dev node migrateExclusions.js
+ */
+
+const connectToDatabase = require( './db' );
+
+// Keep in sync with NicheTrackFinder (ARTIST_EXCLUSION_TTL, PERMANENT_EXCLUSION_REASONS)
+const EXCLUSION_TTL_MS = 182 * 24 * 60 * 60 * 1000;
+const PERMANENT_REASONS = [
+  'Too Many Followers / Listeners / Plays',
+  'Artist Does Not Sing in the Requested Language',
+];
+const BATCH_SIZE = 1000;
+
+async function migrateExclusions() {
+  let client;
+  try {
+    // Connect to the database
+    client = await connectToDatabase();
+    const db = client.db(); // Uses the default database from the URI
+
+    const requestsCacheCollection = db.collection( 'requests_cache' );
+    const exclusionsCollection = db.collection( 'exclusions' );
+
+    // Same indexes as ExclusionsDAO
+    await exclusionsCollection.createIndex( { params_key: 1, mbid: 1 }, { unique: true } );
+    await exclusionsCollection.createIndex( { expires_at: 1 }, { expireAfterSeconds: 0 } );
+
+    const now = new Date();
+    let migrated = 0;
+    let skipped = 0;
+
+    const cursor = requestsCacheCollection.find( {} );
+    for await ( const cache of cursor ) {
+      const { params } = cache;
+      const paramsKey = `${params.language}|${params.genre}|${params.niche_level}`;
+      let operations = [];
+
+      for( const excluded of cache.excluded || [] ) {
+        const dateExcluded = new Date( excluded.date_excluded );
+        const expiresAt = PERMANENT_REASONS.includes( excluded.reason_excluded )
+          ? null
+          : new Date( dateExcluded.getTime() + EXCLUSION_TTL_MS );
+
+        if( expiresAt && expiresAt <= now ) {
+          skipped += 1;
+        } else {
+          operations.push( {
+            updateOne: {
+              filter: { params_key: paramsKey, mbid: excluded.mbid },
+              update: {
+                $set: {
+                  params,
+                  name:            excluded.name,
+                  reason_excluded: excluded.reason_excluded,
+                  date_excluded:   dateExcluded,
+                  expires_at:      expiresAt,
+                  updated_at:      now,
+                },
+                $setOnInsert: { created_at: now },
+              },
+              upsert: true,
+            },
+          } );
+        }
+
+        if( operations.length >= BATCH_SIZE ) {
+          await exclusionsCollection.bulkWrite( operations, { ordered: false } );
+          migrated += operations.length;
+          operations = [];
+        }
+      }
+
+      if( operations.length > 0 ) {
+        await exclusionsCollection.bulkWrite( operations, { ordered: false } );
+        migrated += operations.length;
+      }
+      console.log( `Migrated exclusions of ${paramsKey}.` );
+    }
+
+    console.log( `Migrated ${migrated} exclusions, skipped ${skipped} stale ones.` );
+  } catch( error ) {
+    console.error( `Error migrating exclusions: ${error.message}` );
+    process.exit( 1 );
+  } finally {
+    // Close the connection
+    if( client ) {
+      await client.close();
+      console.log( 'MongoDB connection closed.' );
+    }
+  }
+}
+
+// Entry point
+( async () => {
+  await migrateExclusions();
+} )();
@@ -3,8 +3,8 @@ import os
 from pathlib import Path
 from typing  import Tuple, List
 
-from src.auth.LastFMRequests      import LastFMRequests
-from src.auth.MusicBrainzRequests import MusicBrainzRequests
+from src.auth.LastFMRequests      import LastFMRequests, lastfm_requests
+from src.auth.MusicBrainzRequests import MusicBrainzRequests, musicbrainz_requests
 from src.auth.SpotifyUser         import spotify_user
 
 inc = 50
@@ -81,7 +81,7 @@ def collect_all_genres(
     return lastfm_genres, musicbrainz_genres, spotify_genres
 
 # Example usage (ensure classes are initialized properly)
-lastfm_requester = LastFMRequests()
-musicbrainz_requester = MusicBrainzRequests()
+lastfm_requester = lastfm_requests
+musicbrainz_requester = musicbrainz_requests
 
 all_genres = collect_all_genres(lastfm_requester, musicbrainz_requester)
@@ -0,0 +1,116 @@
+from typing import Callable, Optional
+
+from src.utils.lastfm_util import LASTFM_LOOKUP_METHOD, LASTFM_LOOKUP_FOUND_TTL, LASTFM_LOOKUP_NOT_FOUND_TTL, lastfm_response_artist_name
+from src.utils.logger      import logger
+
+from src.models.pydantic.LastFMArtistLookup import LastFMArtistLookup
+
+from src.db.DB                          import DB
+from src.db.DAOs.LastFMArtistLookupsDAO import LastFMArtistLookupsDAO
+
+from src.auth.LastFMRequests import LastFMRequests, lastfm_requests
+
+class LastFMArtistIndex:
+    """Looks artists up on lastfm by mbid, falling back to their name, and keeps in the db which of the two found each
+    artist (along with their name as lastfm has it) so that later lookups go straight to it. Artists found neither way
+    are kept too, for less long, and are not looked up again until they expire.
+
+    Only artist.getInfo tells whether lastfm has an artist, so artists are only kept as not found when it finds them neither
+    way (and they were not found before). Artists without an mbid are only looked up by name, and not kept. Index failures
+    are treated as misses.
+
+    Attributes:
+        _dao: Lookups DAO
+    """
+    def __init__(self) -> None:
+        self._dao: Optional[LastFMArtistLookupsDAO] = None
+
+    def _get_dao(self) -> LastFMArtistLookupsDAO:
+        if (self._dao is None):
+            self._dao = LastFMArtistLookupsDAO(DB())
+        return(self._dao)
+
+    def read_many(self, mbids: list[str]) -> dict[str, LastFMArtistLookup]:
+        """Read the stored lookups of many artists in one query
+
+        Args:
+            mbids (list[str]): The artists' mbids
+
+        Returns:
+            dict[str, LastFMArtistLookup]: mbid: lookup, for the artists that were hit
+        """
+        mbids = list({mbid for mbid in mbids if mbid})
+        if (not mbids):
+            return({})
+        try:
+            return(self._get_dao().read_lookups(mbids))
+        except Exception as e:
+            logger.warning('Could not read lastfm artist lookups: %s', e)
+            return({})
+
+    def get_artist_data(self, baseParams: dict, mbid: str, name: str, found: Callable[[dict], bool],
+                        known: Optional[LastFMArtistLookup] = None, prefetched: bool = False,
+                        lastfm: LastFMRequests = None) -> Optional[dict]:
+        """Call an artist method of lastfm (e.g. artist.getInfo) for an artist, with the lookup mode known to find them
+        if there is one, else by mbid then by name
+
+        Args:
+            baseParams (dict): Base params for the call
+            mbid (str): The artist's mbid, "" if they have none
+            name (str): The artist's name
+            found (Callable[[dict], bool]): Does a response have the artist?
+            known (Optional[LastFMArtistLookup], optional): The artist's lookup, if already read (see read_many). Defaults to None.
+            prefetched (bool, optional): Was the lookup already read, so that no known lookup means the artist has none? Defaults to False.
+            lastfm (LastFMRequests, optional): LastFM client. Defaults to the shared client.
+
+        Returns:
+            Optional[dict]: The response, None if the artist could not be found
+        """
+        lastfm = lastfm or lastfm_requests
+        lookup = (known if (prefetched) else (known or self._read(mbid))) if (mbid) else None
+        if ((lookup is not None) and (lookup.mode is None)):
+            logger.debug('Artist %s was not found on lastfm by mbid or name, skipping', name)
+            return(None)
+
+        # (mode, key) in the order they are tried: the mode known to work first, by lastfm's name for the artist before theirs
+        known_mode = getattr(lookup, 'mode', None)
+        known_name = getattr(lookup, 'lastfm_name', None)
+        attempts   = [('mbid', mbid), ('name', known_name), ('name', name)]
+        attempts   = sorted(dict.fromkeys(attempt for attempt in attempts if attempt[1]), key=lambda attempt: attempt[0] != known_mode)
+        errored    = False
+        for mode, key in attempts:
+            try:
+                data = lastfm.get_lastfm_artist_data(baseParams, **{mode: key})
+            except Exception as e:
+                logger.warning('Couldn\'t get lastfm %s for %s by %s: %s', baseParams.get('method'), name, mode, e)
+                errored = True
+                continue
+            if (found(data)):
+                lastfm_name = lastfm_response_artist_name(data) or known_name
+                if ((known_mode, known_name) != (mode, lastfm_name)):
+                    self._store(mbid, mode, lastfm_name)
+                return(data)
+            logger.info('No lastfm %s for %s by %s', baseParams.get('method'), name, mode)
+
+        # Failed calls don't tell whether the artist is on lastfm, and an artist found before is not forgotten on a miss
+        if ((not errored) and (lookup is None) and (baseParams.get('method') == LASTFM_LOOKUP_METHOD)):
+            self._store(mbid, None, None)
+        return(None)
+
+    def _read(self, mbid: str) -> Optional[LastFMArtistLookup]:
+        try:
+            return(self._get_dao().read_lookup(mbid))
+        except Exception as e:
+            logger.warning('Could not read lastfm artist lookup for %s: %s', mbid, e)
+            return(None)
+
+    def _store(self, mbid: str, mode: Optional[str], lastfm_name: Optional[str]) -> None:
+        if (not mbid):
+            return(None)
+        try:
+            ttl = LASTFM_LOOKUP_FOUND_TTL if (mode) else LASTFM_LOOKUP_NOT_FOUND_TTL
+            self._get_dao().upsert_lookup(mbid, mode, lastfm_name, ttl)
+        except Exception as e:
+            logger.warning('Could not write lastfm artist lookup for %s: %s', mbid, e)
+
+lastfm_artist_index = LastFMArtistIndex()
@@ -1,9 +1,15 @@
-import requests
-
 from requests import Response
+from typing   import Optional
+
+from src.utils.util         import RequestType
+from src.utils.settings     import get_settings, Settings
+from src.utils.rate_limiter import throttle
+from src.utils.http         import get_session, HTTP_TIMEOUT
+from src.utils.lastfm_util  import LastFmArtist, LASTFM_CACHE_TTLS
+from src.utils.logger       import logger
 
-from src.utils.util import load_env, sleep, RequestType
-from src.utils.lastfm_util import LastFmArtist
+from src.db.DB                  import DB
+from src.db.DAOs.LastFMCacheDAO import LastFMCacheDAO
 
 class LastFMRequests:
     """To create requests to the LastFM API
@@ -11,13 +17,21 @@ class LastFMRequests:
     Attributes:
         _LASTFM_API_KEY
         _LASTFM_API_URL
+        _session: Pooled keep-alive session (shared by the process)
+        _cache: Response cache DAO
+            Created on first use
     """
-    def __init__(self) -> None:
+    def __init__(self, settings: Settings = None) -> None:
         """Initialize the object
+
+        Args:
+            settings (Settings, optional): Settings to use. Defaults to the process settings.
         """
-        env                  = load_env()
-        self._LASTFM_API_KEY = env['LASTFM_API_KEY']
+        settings             = settings or get_settings()
+        self._LASTFM_API_KEY = settings.lastfm_api_key
         self._LASTFM_API_URL = 'http://ws.audioscrobbler.com/2.0/'
+        self._session        = get_session()
+        self._cache: Optional[LastFMCacheDAO] = None
 
     def _query(self, params: dict[str, any], method: str = "") -> Response:
         """Query LastFM API
@@ -33,15 +47,43 @@ class LastFMRequests:
         paramsCopy            = params.copy()
         paramsCopy['api_key'] = self._LASTFM_API_KEY
         ## BEGIN REQUEST ##
-        response = requests.get(url, params=paramsCopy)
-        sleep(RequestType.LASTFM)
+        throttle(RequestType.LASTFM)
+        response = self._session.get(url, params=paramsCopy, timeout=HTTP_TIMEOUT)
         ## END REQUEST ##
 
         response.raise_for_status()
         return(response)
 
+    @staticmethod
+    def _cache_key(params: dict[str, any]) -> str:
+        """Cache key for a call: its params (lowercased, so names match case-insensitively) other than method and format"""
+        return('&'.join(f'{k}={str(params[k]).strip().lower()}' for k in sorted(params) if k not in ('method', 'format', 'api_key')))
+
+    def _get_cache(self) -> LastFMCacheDAO:
+        if (self._cache is None):
+            self._cache = LastFMCacheDAO(DB())
+        return(self._cache)
+
+    def _read_cached(self, method: str, key: str) -> Optional[dict]:
+        """Read from the response cache. A cache failure is treated as a miss"""
+        try:
+            return(self._get_cache().read_payload(method, key))
+        except Exception as e:
+            logger.warning(f'Could not read lastfm cache for {method} {key}: {e}')
+            return(None)
+
+    def _write_cached(self, method: str, key: str, data: dict) -> None:
+        """Write to the response cache. Error responses are not cached"""
+        if ('error' in data):
+            return(None)
+        try:
+            self._get_cache().upsert_payload(method, key, data, LASTFM_CACHE_TTLS[method])
+        except Exception as e:
+            logger.warning(f'Could not write lastfm cache for {method} {key}: {e}')
+        return(None)
+
     def get_lastfm_artist_data(self, baseParams: dict, name: str = "", mbid: str = "") -> LastFmArtist:
-        """Collect artist object from lastfm by name or mbid
+        """Collect artist object from lastfm by name or mbid. Methods in LASTFM_CACHE_TTLS are served from the response cache when possible
 
         Pre:
             name xor mbid
@@ -62,7 +104,65 @@ class LastFMRequests:
         elif(name):
             params["artist"] = name
 
+        method    = params.get('method', '')
+        cacheable = method in LASTFM_CACHE_TTLS
+        if (cacheable):
+            key    = self._cache_key(params)
+            cached = self._read_cached(method, key)
+            if (cached is not None):
+                return(cached)
+
         response: Response = self._query(params)
         api_data = response.json()
-        
+
+        if (cacheable):
+            self._write_cached(method, key, api_data)
+
         return(api_data)
+
+    def warm_cache(self, baseParams: dict, mbids: list[str]) -> int:
+        """Fill the response cache for many artists (by mbid), only calling lastfm for the ones not already cached
+
+        Args:
+            baseParams (dict): Base params for the call. The method must be in LASTFM_CACHE_TTLS
+            mbids (list[str]): Artist mbids
+
+        Returns:
+            int: Number of artists fetched from lastfm
+        """
+        method = baseParams.get('method', '')
+        assert(method in LASTFM_CACHE_TTLS)
+        keys   = {self._cache_key({**baseParams, 'mbid': mbid}): mbid for mbid in mbids}
+        cached = self._get_cache().read_payloads(method, list(keys.keys()))
+
+        fetched = {}
+        for key, mbid in keys.items():
+            if (key in cached):
+                continue
+            try:
+                params = baseParams.copy()
+                params['mbid'] = mbid
+                data = self._query(params).json()
+                if ('error' not in data):
+                    fetched[key] = data
+            except Exception as e:
+                logger.warning(f'Could not warm lastfm cache for {mbid}: {e}')
+
+        self._get_cache().upsert_payloads(method, fetched, LASTFM_CACHE_TTLS[method])
+        return(len(fetched))
+
+# Shared by everything that doesn't need its own client
+lastfm_requests = LastFMRequests()
+
+if __name__ == '__main__':
+    import sys
+
+    from src.db.DAOs.ArtistsDAO import ArtistsDAO
+
+    # Warm the cache for every artist in a genre e.g. python -m src.auth.LastFMRequests k-pop
+    #   Params must match the ones used by Artist for the entries to be hit
+    genre  = sys.argv[1]
+    mbids  = [artist['id'] for artist in ArtistsDAO(DB()).get_artists_in_genre(genre) if artist.get('id')]
+    lastfm = lastfm_requests
+    for baseParams in [{'method': 'artist.getInfo', 'format': 'json'}, {'method': 'artist.gettoptracks', 'format': 'json', 'limit': 5}]:
+        print(f'{baseParams['method']}: fetched {lastfm.warm_cache(baseParams, mbids)} of {len(mbids)}')
@@ -1,13 +1,19 @@
-import requests
-
 from requests import Response
+from typing   import Optional
+
+from src.utils.util             import RequestType
+from src.utils.rate_limiter     import throttle
+from src.utils.http             import get_session, HTTP_TIMEOUT
+from src.utils.musicbrainz_util import MUSICBRAINZ_API_URL, MUSICBRAINZ_LANGUAGES_TTL, MusicBrainzWorkLanguages, work_languages_to_languages
+from src.utils.settings         import get_settings, Settings
+from src.utils.logger           import logger
 
-from src.utils.util             import load_env, sleep, map_language_codes, filter_low_count_entries, RequestType
-from src.utils.musicbrainz_util import MUSICBRAINZ_API_URL
+from src.db.DB                           import DB
+from src.db.DAOs.MusicBrainzLanguagesDAO import MusicBrainzLanguagesDAO
 
 from src.services._shared_classes.PlaylistRequest import Language
 
-# TODO - authenticate and drop sleep time to .35 as per mb docs
+# TODO - authenticate and raise the rate limit (configure_rate_limit) as per mb docs
 
 class MusicBrainzRequests:
     """Class for making requests to MusicBrainz API
@@ -15,13 +21,20 @@ class MusicBrainzRequests:
     Attributes:
         _MUSICBRAINZ_API_URL
         _USER_AGENT
+        _session: Pooled keep-alive session (shared by the process)
+        _languages: Stored work languages DAO
     """
-    def __init__(self) -> None:
+    def __init__(self, settings: Settings = None) -> None:
         """Initialize object
+
+        Args:
+            settings (Settings, optional): Settings to use. Defaults to the process settings.
         """
-        env                       = load_env()
+        settings                  = settings or get_settings()
         self._MUSICBRAINZ_API_URL = MUSICBRAINZ_API_URL
-        self._USER_AGENT          = f'{env['APPLICATION_NAME']}/{env['APPLICATION_VERSION']} ( {env['APPLICATION_CONTACT']} )'
+        self._USER_AGENT          = settings.musicbrainz_user_agent
+        self._session             = get_session()
+        self._languages: Optional[MusicBrainzLanguagesDAO] = None
 
     def _query(self, params: dict[str, any], method: str = "") -> Response:
         """Query MusicBrainz
@@ -35,26 +48,51 @@ class MusicBrainzRequests:
         """
         url = self._MUSICBRAINZ_API_URL + method
         headers = {
-            'UserAgent': self._USER_AGENT
+            'User-Agent': self._USER_AGENT
         }
         ## BEGIN REQUEST ##
-        response = requests.get(url, params=params, headers=headers)
-        sleep(RequestType.MUSICBRAINZ)
+        throttle(RequestType.MUSICBRAINZ)
+        response = self._session.get(url, params=params, headers=headers, timeout=HTTP_TIMEOUT)
         ## END REQUEST ##
 
         response.raise_for_status()
         return(response)
 
-    def get_artist_languages(self, mbid: str, pct_min: int = 50) -> dict[Language, float]:
-        """Get the languages that an artist sings in
+    def _get_languages(self) -> MusicBrainzLanguagesDAO:
+        if (self._languages is None):
+            self._languages = MusicBrainzLanguagesDAO(DB())
+        return(self._languages)
+
+    def _read_stored_work_languages(self, mbid: str) -> Optional[MusicBrainzWorkLanguages]:
+        """Read stored work languages. A failure is treated as a miss"""
+        try:
+            return(self._get_languages().read_work_languages(mbid))
+        except Exception as e:
+            logger.warning(f'Could not read stored work languages for {mbid}: {e}')
+            return(None)
+
+    def _store_work_languages(self, mbid: str, work_languages: MusicBrainzWorkLanguages) -> None:
+        """Store work languages for MUSICBRAINZ_LANGUAGES_TTL"""
+        try:
+            self._get_languages().upsert_work_languages(mbid, work_languages, MUSICBRAINZ_LANGUAGES_TTL)
+        except Exception as e:
+            logger.warning(f'Could not store work languages for {mbid}: {e}')
+        return(None)
+
+    def get_artist_work_languages(self, mbid: str) -> MusicBrainzWorkLanguages:
+        """Get the language distribution of an artist's works. Stored per artist, so it is only requested
+            from musicbrainz once per MUSICBRAINZ_LANGUAGES_TTL whatever the request language, genre or niche level.
 
         Args:
             mbid (str): Artist mbid
-            pct_min (int, optional): The percentage of their works that must be sung in a language to count the language. Defaults to 50.
 
         Returns:
-            dict[Language, float]: Language: percent of works done in that language
+            MusicBrainzWorkLanguages: Language code: number of works in that language
         """
+        stored = self._read_stored_work_languages(mbid)
+        if (stored is not None):
+            return(stored)
+
         params = {
             'inc': 'works',
             'fmt': 'json'
@@ -62,11 +100,27 @@ class MusicBrainzRequests:
         response: Response = self._query(params, f'artist/{mbid}')
         data     = response.json()
 
-        languages: list[str] = []
-        works     = data.get('works', [])
+        work_languages: MusicBrainzWorkLanguages = {}
+        works = data.get('works', [])
         for work in works:
             language_code = work.get('language')
             if(language_code):
-                languages.append(language_code)
+                work_languages[language_code] = work_languages.get(language_code, 0) + 1
+
+        self._store_work_languages(mbid, work_languages)
+        return(work_languages)
+
+    def get_artist_languages(self, mbid: str, pct_min: int = 50) -> dict[Language, float]:
+        """Get the languages that an artist sings in
+
+        Args:
+            mbid (str): Artist mbid
+            pct_min (int, optional): The percentage of their works that must be sung in a language to count the language. Defaults to 50.
+
+        Returns:
+            dict[Language, float]: Language: number of works done in that language
+        """
+        return(work_languages_to_languages(self.get_artist_work_languages(mbid), pct_min = pct_min))
 
-        return(filter_low_count_entries(map_language_codes(languages), pct_min = pct_min))
+# Shared by everything that doesn't need its own client
+musicbrainz_requests = MusicBrainzRequests()
@@ -0,0 +1,82 @@
+import threading
+import contextvars
+
+from concurrent.futures import Future
+from typing             import Callable
+
+from src.utils.spotify_util import SpotifyArtist, SpotifyArtistID, SPOTIFY_MAX_LIMIT_ARTISTS
+
+class SpotifyArtistBatcher:
+    """Collects single artist lookups (e.g. from the generation pipeline's workers) and fetches them
+    together through the several-artists endpoint
+
+    A batch is sent once it is full or max_wait_s after its first id was submitted, whichever comes first.
+
+    Attributes:
+        fetch: Fetches up to SPOTIFY_MAX_LIMIT_ARTISTS artists by id, returning id: artist
+        max_wait_s
+    """
+    def __init__(self, fetch: Callable[[list[SpotifyArtistID]], dict[SpotifyArtistID, SpotifyArtist]], max_wait_s: float = 0.05) -> None:
+        """Initialize the batcher
+
+        Args:
+            fetch (Callable[[list[SpotifyArtistID]], dict[SpotifyArtistID, SpotifyArtist]]): Batch fetch function
+            max_wait_s (float, optional): Max time a lookup waits for the batch to fill. Defaults to 0.05.
+        """
+        self.fetch      = fetch
+        self.max_wait_s = max_wait_s
+        self._pending: dict[SpotifyArtistID, Future] = {}
+        self._lock  = threading.Lock()
+        self._timer: threading.Timer = None
+
+    def submit(self, id: SpotifyArtistID) -> Future:
+        """Queue an artist lookup
+
+        Args:
+            id (SpotifyArtistID): Spotify artist id
+
+        Returns:
+            Future: Resolves to the SpotifyArtist, or raises if it could not be fetched
+        """
+        with self._lock:
+            future = self._pending.get(id)
+            if (future is None):
+                future = Future()
+                self._pending[id] = future
+            full = len(self._pending) >= SPOTIFY_MAX_LIMIT_ARTISTS
+            if ((not full) and (self._timer is None)):
+                # The flush is counted for the generation of the lookup that started the batch
+                self._timer = threading.Timer(self.max_wait_s, contextvars.copy_context().run, args=(self.flush,))
+                self._timer.daemon = True
+                self._timer.start()
+
+        if (full):
+            self.flush()
+        return(future)
+
+    def flush(self) -> None:
+        """Send the pending lookups now"""
+        with self._lock:
+            pending       = self._pending
+            self._pending = {}
+            if (self._timer is not None):
+                self._timer.cancel()
+                self._timer = None
+
+        if (not pending):
+            return(None)
+
+        try:
+            artists = self.fetch(list(pending.keys()))
+        except Exception as e:
+            for future in pending.values():
+                future.set_exception(e)
+            return(None)
+
+        for id, future in pending.items():
+            artist = artists.get(id)
+            if (artist):
+                future.set_result(artist)
+            else:
+                future.set_exception(Exception(f'Spotify artist {id} not found'))
+        return(None)
@@ -0,0 +1,90 @@
+import threading
+
+from collections import OrderedDict
+
+from src.models.pydantic.BaseSchema import PyObjectId
+
+from src.db.DB            import DB
+from src.db.DAOs.UsersDAO import UserDAO
+
+from src.auth.SpotifyUser import SpotifyUser, spotify_user
+
+class SpotifyClientPool:
+    """Authenticated SpotifyUsers by user oid, so one process can serve several users at once
+    (run their code within use_spotify_user). Every user's requests go through the same app-wide rate limiter.
+
+    Users are built from the token store the first time they are needed, and the least recently used are dropped
+    past max_users.
+
+    Attributes:
+        max_users: Max users kept
+    """
+    def __init__(self, max_users: int = 100) -> None:
+        """Initialize the pool
+
+        Args:
+            max_users (int, optional): Max users kept. Defaults to 100.
+        """
+        assert(max_users > 0)
+        self.max_users = max_users
+        self._users: OrderedDict[str, SpotifyUser] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, auth_code: str) -> SpotifyUser:
+        """Authenticate a user with an authorization code (their tokens are saved to the token store)
+
+        Args:
+            auth_code (str): The authorization code
+
+        Returns:
+            SpotifyUser: The user
+        """
+        user = SpotifyUser()
+        user.initialize(auth_code)
+        self._put(user)
+        return(user)
+
+    def get(self, user_oid: PyObjectId) -> SpotifyUser:
+        """Get a user's client
+
+        Args:
+            user_oid (PyObjectId): The user's oid
+
+        Raises:
+            ValueError: If there is no such user, or no tokens stored for them
+
+        Returns:
+            SpotifyUser: The user
+        """
+        key = str(user_oid)
+        with self._lock:
+            user = self._users.get(key)
+            if (user is not None):
+                self._users.move_to_end(key)
+                return(user)
+
+        # The default user, if the process has one initialized for them
+        if (str(getattr(spotify_user, 'oid', '')) == key):
+            return(spotify_user)
+
+        user_entry = UserDAO(DB()).read_by_id(user_oid)
+        if (user_entry is None):
+            raise ValueError(f"No user '{user_oid}'.")
+        user = SpotifyUser()
+        user.initialize_from_token_store(user_entry.spotify_id)
+        self._put(user)
+        return(user)
+
+    def remove(self, user_oid: PyObjectId) -> None:
+        """Drop a user's client (e.g. on log out)"""
+        with self._lock:
+            self._users.pop(str(user_oid), None)
+
+    def _put(self, user: SpotifyUser) -> None:
+        with self._lock:
+            self._users[str(user.oid)] = user
+            self._users.move_to_end(str(user.oid))
+            while (len(self._users) > self.max_users):
+                self._users.popitem(last=False)
+
+spotify_client_pool = SpotifyClientPool()
@@ -0,0 +1,130 @@
+import time
+import threading
+
+from collections import OrderedDict
+from datetime    import datetime, timezone
+from typing      import Optional
+
+from src.utils.spotify_util import SPOTIFY_CACHE_TTLS
+from src.utils.logger       import logger
+
+from src.db.DB                   import DB
+from src.db.DAOs.SpotifyCacheDAO import SpotifyCacheDAO
+
+class SpotifyEntityCache:
+    """Cache for Spotify entities which are not user specific (artist objects, artists' top tracks), shared by every user.
+
+    Two tiers: an in-process LRU, in front of the spotify_cache collection (so entries outlive the process and are
+    shared between workers). Entries expire after their kind's TTL (SPOTIFY_CACHE_TTLS) in both tiers.
+    Collection failures are treated as misses.
+
+    Attributes:
+        max_local_entries: Max entries in the in-process tier
+        _dao: Cache DAO
+    """
+    def __init__(self, max_local_entries: int = 10000) -> None:
+        """Initialize the cache
+
+        Args:
+            max_local_entries (int, optional): Max entries in the in-process tier. Defaults to 10000.
+        """
+        assert(max_local_entries > 0)
+        self.max_local_entries = max_local_entries
+        # (kind, key): (time.monotonic() it expires at, entity)
+        self._local: OrderedDict[tuple[str, str], tuple[float, any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dao: Optional[SpotifyCacheDAO] = None
+
+    def _get_dao(self) -> SpotifyCacheDAO:
+        if (self._dao is None):
+            self._dao = SpotifyCacheDAO(DB())
+        return(self._dao)
+
+    def get(self, kind: str, key: str) -> Optional[any]:
+        """Get a cached entity
+
+        Args:
+            kind (str): The kind of entity, one of SPOTIFY_CACHE_TTLS
+            key (str): The key (e.g. spotify id)
+
+        Returns:
+            Optional[any]: The entity, None on a miss
+        """
+        return(self.get_many(kind, [key]).get(key))
+
+    def get_many(self, kind: str, keys: list[str]) -> dict[str, any]:
+        """Get many cached entities of a kind, with at most one query for the ones not in the in-process tier
+
+        Args:
+            kind (str): The kind of entity, one of SPOTIFY_CACHE_TTLS
+            keys (list[str]): The keys (e.g. spotify ids)
+
+        Returns:
+            dict[str, any]: key: entity, for the keys that were hit
+        """
+        assert(kind in SPOTIFY_CACHE_TTLS)
+        hits = {}
+        now  = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._local.get((kind, key))
+                if (entry is None):
+                    continue
+                if (entry[0] <= now):
+                    del self._local[(kind, key)]
+                    continue
+                self._local.move_to_end((kind, key))
+                hits[key] = entry[1]
+
+        missing = [key for key in dict.fromkeys(keys) if key not in hits]
+        if (missing):
+            try:
+                stored = self._get_dao().read_payloads(kind, missing)
+            except Exception as e:
+                logger.warning('Could not read spotify cache for %s: %s', kind, e)
+                stored = {}
+            # Kept locally until their stored copy expires
+            utc_now = datetime.now(timezone.utc)
+            with self._lock:
+                for key, (entity, expires_at) in stored.items():
+                    self._put_local_entry(kind, key, entity, now + (expires_at - utc_now).total_seconds())
+                    hits[key] = entity
+        return(hits)
+
+    def put(self, kind: str, key: str, entity: any) -> None:
+        """Cache an entity
+
+        Args:
+            kind (str): The kind of entity, one of SPOTIFY_CACHE_TTLS
+            key (str): The key (e.g. spotify id)
+            entity (any): The entity (json serializable)
+        """
+        self.put_many(kind, {key: entity})
+
+    def put_many(self, kind: str, entities: dict[str, any]) -> None:
+        """Cache many entities of a kind, with one bulk write
+
+        Args:
+            kind (str): The kind of entity, one of SPOTIFY_CACHE_TTLS
+            entities (dict[str, any]): key: entity (json serializable)
+        """
+        assert(kind in SPOTIFY_CACHE_TTLS)
+        if (not entities):
+            return(None)
+        expires_at = time.monotonic() + SPOTIFY_CACHE_TTLS[kind].total_seconds()
+        with self._lock:
+            for key, entity in entities.items():
+                self._put_local_entry(kind, key, entity, expires_at)
+        try:
+            self._get_dao().upsert_payloads(kind, entities, SPOTIFY_CACHE_TTLS[kind])
+        except Exception as e:
+            logger.warning('Could not write spotify cache for %s: %s', kind, e)
+
+    def _put_local_entry(self, kind: str, key: str, entity: any, expires_at: float) -> None:
+        """Put an entry in the in-process tier, dropping the least recently used past the max (hold the lock)"""
+        self._local[(kind, key)] = (expires_at, entity)
+        self._local.move_to_end((kind, key))
+        while (len(self._local) > self.max_local_entries):
+            self._local.popitem(last=False)
+
+spotify_cache = SpotifyEntityCache()
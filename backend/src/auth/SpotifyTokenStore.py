@@ -0,0 +1,22 @@
+from spotipy.cache_handler import CacheHandler
+
+from src.db.DB                    import DB
+from src.db.DAOs.SpotifyTokensDAO import SpotifyTokensDAO
+
+class SpotifyTokenStore(CacheHandler):
+    """spotipy token cache for one user, kept in the db, so any worker process can build (and refresh) the user's client
+
+    spotipy refreshes the access token when it expires and saves the new one here.
+
+    Attributes:
+        spotify_id: The user's Spotify ID
+    """
+    def __init__(self, spotify_id: str) -> None:
+        self.spotify_id = spotify_id
+
+    def get_cached_token(self) -> dict | None:
+        return(SpotifyTokensDAO(DB()).read_token_info(self.spotify_id))
+
+    def save_token_to_cache(self, token_info: dict) -> None:
+        SpotifyTokensDAO(DB()).upsert_token_info(self.spotify_id, token_info)
+        return(None)
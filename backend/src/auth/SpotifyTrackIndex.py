@@ -0,0 +1,90 @@
+from typing import Optional
+
+from src.utils.spotify_util import SpotifyTrack, SpotifyTrackNotFoundError, find_exact_match, track_resolution_key, compact_spotify_track, expand_compact_track, SPOTIFY_TRACK_FOUND_TTL, SPOTIFY_TRACK_NOT_FOUND_TTL
+from src.utils.logger       import logger
+
+from src.models.pydantic.SpotifyTrackResolution import SpotifyTrackResolution, ResolvedTrack
+
+from src.db.DB                              import DB
+from src.db.DAOs.SpotifyTrackResolutionsDAO import SpotifyTrackResolutionsDAO
+
+from src.auth.SpotifyUser import get_spotify_user
+
+class SpotifyTrackIndex:
+    """Resolves (track name, artist) pairs to Spotify tracks (search, then exact match), keeping every resolution in the db
+    so that the same pair is only searched for once per TTL across requests. Tracks which were not found are kept too, for less long.
+
+    Index failures are treated as misses.
+
+    Attributes:
+        _dao: Track index DAO
+    """
+    def __init__(self) -> None:
+        self._dao: Optional[SpotifyTrackResolutionsDAO] = None
+
+    def _get_dao(self) -> SpotifyTrackResolutionsDAO:
+        if (self._dao is None):
+            self._dao = SpotifyTrackResolutionsDAO(DB())
+        return(self._dao)
+
+    def read_many(self, pairs: list[tuple[str, str]]) -> dict[str, SpotifyTrackResolution]:
+        """Read the stored resolutions of many (track name, artist) pairs in one query
+
+        Args:
+            pairs (list[tuple[str, str]]): (track name, artist) pairs
+
+        Returns:
+            dict[str, SpotifyTrackResolution]: track_resolution_key: resolution, for the pairs that were hit
+        """
+        if (not pairs):
+            return({})
+        try:
+            return(self._get_dao().read_resolutions(list({track_resolution_key(name, artist) for name, artist in pairs})))
+        except Exception as e:
+            logger.warning('Could not read spotify track index: %s', e)
+            return({})
+
+    def resolve(self, name: str, artist: str, known: Optional[SpotifyTrackResolution] = None, prefetched: bool = False) -> Optional[SpotifyTrack]:
+        """Get the Spotify track for a (track name, artist) pair, only searching Spotify on an index miss
+
+        Args:
+            name (str): Track name
+            artist (str): Artist name
+            known (Optional[SpotifyTrackResolution], optional): The pair's resolution, if already read (see read_many). Defaults to None.
+            prefetched (bool, optional): Was the resolution already read, so that no known resolution means the pair has none? Defaults to False.
+
+        Raises:
+            Exception: If the search fails (failures are not stored)
+
+        Returns:
+            Optional[SpotifyTrack]: The track (partial if from the index, see expand_compact_track), None if Spotify has none
+        """
+        key        = track_resolution_key(name, artist)
+        resolution = known if (prefetched) else (known or self._read(key))
+        if (resolution is not None):
+            return(expand_compact_track(resolution.track.model_dump()) if (resolution.track) else None)
+
+        try:
+            spotify_track = find_exact_match(get_spotify_user().get_spotify_tracks_direct(name, artist), name, artist)
+        except SpotifyTrackNotFoundError:
+            spotify_track = None
+        self._store(key, spotify_track)
+        return(spotify_track)
+
+    def _read(self, key: str) -> Optional[SpotifyTrackResolution]:
+        try:
+            return(self._get_dao().read_resolution(key))
+        except Exception as e:
+            logger.warning('Could not read spotify track index for %s: %s', key, e)
+            return(None)
+
+    def _store(self, key: str, spotify_track: Optional[SpotifyTrack]) -> None:
+        try:
+            if (spotify_track):
+                self._get_dao().upsert_resolution(key, ResolvedTrack(**compact_spotify_track(spotify_track)), SPOTIFY_TRACK_FOUND_TTL)
+            else:
+                self._get_dao().upsert_resolution(key, None, SPOTIFY_TRACK_NOT_FOUND_TTL)
+        except Exception as e:
+            logger.warning('Could not write spotify track index for %s: %s', key, e)
+
+spotify_track_index = SpotifyTrackIndex()
@@ -3,13 +3,18 @@ import base64
 import spotipy
 import requests
 
-from PIL     import Image, ImageDraw, ImageFont
-from typing  import Optional, Type, ClassVar
-from spotipy import SpotifyOAuth
-from pathlib import Path
-
-from src.utils.spotify_util import get_artists_ids_and_genres_from_artists, get_artist_ids_from_tracks, SpotifyArtist, SpotifyTrack, SpotifyArtistID, SpotifyGenreInterestCount, SPOTIFY_MAX_LIMIT_PAGINATION
-from src.utils.util         import load_env, sleep,filter_low_count_entries, merge_dicts_with_weight, scale_from_highest, RequestType
+from PIL         import Image, ImageDraw, ImageFont
+from typing      import Optional, Iterator
+from spotipy     import SpotifyOAuth
+from pathlib     import Path
+from contextlib  import contextmanager
+from contextvars import ContextVar
+
+from src.utils.spotify_util import SpotifyTrackNotFoundError, get_artists_ids_and_genres_from_artists, get_artist_ids_from_tracks, SpotifyArtist, SpotifyTrack, SpotifyArtistID, SpotifyGenreInterestCount, SPOTIFY_MAX_LIMIT_PAGINATION, SPOTIFY_MAX_LIMIT_ARTISTS
+from src.utils.util         import filter_low_count_entries, merge_dicts_with_weight, scale_from_highest, RequestType
+from src.utils.rate_limiter import throttle
+from src.utils.http         import build_session, HTTP_TIMEOUT
+from src.utils.settings     import get_settings
 from src.utils.logger       import logger
 
 from src.models.pydantic.BaseSchema import PyObjectId
@@ -18,34 +23,28 @@ from src.models.pydantic.User       import User
 from src.db.DB            import DB
 from src.db.DAOs.UsersDAO import UserDAO
 
+from src.auth.SpotifyArtistBatcher import SpotifyArtistBatcher
+from src.auth.SpotifyTokenStore    import SpotifyTokenStore
+from src.auth.SpotifyEntityCache   import spotify_cache
+
 from config.personal_init import token
 
 class SpotifyUser:
     """Spotify-Authenticated User
 
-    Raises:
-        Exception: If more than one user is defined
+    Code serving a user gets theirs with get_spotify_user() (see use_spotify_user and SpotifyClientPool),
+    scripts initialize and use the process' default user, spotify_user.
     """
-    _instance: ClassVar[Optional['SpotifyUser']] = None
-
-    client: spotipy.Spotify
-    user  : dict
-    name  : str
-    id    : str
-    oid   : PyObjectId
-
-    def __new__(cls: Type['SpotifyUser']) -> 'SpotifyUser':
-        """Create the user
-
-        Args:
-            cls (Type[&#39;SpotifyUser&#39;]): SpotifyUser
-
-        Returns:
-            SpotifyUser: The user, authenticated
-        """
-        if(cls._instance is None):
-            cls._instance = super(SpotifyUser, cls).__new__(cls)
-        return(cls._instance)
+    client        : spotipy.Spotify
+    user          : dict
+    name          : str
+    id            : str
+    oid           : PyObjectId
+    artist_batcher: SpotifyArtistBatcher
+
+    def __init__(self) -> None:
+        """Create the user (authenticate with one of the initialize methods)"""
+        self.artist_batcher = SpotifyArtistBatcher(self._fetch_spotify_artists_by_ids)
     '''
     keep the refresh token in the db i guess or something idk look it up
     todo frontend browser cookies
@@ -62,19 +61,62 @@ class SpotifyUser:
             return jsonify({'message': 'Spotify user initialized successfully'}), 200
     '''
     def initialize(self, auth_code: str) -> None:
-        """Initialize the SpotifyUser instance with the provided authorization code."""
-        env = load_env()
+        """Initialize the SpotifyUser instance with the provided authorization code.
+        The tokens are saved to the token store, so the user's client can be rebuilt (and refreshed) with initialize_from_token_store."""
+        settings = get_settings()
         auth_manager = SpotifyOAuth(
-            client_id     = env['SPOTIFY_CLIENT_ID'],
-            client_secret = env['SPOTIFY_CLIENT_SECRET'],
-            redirect_uri  = env['SPOTIFY_REDIRECT_URI'],
-            scope         = env['SCOPE'],
-            cache_path    = env['CACHE_PATH']
+            client_id     = settings.spotify_client_id,
+            client_secret = settings.spotify_client_secret,
+            redirect_uri  = settings.spotify_redirect_uri,
+            scope         = settings.spotify_scope,
+            cache_path    = settings.spotify_cache_path
         )
 
         # Exchange auth code for tokens
         token_info = auth_manager.get_access_token(auth_code, as_dict=True)
-        self.client = spotipy.Spotify(auth=token_info['access_token'])
+        self.initialize_from_access_token(token_info['access_token'])
+        SpotifyTokenStore(self.id).save_token_to_cache(token_info)
+
+    def initialize_from_access_token(self, access_token: str) -> None:
+        """Initialize the SpotifyUser instance with an access token (e.g. replaying recorded requests, see http_recording)"""
+        # Own pooled session (spotipy sets auth headers per request, so it is not shared with the other clients)
+        self._initialize_client(spotipy.Spotify(
+            auth             = access_token,
+            requests_session = build_session(),
+            requests_timeout = HTTP_TIMEOUT
+        ))
+
+    def initialize_from_token_store(self, spotify_id: str) -> None:
+        """Initialize the SpotifyUser instance with the user's tokens from the token store. The access token is refreshed as it expires
+
+        Args:
+            spotify_id (str): The user's Spotify ID
+
+        Raises:
+            ValueError: If the token store has no tokens for the user
+        """
+        token_store = SpotifyTokenStore(spotify_id)
+        if (token_store.get_cached_token() is None):
+            raise ValueError(f"No Spotify tokens stored for '{spotify_id}'.")
+
+        settings = get_settings()
+        auth_manager = SpotifyOAuth(
+            client_id        = settings.spotify_client_id,
+            client_secret    = settings.spotify_client_secret,
+            redirect_uri     = settings.spotify_redirect_uri,
+            scope            = settings.spotify_scope,
+            cache_handler    = token_store,
+            requests_timeout = HTTP_TIMEOUT
+        )
+        self._initialize_client(spotipy.Spotify(
+            auth_manager     = auth_manager,
+            requests_session = build_session(),
+            requests_timeout = HTTP_TIMEOUT
+        ))
+
+    def _initialize_client(self, client: spotipy.Spotify) -> None:
+        """Use an authenticated client, loading the user's profile and db entry"""
+        self.client = client
         self.user = self.client.current_user()
         self.name = self.user['display_name']
         self.id = self.user['id']
@@ -98,7 +140,7 @@ class SpotifyUser:
             artist (str): Artist Name
 
         Raises:
-            Exception: If no tracks are found
+            SpotifyTrackNotFoundError: If no tracks are found
 
         Returns:
             list[SpotifyTrack]: A list of the top 10 matching tracks
@@ -107,34 +149,89 @@ class SpotifyUser:
         q = f"track:{name} artist:{artist}"
 
         ## BEGIN REQUEST ##
+        throttle(RequestType.SPOTIFY)  # Respect API rate limits
         # Perform the search on Spotify for the track with a limit of 10
         search_results = self.client.search(q=q, type='track', limit=10)
-        sleep(RequestType.SPOTIFY)  # Respect API rate limits
         ## END REQUEST ##
 
         # Extract the list of track items from the search results
         spotify_tracks = search_results.get('tracks', {}).get('items', []) or None
         if(not spotify_tracks):
-            raise Exception(f"No Spotify tracks found for {name} by {artist}.")
+            raise SpotifyTrackNotFoundError(f"No Spotify tracks found for {name} by {artist}.")
 
         return(spotify_tracks)
 
     def get_spotify_artist_by_id(self, id: str) -> SpotifyArtist:
-        """Get a spotify artist object by their spotify id
+        """Get a spotify artist object by their spotify id, from the entity cache if possible. Concurrent lookups are batched together
 
         Args:
             id (str): Spotify id
 
+        Raises:
+            Exception: If the artist is not found
+
         Returns:
             SpotifyArtist: The artist as returned by Spotify
         """
-        ## BEGIN REQUEST ##
-        # Retrieve the full artist object from Spotify using the artist ID
-        spotify_artist = self.client.artist(id)
-        sleep(RequestType.SPOTIFY)
-        ## END REQUEST ##
+        artist = spotify_cache.get('artist', id)
+        if (artist):
+            return(artist)
+        return(self.artist_batcher.submit(id).result())
+
+    def get_spotify_artists_by_ids(self, ids: list[SpotifyArtistID]) -> dict[SpotifyArtistID, SpotifyArtist]:
+        """Get many spotify artist objects, from the entity cache if possible and SPOTIFY_MAX_LIMIT_ARTISTS per request otherwise
 
-        return(spotify_artist)
+        Args:
+            ids (list[SpotifyArtistID]): Spotify ids
+
+        Returns:
+            dict[SpotifyArtistID, SpotifyArtist]: id: artist as returned by Spotify, for the artists that were found
+        """
+        unique_ids = list(dict.fromkeys(id for id in ids if id))
+        artists    = spotify_cache.get_many('artist', unique_ids)
+        artists.update(self._fetch_spotify_artists_by_ids([id for id in unique_ids if id not in artists]))
+        return(artists)
+
+    def _fetch_spotify_artists_by_ids(self, ids: list[SpotifyArtistID]) -> dict[SpotifyArtistID, SpotifyArtist]:
+        """Request many spotify artist objects, SPOTIFY_MAX_LIMIT_ARTISTS per request, and cache them
+
+        Args:
+            ids (list[SpotifyArtistID]): Spotify ids
+
+        Returns:
+            dict[SpotifyArtistID, SpotifyArtist]: id: artist as returned by Spotify, for the artists that were found
+        """
+        unique_ids = list(dict.fromkeys(id for id in ids if id))
+        artists    = {}
+        for i in range(0, len(unique_ids), SPOTIFY_MAX_LIMIT_ARTISTS):
+            ## BEGIN REQUEST ##
+            throttle(RequestType.SPOTIFY)
+            results = self.client.artists(unique_ids[i:i+SPOTIFY_MAX_LIMIT_ARTISTS])
+            ## END REQUEST ##
+            for artist in results.get('artists', []):
+                # Unknown ids come back as None
+                if (artist):
+                    artists[artist['id']] = artist
+        spotify_cache.put_many('artist', artists)
+        return(artists)
+
+    def get_spotify_artist_top_tracks(self, id: SpotifyArtistID) -> list[SpotifyTrack]:
+        """Get an artist's top tracks, from the entity cache if possible
+
+        Args:
+            id (SpotifyArtistID): Spotify artist id
+
+        Returns:
+            list[SpotifyTrack]: The top tracks (a new list each call), empty if they could not be fetched
+        """
+        top_tracks = spotify_cache.get('artist_top_tracks', id)
+        if (top_tracks is None):
+            response = self.execute('artist_top_tracks', id)
+            if (response is None):
+                return([])
+            top_tracks = response.get('tracks', [])
+            spotify_cache.put('artist_top_tracks', id, top_tracks)
+        return(list(top_tracks))
 
     ## USER SPECIFIC ITEMS ##
 
@@ -161,6 +258,7 @@ class SpotifyUser:
             limit = (SPOTIFY_MAX_LIMIT_PAGINATION if(num_items >= SPOTIFY_MAX_LIMIT_PAGINATION) else num_items)
 
             # Get initial items
+            throttle(RequestType.SPOTIFY)
             if(type == "top_artists"):
                 results = self.client.current_user_top_artists(limit = limit, time_range = time_range, offset = offset)
             elif(type == "top_tracks"):
@@ -186,12 +284,12 @@ class SpotifyUser:
             SpotifyGenreInterestCount: Genre: Count
         """
         genres = {}
+        # Fetch the uncached artists in batches
+        artist_cache.update(self.get_spotify_artists_by_ids([artist_id for artist_id in artist_ids if artist_id not in artist_cache]))
         for artist_id in artist_ids:
-            if artist_id not in artist_cache:
-                artist_details = self.client.artist(artist_id)
-                artist_cache[artist_id] = artist_details
-            else:
-                artist_details = artist_cache[artist_id]
+            artist_details = artist_cache.get(artist_id)
+            if (not artist_details):
+                continue
             for genre in artist_details['genres']:
                 genres[genre] = genres.get(genre, 0) + 1
         return(genres)
@@ -248,13 +346,13 @@ class SpotifyUser:
 
         while True:
             # BEGIN REQUEST
+            throttle(RequestType.SPOTIFY)
             response = self.client.playlist_items(
                 playlist_id,
                 offset=offset,
                 limit=limit,
                 fields='items(track(id,name,duration_ms,artists(name,id),album(name),external_urls)),next'
             )
-            sleep(RequestType.SPOTIFY)
             # END REQUEST
 
             items = response.get('items', [])
@@ -286,9 +384,9 @@ class SpotifyUser:
             method = getattr(self.client, method_name)
 
             ## BEGIN REQUEST ##
+            throttle(RequestType.SPOTIFY)
             # Execute the method with provided arguments
             result = method(*args, **kwargs)
-            sleep(RequestType.SPOTIFY)
             ## END REQUEST ##
 
             return(result)
@@ -337,13 +435,37 @@ class SpotifyUser:
             image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
 
         try:
+            throttle(RequestType.SPOTIFY)
             self.client.playlist_upload_cover_image(playlist_id, image_base64)
         except requests.exceptions.ReadTimeout:
             # Handle the timeout exception as needed
             logger.error("Timeout occurred while uploading the cover image. Please try again later.")
 
+# The process' default user (for scripts)
 spotify_user = SpotifyUser()
 
+_current_spotify_user: ContextVar[Optional[SpotifyUser]] = ContextVar('spotify_user', default=None)
+
+def get_spotify_user() -> SpotifyUser:
+    """Get the user the code running in this context serves (the default user outside of use_spotify_user)"""
+    return(_current_spotify_user.get() or spotify_user)
+
+@contextmanager
+def use_spotify_user(user: SpotifyUser) -> Iterator[SpotifyUser]:
+    """Serve a user in this context (and in pipeline threads started from it)
+
+    Args:
+        user (SpotifyUser): The user, initialized
+
+    Yields:
+        Iterator[SpotifyUser]: The user
+    """
+    token = _current_spotify_user.set(user)
+    try:
+        yield(user)
+    finally:
+        _current_spotify_user.reset(token)
+
 
 if __name__ == '__main__':
     spotify_user.initialize(token)
@@ -1,12 +1,22 @@
+import random
+
+from typing                     import Iterator, Optional
+from datetime                   import datetime, timezone
+from pymongo                    import ASCENDING, UpdateOne
 from pymongo.collection         import Collection
+from pymongo.results            import BulkWriteResult
 from bson.objectid              import ObjectId
 from pymongo.synchronous.cursor import Cursor
 
-from src.utils.musicbrainz_util               import get_mb_genre
+from src.utils.musicbrainz_util               import get_mb_genre, ArtistMetricsBand, ARTIST_METRICS_TTL
 from src.services.genre_handling.valid_genres import genre_is_spotify
 
 from src.db.DB import DB
 
+# Only what is needed to create an Artist (the full musicbrainz documents can be several MB)
+# work_languages is set by scripts/db/addArtistWorkLanguages.js, metrics by update_metrics_many
+ARTIST_PROJECTION = {'_id': 0, 'id': 1, 'name': 1, 'work_languages': 1, 'metrics': 1, 'metrics_updated_at': 1}
+
 class ArtistsDAO:
     """Artist Data Access Object
     """
@@ -18,6 +28,34 @@ class ArtistsDAO:
         """
         self.collection: Collection = db.get_collection('artists')
 
+    @staticmethod
+    def _in_band_or_unknown(band: ArtistMetricsBand) -> dict:
+        """Query for the artists whose stored metrics are stale or unknown, or fall inside the band
+            (the same checks as the Validator's, on the stored metrics)
+
+        Args:
+            band (ArtistMetricsBand): The band
+
+        Returns:
+            dict: The query
+        """
+        return({'$or': [
+            {'metrics_updated_at': {'$not': {'$gt': datetime.now(timezone.utc) - ARTIST_METRICS_TTL}}},
+            {'$and': [
+                # Listeners and playcount are only too high or too low together
+                {'$or': [{'metrics.lastfm_listeners': {'$lte': band['lastfm_listeners_max']}}, {'metrics.lastfm_playcount': {'$lte': band['lastfm_playcount_max']}}]},
+                {'$or': [{'metrics.lastfm_listeners': {'$gte': band['lastfm_listeners_min']}}, {'metrics.lastfm_playcount': {'$gte': band['lastfm_playcount_min']}}]},
+                {'metrics.lastfm_likeness': {'$gte': band['lastfm_likeness_min']}},
+                {'metrics.lastfm_tags': band['lastfm_genre']},
+                {'metrics.lastfm_conglomerate': False},
+                # Unknown until the artist is found on spotify
+                {'$or': [
+                    {'metrics.spotify_followers': None},
+                    {'metrics.spotify_followers': {'$gte': band['spotify_followers_min'], '$lte': band['spotify_followers_max']}}
+                ]}
+            ]}
+        ]})
+
     def get_artist(self, artist_id: ObjectId) -> dict[str, any]:
         return(self.collection.find_one({'_id': artist_id}))
 
@@ -35,15 +73,70 @@ class ArtistsDAO:
 
         return(self.collection.find({'genres.name': genre}))
 
-    def count_artists_in_genre(self, genre: str) -> int:
+    def iter_artist_chunks_in_genre(self, genre: str, chunk_size: int = 25, band: Optional[ArtistMetricsBand] = None) -> Iterator[list[dict[str, any]]]:
+        """Lazily get the artists in a genre, in random order and in chunks, with only what is needed to create an Artist
+
+        Artists are read in order of their precomputed `random_key` (see scripts/db/addArtistRandomKeys.js) starting from a random point,
+        so the first chunk is ready as soon as its documents are read instead of after the whole genre is.
+        Artists without a random key come last.
+
+        Args:
+            genre (str): The genre
+            chunk_size (int, optional): Artists per chunk. Defaults to 25.
+            band (Optional[ArtistMetricsBand], optional): If given, skip the artists whose fresh stored metrics fall outside it. Defaults to None.
+
+        Yields:
+            Iterator[list[dict[str, any]]]: Chunks of {id, name, work_languages, metrics, metrics_updated_at}
+        """
+        if (genre_is_spotify(genre)):
+            genre = get_mb_genre(genre)
+
+        start      = random.random()
+        band_query = self._in_band_or_unknown(band) if (band) else {}
+        queries    = [
+            {'genres.name': genre, 'random_key': {'$gte': start}, **band_query},
+            {'genres.name': genre, 'random_key': {'$lt': start}, **band_query},
+            {'genres.name': genre, 'random_key': {'$exists': False}, **band_query}
+        ]
+
+        chunk = []
+        for query in queries:
+            cursor = self.collection.find(query, ARTIST_PROJECTION).batch_size(chunk_size)
+            if ('$exists' not in query['random_key']):
+                cursor = cursor.sort('random_key', ASCENDING)
+            for artist in cursor:
+                chunk.append(artist)
+                if (len(chunk) >= chunk_size):
+                    yield(chunk)
+                    chunk = []
+        if (chunk):
+            yield(chunk)
+
+    def count_artists_in_genre(self, genre: str, band: Optional[ArtistMetricsBand] = None) -> int:
         """Count all artists that belong to a certain genre.
 
         Args:
             genre (str): The genre to count artists in.
+            band (Optional[ArtistMetricsBand], optional): If given, don't count the artists whose fresh stored metrics fall outside it. Defaults to None.
 
         Returns:
             int: The count of artists in the specified genre.
         """
         if (genre_is_spotify(genre)):
             genre = get_mb_genre(genre)
-        return(self.collection.count_documents({'genres.name': genre}))
+        band_query = self._in_band_or_unknown(band) if (band) else {}
+        return(self.collection.count_documents({'genres.name': genre, **band_query}))
+
+    def update_metrics_many(self, updates: dict[str, dict[str, any]]) -> Optional[BulkWriteResult]:
+        """Write metrics onto many artists in one bulk write (by mbid, see scripts/db/createArtistIdIndex.js)
+
+        Args:
+            updates (dict[str, dict[str, any]]): mbid: fields to set (e.g. {'metrics.spotify_followers': 1200, 'metrics_updated_at': ...})
+
+        Returns:
+            Optional[BulkWriteResult]: The result of the bulk write, None if there was nothing to write
+        """
+        if (not updates):
+            return(None)
+        operations = [UpdateOne({'id': mbid}, {'$set': fields}) for mbid, fields in updates.items()]
+        return(self.collection.bulk_write(operations, ordered=False))
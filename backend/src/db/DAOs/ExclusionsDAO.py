@@ -0,0 +1,56 @@
+from typing          import Iterator, Optional
+from datetime        import datetime, timezone
+from pymongo         import ASCENDING
+from pymongo.results import BulkWriteResult
+
+from src.models.pydantic.Exclusion import Exclusion
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class ExclusionsDAO(BaseDAO[Exclusion]):
+    """
+    Data Access Object for the artists excluded from requests, one document per (request params, artist).
+    Stale exclusions are evicted by a TTL index on `expires_at`.
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("exclusions"), Exclusion)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("params_key", ASCENDING), ("mbid", ASCENDING)], unique=True)
+        # Documents without an expires_at are never evicted
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def _live(params_key: str) -> dict:
+        """Filter for the exclusions of the request params which have not expired"""
+        # The TTL monitor only runs every minute
+        return ({"params_key": params_key, "$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.now(timezone.utc)}}]})
+
+    def read_mbids(self, params_key: str) -> Iterator[str]:
+        """
+        Reads the mbids of the artists excluded for the request params, without the rest of the exclusions.
+
+        Args:
+            params_key (str): The key of the request params (see ParamsCache.key).
+
+        Returns:
+            Iterator[str]: The mbids, streamed from the cursor.
+        """
+        documents = self.collection.find(self._live(params_key), {"_id": 0, "mbid": 1}).batch_size(10000)
+        return (doc["mbid"] for doc in documents)
+
+    def upsert_many(self, exclusions: list[Exclusion]) -> Optional[BulkWriteResult]:
+        """
+        Writes many exclusions in one bulk write, replacing any previous exclusions of their artists for the same params.
+
+        Args:
+            exclusions (list[Exclusion]): The exclusions.
+
+        Returns:
+            Optional[BulkWriteResult]: The result of the bulk write, None if there was nothing to write.
+        """
+        if (not exclusions):
+            return (None)
+        operations = [self.upsert_op({"params_key": exclusion.params_key, "mbid": exclusion.mbid}, exclusion) for exclusion in exclusions]
+        return (self.collection.bulk_write(operations, ordered=False))
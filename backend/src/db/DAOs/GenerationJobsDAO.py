@@ -0,0 +1,132 @@
+from typing          import List, Optional
+from datetime        import datetime, timezone
+from pymongo         import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.results import UpdateResult
+from bson            import ObjectId
+
+from src.models.pydantic.GenerationJob import GenerationJob, JobProgress
+from src.utils.util                    import JobStatus, JOBSTATUSMAP
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class GenerationJobsDAO(BaseDAO[GenerationJob]):
+    """
+    Data Access Object for background playlist generation jobs (see GenerationJobScheduler).
+    Status and progress are kept up to date by the worker running the job, so they can be polled cheaply.
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("generation_jobs"), GenerationJob)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("status", ASCENDING), ("created_at", ASCENDING)])
+        self.collection.create_index([("user", ASCENDING), ("created_at", DESCENDING)])
+
+    def read_by_status(self, status: JobStatus) -> List[GenerationJob]:
+        """
+        Reads the jobs with a status, oldest first.
+
+        Args:
+            status (JobStatus): The status.
+
+        Returns:
+            List[GenerationJob]: The jobs.
+        """
+        documents = self.collection.find({"status": JOBSTATUSMAP.inv[status]}).sort("created_at", ASCENDING)
+        return ([GenerationJob.model_validate(doc) for doc in documents])
+
+    def read_by_user(self, user_id: str, limit: int = 20) -> List[GenerationJob]:
+        """
+        Reads a user's latest jobs, newest first.
+
+        Args:
+            user_id (str): The ID of the user.
+            limit (int, optional): Max number of jobs. Defaults to 20.
+
+        Returns:
+            List[GenerationJob]: The jobs.
+        """
+        documents = self.collection.find({"user": ObjectId(user_id)}).sort("created_at", DESCENDING).limit(limit)
+        return ([GenerationJob.model_validate(doc) for doc in documents])
+
+    def start(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Marks a queued job as running, unless it was cancelled.
+
+        Args:
+            job_id (str): The ObjectId of the job.
+
+        Returns:
+            Optional[GenerationJob]: The job, or None if it was not queued or was cancelled.
+        """
+        now = datetime.now(timezone.utc)
+        raw_data = self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": JOBSTATUSMAP.inv[JobStatus.QUEUED], "cancel_requested": False},
+            {"$set": {"status": JOBSTATUSMAP.inv[JobStatus.RUNNING], "started_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        return (GenerationJob.model_validate(raw_data) if (raw_data) else None)
+
+    def update_progress(self, job_id: str, progress: JobProgress) -> bool:
+        """
+        Stores the progress of a running job.
+
+        Args:
+            job_id (str): The ObjectId of the job.
+            progress (JobProgress): The progress.
+
+        Returns:
+            bool: Has the job been asked to cancel?
+        """
+        raw_data = self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"progress": progress.model_dump(), "updated_at": datetime.now(timezone.utc)}},
+            projection={"cancel_requested": 1}
+        )
+        return (bool(raw_data and raw_data.get("cancel_requested")))
+
+    def request_cancel(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Asks a queued or running job to cancel. The worker running it stops at its next progress update.
+
+        Args:
+            job_id (str): The ObjectId of the job.
+
+        Returns:
+            Optional[GenerationJob]: The job, or None if it was already finished.
+        """
+        raw_data = self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": {"$in": [JOBSTATUSMAP.inv[JobStatus.QUEUED], JOBSTATUSMAP.inv[JobStatus.RUNNING]]}},
+            {"$set": {"cancel_requested": True, "updated_at": datetime.now(timezone.utc)}},
+            return_document=ReturnDocument.AFTER
+        )
+        return (GenerationJob.model_validate(raw_data) if (raw_data) else None)
+
+    def finish(self, job_id: str, status: JobStatus, **fields) -> UpdateResult:
+        """
+        Marks a job as finished.
+
+        Args:
+            job_id (str): The ObjectId of the job.
+            status (JobStatus): SUCCEEDED, FAILED or CANCELLED.
+            **fields: Other fields to set (e.g. playlist_url, error, progress).
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        assert(status in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED))
+        now = datetime.now(timezone.utc)
+        return (self.update(job_id, {**fields, "status": JOBSTATUSMAP.inv[status], "finished_at": now, "updated_at": now}))
+
+    def fail_interrupted(self) -> UpdateResult:
+        """
+        Marks the jobs left running (by a worker process which stopped) as failed.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        now = datetime.now(timezone.utc)
+        return (self.collection.update_many(
+            {"status": JOBSTATUSMAP.inv[JobStatus.RUNNING]},
+            {"$set": {"status": JOBSTATUSMAP.inv[JobStatus.FAILED], "error": "Interrupted", "finished_at": now, "updated_at": now}}
+        ))
@@ -0,0 +1,63 @@
+from typing          import Optional
+from datetime        import datetime, timedelta, timezone
+from pymongo         import ASCENDING
+from pymongo.results import UpdateResult
+
+from src.models.pydantic.LastFMArtistLookup import LastFMArtistLookup
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class LastFMArtistLookupsDAO(BaseDAO[LastFMArtistLookup]):
+    """
+    Data Access Object for the lastfm artist lookups: which key (mbid or name) finds each artist on lastfm, or that
+    neither does. Evicted by a TTL index on `expires_at`.
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("lastfm_artist_lookups"), LastFMArtistLookup)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("mbid", ASCENDING)], unique=True)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def read_lookup(self, mbid: str) -> Optional[LastFMArtistLookup]:
+        """
+        Reads the lookup of an artist which has not expired.
+
+        Args:
+            mbid (str): The artist's mbid.
+
+        Returns:
+            Optional[LastFMArtistLookup]: The lookup, or None on a miss.
+        """
+        raw_data = self.collection.find_one({"mbid": mbid, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return (LastFMArtistLookup.model_validate(raw_data) if (raw_data) else None)
+
+    def read_lookups(self, mbids: list[str]) -> dict[str, LastFMArtistLookup]:
+        """
+        Reads the lookups of many artists which have not expired, in one query.
+
+        Args:
+            mbids (list[str]): The artists' mbids.
+
+        Returns:
+            dict[str, LastFMArtistLookup]: mbid: lookup, for the mbids that were hit.
+        """
+        documents = self.collection.find({"mbid": {"$in": mbids}, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return ({doc["mbid"]: LastFMArtistLookup.model_validate(doc) for doc in documents})
+
+    def upsert_lookup(self, mbid: str, mode: Optional[str], lastfm_name: Optional[str], ttl: timedelta) -> UpdateResult:
+        """
+        Stores the lookup of an artist, replacing any previous one.
+
+        Args:
+            mbid (str): The artist's mbid.
+            mode (Optional[str]): The lookup mode which found the artist, None if neither did.
+            lastfm_name (Optional[str]): The artist's name as lastfm has it.
+            ttl (timedelta): How long the entry is valid for.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        entry = LastFMArtistLookup(mbid=mbid, mode=mode, lastfm_name=lastfm_name, expires_at=datetime.now(timezone.utc) + ttl)
+        return (self.upsert_by({"mbid": mbid}, entry))
@@ -0,0 +1,11 @@
+from src.models.pydantic.LastFMCache import LastFMCache
+
+from src.db.DB                   import DB
+from src.db.DAOs.PayloadCacheDAO import PayloadCacheDAO
+
+class LastFMCacheDAO(PayloadCacheDAO[LastFMCache]):
+    """
+    Data Access Object for the LastFM response cache, by (method, key) (see LastFMRequests).
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db, "lastfm_cache", LastFMCache, "method")
@@ -0,0 +1,53 @@
+from typing          import Optional
+from datetime        import datetime, timedelta, timezone
+from pymongo         import ASCENDING
+from pymongo.results import UpdateResult
+
+from src.models.pydantic.MusicBrainzLanguages import MusicBrainzLanguages
+from src.utils.musicbrainz_util               import MusicBrainzWorkLanguages
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class MusicBrainzLanguagesDAO(BaseDAO[MusicBrainzLanguages]):
+    """
+    Data Access Object for artists' MusicBrainz work language distributions, by mbid.
+    Independent of the request (language, genre, niche level). Evicted by a TTL index on `expires_at`.
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("musicbrainz_languages"), MusicBrainzLanguages)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("mbid", ASCENDING)], unique=True)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def read_work_languages(self, mbid: str) -> Optional[MusicBrainzWorkLanguages]:
+        """
+        Reads an artist's work languages which have not expired.
+
+        Args:
+            mbid (str): The artist mbid.
+
+        Returns:
+            Optional[MusicBrainzWorkLanguages]: Language code: number of works, or None on a miss.
+        """
+        raw_data = self.collection.find_one(
+            {"mbid": mbid, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"work_languages": 1}
+        )
+        return (raw_data["work_languages"] if (raw_data) else None)
+
+    def upsert_work_languages(self, mbid: str, work_languages: MusicBrainzWorkLanguages, ttl: timedelta) -> UpdateResult:
+        """
+        Stores an artist's work languages, replacing any previous entry.
+
+        Args:
+            mbid (str): The artist mbid.
+            work_languages (MusicBrainzWorkLanguages): Language code: number of works.
+            ttl (timedelta): How long the entry is valid for.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        entry = MusicBrainzLanguages(mbid=mbid, work_languages=work_languages, expires_at=datetime.now(timezone.utc) + ttl)
+        return (self.upsert_by({"mbid": mbid}, entry))
@@ -0,0 +1,110 @@
+import json
+import zlib
+
+from typing          import Optional, Type
+from datetime        import datetime, timedelta, timezone
+from pymongo         import ASCENDING
+from pymongo.results import UpdateResult, BulkWriteResult
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO, T
+
+class PayloadCacheDAO(BaseDAO[T]):
+    """
+    Data Access Object for a cache of json payloads by (namespace, key), e.g. LastFM responses by (method, key).
+    Payloads are stored zlib compressed and evicted by a TTL index on `expires_at`. Subclasses set the collection, the
+    model (namespace field, key, payload, expires_at) and the namespace field.
+    """
+    def __init__(self, db: DB, collection_name: str, model: Type[T], namespace_field: str) -> None:
+        # Before super, which may create the indexes
+        self.namespace_field = namespace_field
+        super().__init__(db.get_collection(collection_name), model)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([(self.namespace_field, ASCENDING), ("key", ASCENDING)], unique=True)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def _compress(payload: any) -> bytes:
+        return(zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8')))
+
+    @staticmethod
+    def _decompress(payload: bytes) -> any:
+        return(json.loads(zlib.decompress(payload).decode('utf-8')))
+
+    def _query(self, namespace: str, key: str) -> dict:
+        return({self.namespace_field: namespace, "key": key})
+
+    def _entry(self, namespace: str, key: str, payload: any, expires_at: datetime) -> T:
+        return(self.model(**self._query(namespace, key), payload=self._compress(payload), expires_at=expires_at))
+
+    def read_payload(self, namespace: str, key: str) -> Optional[any]:
+        """
+        Reads a cached payload which has not expired.
+
+        Args:
+            namespace (str): The namespace (e.g. the LastFM method).
+            key (str): The key.
+
+        Returns:
+            Optional[any]: The payload, or None on a miss.
+        """
+        raw_data = self.collection.find_one(
+            {**self._query(namespace, key), "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"payload": 1}
+        )
+        return (self._decompress(raw_data["payload"]) if (raw_data) else None)
+
+    def read_payloads(self, namespace: str, keys: list[str]) -> dict[str, tuple[any, datetime]]:
+        """
+        Reads the cached payloads of a namespace which have not expired, in one query.
+
+        Args:
+            namespace (str): The namespace (e.g. the LastFM method).
+            keys (list[str]): The keys.
+
+        Returns:
+            dict[str, tuple[any, datetime]]: key: (payload, when it expires (UTC)), for the keys that were hit.
+        """
+        documents = self.collection.find(
+            {self.namespace_field: namespace, "key": {"$in": keys}, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"key": 1, "payload": 1, "expires_at": 1}
+        )
+        # Mongo gives back naive UTC datetimes
+        return ({doc["key"]: (self._decompress(doc["payload"]), doc["expires_at"].replace(tzinfo=timezone.utc)) for doc in documents})
+
+    def upsert_payload(self, namespace: str, key: str, payload: any, ttl: timedelta) -> UpdateResult:
+        """
+        Caches a payload, replacing any previous entry for the key.
+
+        Args:
+            namespace (str): The namespace (e.g. the LastFM method).
+            key (str): The key.
+            payload (any): The payload (json serializable).
+            ttl (timedelta): How long the entry is valid for.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        return (self.upsert_by(self._query(namespace, key), self._entry(namespace, key, payload, datetime.now(timezone.utc) + ttl)))
+
+    def upsert_payloads(self, namespace: str, payloads: dict[str, any], ttl: timedelta) -> Optional[BulkWriteResult]:
+        """
+        Caches many payloads of a namespace in one bulk write, replacing any previous entries for their keys.
+
+        Args:
+            namespace (str): The namespace (e.g. the LastFM method).
+            payloads (dict[str, any]): key: payload (json serializable).
+            ttl (timedelta): How long the entries are valid for.
+
+        Returns:
+            Optional[BulkWriteResult]: The result of the bulk write, None if there was nothing to write.
+        """
+        if (not payloads):
+            return (None)
+        expires_at = datetime.now(timezone.utc) + ttl
+        operations = [
+            self.upsert_op(self._query(namespace, key), self._entry(namespace, key, payload, expires_at))
+            for key, payload in payloads.items()
+        ]
+        return (self.collection.bulk_write(operations, ordered=False))
@@ -1,6 +1,10 @@
-from typing import List
+from typing          import List
+from datetime        import datetime, timezone
+from pydantic        import BaseModel
+from pymongo.results import UpdateResult
+from bson            import ObjectId
 
-from src.models.pydantic.Request import Request, Params
+from src.models.pydantic.Request import Request, Params, Stats
 
 from src.db.DB                   import DB
 from src.db.DAOs.baseDAO         import BaseDAO
@@ -68,4 +72,26 @@ class RequestDAO(BaseDAO[Request]):
             }
         ]
         results = self.collection.aggregate(pipeline)
-        return({doc['_id']: doc['count'] for doc in results})
\ No newline at end of file
+        return({doc['_id']: doc['count'] for doc in results})
+
+    def set_stats(self, request_id: str, stats: dict[str, any]) -> UpdateResult:
+        """
+        Sets some of the stats of a request in one atomic update, leaving the other stats as they are.
+
+        Args:
+            request_id (str): The ObjectId of the request.
+            stats (dict[str, any]): Stats field: value.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        def dump(value: any) -> any:
+            if (isinstance(value, BaseModel)):
+                return(value.model_dump())
+            if (isinstance(value, dict)):
+                return({k: dump(v) for k, v in value.items()})
+            return(value)
+
+        update = {f"stats.{field}": dump(value) for field, value in stats.items() if field in Stats.model_fields}
+        update["updated_at"] = datetime.now(timezone.utc)
+        return (self.collection.update_one({"_id": ObjectId(request_id)}, {"$set": update}))
@@ -0,0 +1,11 @@
+from src.models.pydantic.SpotifyCache import SpotifyCache
+
+from src.db.DB                   import DB
+from src.db.DAOs.PayloadCacheDAO import PayloadCacheDAO
+
+class SpotifyCacheDAO(PayloadCacheDAO[SpotifyCache]):
+    """
+    Data Access Object for the Spotify entity cache, by (kind, key) (see SpotifyEntityCache).
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db, "spotify_cache", SpotifyCache, "kind")
@@ -0,0 +1,44 @@
+from typing          import Optional
+from pymongo         import ASCENDING
+from pymongo.results import UpdateResult
+
+from src.models.pydantic.SpotifyToken import SpotifyToken
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class SpotifyTokensDAO(BaseDAO[SpotifyToken]):
+    """
+    Data Access Object for users' Spotify tokens, by Spotify ID (see SpotifyTokenStore).
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("spotify_tokens"), SpotifyToken)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("spotify_id", ASCENDING)], unique=True)
+
+    def read_token_info(self, spotify_id: str) -> Optional[dict]:
+        """
+        Reads a user's token info.
+
+        Args:
+            spotify_id (str): The Spotify ID of the user.
+
+        Returns:
+            Optional[dict]: The token info, or None if there is none.
+        """
+        raw_data = self.collection.find_one({"spotify_id": spotify_id}, {"token_info": 1})
+        return (raw_data["token_info"] if (raw_data) else None)
+
+    def upsert_token_info(self, spotify_id: str, token_info: dict) -> UpdateResult:
+        """
+        Stores a user's token info, replacing any previous one.
+
+        Args:
+            spotify_id (str): The Spotify ID of the user.
+            token_info (dict): The token info.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        return (self.upsert_by({"spotify_id": spotify_id}, SpotifyToken(spotify_id=spotify_id, token_info=token_info)))
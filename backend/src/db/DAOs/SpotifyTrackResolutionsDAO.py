@@ -0,0 +1,62 @@
+from typing          import Optional
+from datetime        import datetime, timedelta, timezone
+from pymongo         import ASCENDING
+from pymongo.results import UpdateResult
+
+from src.models.pydantic.SpotifyTrackResolution import SpotifyTrackResolution, ResolvedTrack
+
+from src.db.DB           import DB
+from src.db.DAOs.baseDAO import BaseDAO
+
+class SpotifyTrackResolutionsDAO(BaseDAO[SpotifyTrackResolution]):
+    """
+    Data Access Object for the Spotify track index: the Spotify track (or lack of one) found for each normalized
+    (track name, artist) pair. Independent of the request. Evicted by a TTL index on `expires_at`.
+    """
+    def __init__(self, db: DB) -> None:
+        super().__init__(db.get_collection("spotify_track_resolutions"), SpotifyTrackResolution)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("key", ASCENDING)], unique=True)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def read_resolution(self, key: str) -> Optional[SpotifyTrackResolution]:
+        """
+        Reads the resolution of a track which has not expired.
+
+        Args:
+            key (str): The track key (see track_resolution_key).
+
+        Returns:
+            Optional[SpotifyTrackResolution]: The resolution, or None on a miss.
+        """
+        raw_data = self.collection.find_one({"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return (SpotifyTrackResolution.model_validate(raw_data) if (raw_data) else None)
+
+    def read_resolutions(self, keys: list[str]) -> dict[str, SpotifyTrackResolution]:
+        """
+        Reads the resolutions of many tracks which have not expired, in one query.
+
+        Args:
+            keys (list[str]): The track keys (see track_resolution_key).
+
+        Returns:
+            dict[str, SpotifyTrackResolution]: key: resolution, for the keys that were hit.
+        """
+        documents = self.collection.find({"key": {"$in": keys}, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return ({doc["key"]: SpotifyTrackResolution.model_validate(doc) for doc in documents})
+
+    def upsert_resolution(self, key: str, track: Optional[ResolvedTrack], ttl: timedelta) -> UpdateResult:
+        """
+        Stores the resolution of a track, replacing any previous one.
+
+        Args:
+            key (str): The track key (see track_resolution_key).
+            track (Optional[ResolvedTrack]): The Spotify track, None if there is none.
+            ttl (timedelta): How long the entry is valid for.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        entry = SpotifyTrackResolution(key=key, track=track, expires_at=datetime.now(timezone.utc) + ttl)
+        return (self.upsert_by({"key": key}, entry))
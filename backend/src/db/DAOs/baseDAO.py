@@ -1,4 +1,5 @@
-from typing             import Type, TypeVar, Generic, Optional, Dict, Any
+from typing             import Type, TypeVar, Generic, Optional, Dict, Any, ClassVar
+from pymongo            import UpdateOne
 from pymongo.collection import Collection
 from pymongo.results    import InsertOneResult, UpdateResult, DeleteResult
 from pydantic           import BaseModel, ValidationError
@@ -12,6 +13,8 @@ class BaseDAO(Generic[T]):
     """
     Base Data Access Object that provides CRUD operations.
     """
+    # Set on each DAO class once it has created its indexes (see ensure_indexes)
+    _indexes_created: ClassVar[bool] = False
 
     def __init__(self, collection: Collection, model: Type[T]) -> None:
         """
@@ -23,6 +26,15 @@ class BaseDAO(Generic[T]):
         """
         self.collection = collection
         self.model = model
+        # Once per DAO class, not per instance (not inherited: a subclass may have other indexes)
+        cls = type(self)
+        if (not cls.__dict__.get("_indexes_created", False)):
+            self.ensure_indexes()
+            cls._indexes_created = True
+
+    def ensure_indexes(self) -> None:
+        """Creates the collection's indexes. Called by the first instance of each DAO class, override to add indexes."""
+        pass
 
     def create(self, data: T) -> InsertOneResult:
         """Inserts a new document into the collection."""
@@ -64,6 +76,31 @@ class BaseDAO(Generic[T]):
         # Perform the update
         return self.collection.update_one({"_id": ObjectId(document_id)}, {"$set": validated_data})
 
+    @staticmethod
+    def _upsert_update(entry: T) -> Dict[str, Any]:
+        """Update which writes an entry, keeping the original id and creation info if the document exists."""
+        data = entry.model_dump(by_alias=True)
+        # Keep the original id and creation info on refresh
+        on_insert = {k: data.pop(k) for k in ("_id", "created_at", "created_by")}
+        return {"$set": data, "$setOnInsert": on_insert}
+
+    def upsert_by(self, query: Dict[str, Any], entry: T) -> UpdateResult:
+        """
+        Writes an entry over the document matching `query`, inserting it if there is none.
+
+        Args:
+            query (Dict[str, Any]): Filter for the document (its unique key).
+            entry (T): The entry.
+
+        Returns:
+            UpdateResult: The result of the update operation.
+        """
+        return self.collection.update_one(query, self._upsert_update(entry), upsert=True)
+
+    def upsert_op(self, query: Dict[str, Any], entry: T) -> UpdateOne:
+        """The bulk write operation for upsert_by."""
+        return UpdateOne(query, self._upsert_update(entry), upsert=True)
+
     def delete(self, document_id: str) -> DeleteResult:
         """Deletes a document by its ObjectId."""
         return self.collection.delete_one({"_id": ObjectId(document_id)})
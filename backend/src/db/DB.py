@@ -35,6 +35,22 @@ class DB:
             logger.info("Connected to DB!")
         return(cls._instance)
 
+    @classmethod
+    def use_client(cls: Type['DB'], client: MongoClient) -> 'DB':
+        """Use an already created client instead of connecting from the config (e.g. a mongomock client for offline runs).
+            Must be called before the DB is first used.
+
+        Args:
+            client (MongoClient): The client. Must have a default database
+
+        Returns:
+            DB: The DB
+        """
+        cls._instance = super(DB, cls).__new__(cls)
+        cls._instance.client = client
+        cls._instance.db = client.get_default_database()
+        return(cls._instance)
+
     def get_collection(self, name: str) -> Collection:
         """Get a collection from the DB
 
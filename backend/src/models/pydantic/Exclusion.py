@@ -0,0 +1,33 @@
+from pydantic import Field
+from typing   import Optional
+from datetime import datetime, timezone
+
+from src.models.pydantic.BaseSchema    import BaseSchema
+from src.models.pydantic.RequestsCache import ParamsCache
+
+class Exclusion(BaseSchema):
+    params_key     : str
+    params         : ParamsCache
+    name           : Optional[str] = None
+    mbid           : str
+    reason_excluded: str
+    date_excluded  : datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # None for the exclusions which don't go stale (e.g. wrong language)
+    expires_at     : Optional[datetime] = None
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "params_key"     : "English|Pop|Very",
+                "params"         : {
+                    "language"   : "English",
+                    "genre"      : "Pop",
+                    "niche_level": "Very"
+                },
+                "name"           : "joe schmoe",
+                "mbid"           : "12345",
+                "reason_excluded": "Too Few Followers / Listeners / Plays",
+                "date_excluded"  : "2024-04-27T12:34:56Z",
+                "expires_at"     : "2024-10-26T12:34:56Z"
+            }
+        }
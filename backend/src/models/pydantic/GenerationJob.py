@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from typing   import Optional
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema, PyObjectId
+from src.models.pydantic.Request    import Params
+
+class JobProgress(BaseModel):
+    tracks_found   : int             = 0
+    tracks_target  : Optional[int]   = None
+    artists_checked: int             = 0
+    artists_total  : Optional[int]   = None
+    # Estimated from the rate tracks are found at, None until the first one is
+    eta_secs       : Optional[float] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "tracks_found"   : 4,
+                "tracks_target"  : 12,
+                "artists_checked": 180,
+                "artists_total"  : 5400,
+                "eta_secs"       : 190.5
+            }
+        }
+
+class GenerationJob(BaseSchema):
+    user            : PyObjectId
+    params          : Params
+    status          : str                  = 'queued'
+    progress        : JobProgress          = Field(default_factory=JobProgress)
+    cancel_requested: bool                 = False
+    request         : Optional[PyObjectId] = None
+    playlist_url    : Optional[str]        = None
+    error           : Optional[str]        = None
+    started_at      : Optional[datetime]   = None
+    finished_at     : Optional[datetime]   = None
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "user"            : "60d5ec49f8d2e30f8c8f9e4a",
+                "params"          : {
+                    "songs_min_year_created": 2000,
+                    "songs_length_min_secs" : 180,
+                    "songs_length_max_secs" : 300,
+                    "language"              : "English",
+                    "genre"                 : "pop",
+                    "niche_level"           : "Very"
+                },
+                "status"          : "running",
+                "progress"        : {
+                    "tracks_found"   : 4,
+                    "tracks_target"  : 12,
+                    "artists_checked": 180,
+                    "artists_total"  : 5400,
+                    "eta_secs"       : 190.5
+                },
+                "cancel_requested": False,
+                "request"         : "60d5ec49f8d2e30f8c8f9e4c",
+                "playlist_url"    : None,
+                "error"           : None,
+                "started_at"      : "2024-04-27T12:34:56Z",
+                "finished_at"     : None
+            }
+        }
@@ -0,0 +1,22 @@
+from typing   import Optional
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class LastFMArtistLookup(BaseSchema):
+    mbid       : str
+    # 'mbid' or 'name', None if lastfm has the artist neither way
+    mode       : Optional[str] = None
+    # The artist's name as lastfm has it, to look them up by
+    lastfm_name: Optional[str] = None
+    expires_at : datetime
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "mbid"       : "561d854a-6a28-4aa7-8c99-323e6ce46c2a",
+                "mode"       : "name",
+                "lastfm_name": "Miles Davis",
+                "expires_at" : "2024-07-27T12:34:56Z"
+            }
+        }
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class LastFMCache(BaseSchema):
+    method    : str
+    key       : str
+    payload   : bytes
+    expires_at: datetime
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "method"    : "artist.getInfo",
+                "key"       : "mbid=dfa88d06-1e44-4916-b070-840c70bdbc4a",
+                "payload"   : "<zlib compressed json>",
+                "expires_at": "2024-04-27T12:34:56Z"
+            }
+        }
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class MusicBrainzLanguages(BaseSchema):
+    mbid          : str
+    work_languages: dict[str, int]
+    expires_at    : datetime
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "mbid"          : "dfa88d06-1e44-4916-b070-840c70bdbc4a",
+                "work_languages": {"eng": 12, "fra": 3},
+                "expires_at"    : "2024-10-27T12:34:56Z"
+            }
+        }
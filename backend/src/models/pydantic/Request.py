@@ -25,15 +25,52 @@ class Params(BaseModel):
             }
         }
 
+class StageStats(BaseModel):
+    # Busy time summed over the stage's workers
+    secs : float = 0
+    items: int   = 0
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                'secs' : 84.2,
+                'items': 310
+            }
+        }
+
+class ServiceStats(BaseModel):
+    calls               : int   = 0
+    errors              : int   = 0
+    rate_limit_wait_secs: float = 0
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                'calls'               : 212,
+                'errors'              : 3,
+                'rate_limit_wait_secs': 40.5
+            }
+        }
+
 class Stats(BaseModel):
     percent_artists_valid   : Optional[float] = None
     average_artist_followers: Optional[float] = None
+    generation_secs         : Optional[float] = None
+    stages                  : dict[str, StageStats]   = Field(default_factory=dict)
+    services                : dict[str, ServiceStats] = Field(default_factory=dict)
 
     class Config:
         json_schema_extra = {
             "example": {
                 'percent_artists_valid'   : 2,
-                'average_artist_followers': 2000
+                'average_artist_followers': 2000,
+                'generation_secs'         : 250.7,
+                'stages'                  : {
+                    'lastfm_screen': {'secs': 84.2, 'items': 310}
+                },
+                'services'                : {
+                    'LASTFM': {'calls': 212, 'errors': 3, 'rate_limit_wait_secs': 40.5}
+                }
             }
         }
 
@@ -58,7 +95,14 @@ class Request(BaseSchema):
                 "playlist_generated": "60d5ec49f8d2e30f8c8f9e4b",
                 "stats"             : {
                     'percent_artists_valid'   : 2,
-                    'average_artist_followers': 2000
+                    'average_artist_followers': 2000,
+                    'generation_secs'         : 250.7,
+                    'stages'                  : {
+                        'lastfm_screen': {'secs': 84.2, 'items': 310}
+                    },
+                    'services'                : {
+                        'LASTFM': {'calls': 212, 'errors': 3, 'rate_limit_wait_secs': 40.5}
+                    }
                 }
             }
         }
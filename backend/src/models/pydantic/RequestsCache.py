@@ -27,6 +27,10 @@ class ParamsCache(BaseModel):
     genre      : str
     niche_level: str
 
+    def key(self) -> str:
+        """The params as one string, to key the exclusions of a (language, genre, niche level) by"""
+        return (f"{self.language}|{self.genre}|{self.niche_level}")
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class SpotifyCache(BaseSchema):
+    kind      : str
+    key       : str
+    payload   : bytes
+    expires_at: datetime
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "kind"      : "artist",
+                "key"       : "0kbYTNQb4Pb1rPbbaF0pT4",
+                "payload"   : "<zlib compressed json>",
+                "expires_at": "2024-04-27T12:34:56Z"
+            }
+        }
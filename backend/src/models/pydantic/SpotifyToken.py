@@ -0,0 +1,21 @@
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class SpotifyToken(BaseSchema):
+    spotify_id: str
+    # As given by spotipy (access_token, refresh_token, expires_at, scope, token_type)
+    token_info: dict
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "spotify_id": "spotify123456",
+                "token_info": {
+                    "access_token" : "BQD...",
+                    "token_type"   : "Bearer",
+                    "expires_in"   : 3600,
+                    "expires_at"   : 1714221296,
+                    "refresh_token": "AQC...",
+                    "scope"        : "playlist-modify-public user-top-read"
+                }
+            }
+        }
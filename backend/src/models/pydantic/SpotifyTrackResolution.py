@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+from typing   import Optional
+from datetime import datetime
+
+from src.models.pydantic.BaseSchema import BaseSchema
+
+class ResolvedTrackArtist(BaseModel):
+    id  : str
+    name: str
+
+class ResolvedTrack(BaseModel):
+    name        : str
+    uri         : str
+    url         : str
+    duration_ms : int
+    release_year: int
+    artists     : list[ResolvedTrackArtist]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name"        : "So What",
+                "uri"         : "spotify:track:7q3kkfcsSQ7A8KQ0SpMfbs",
+                "url"         : "https://open.spotify.com/track/7q3kkfcsSQ7A8KQ0SpMfbs",
+                "duration_ms" : 562640,
+                "release_year": 1959,
+                "artists"     : [{"id": "0kbYTNQb4Pb1rPbbaF0pT4", "name": "Miles Davis"}]
+            }
+        }
+
+class SpotifyTrackResolution(BaseSchema):
+    # See track_resolution_key
+    key       : str
+    # None if Spotify has no matching track
+    track     : Optional[ResolvedTrack] = None
+    expires_at: datetime
+
+    class Config(BaseSchema.Config):
+        json_schema_extra = {
+            "example": {
+                "key"       : "miles davis\tso what",
+                "track"     : {
+                    "name"        : "So What",
+                    "uri"         : "spotify:track:7q3kkfcsSQ7A8KQ0SpMfbs",
+                    "url"         : "https://open.spotify.com/track/7q3kkfcsSQ7A8KQ0SpMfbs",
+                    "duration_ms" : 562640,
+                    "release_year": 1959,
+                    "artists"     : [{"id": "0kbYTNQb4Pb1rPbbaF0pT4", "name": "Miles Davis"}]
+                },
+                "expires_at": "2024-07-27T12:34:56Z"
+            }
+        }
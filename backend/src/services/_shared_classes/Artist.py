@@ -1,24 +1,27 @@
-import re
+from typing   import Optional
+from datetime import datetime, timezone
 
-from langdetect  import detect
+from src.services._shared_classes.Track                        import Track
+from src.services.text_classification.text_rules              import get_rule
+from src.services.language_identification.language_identifier import language_identifier
 
-from src.services._shared_classes.Track       import Track
-from src.services.genre_handling.valid_genres import genre_is_spotify, convert_genre
-
-from src.utils.musicbrainz_util import MusicBrainzArtist
+from src.utils.musicbrainz_util import MusicBrainzArtist, MusicBrainzWorkLanguages, ArtistMetrics, ARTIST_METRICS_TTL, get_lastfm_genre
 from src.utils.logger           import logger
-from src.utils.util             import strcomp, map_language_codes, filter_low_count_entries
+from src.utils.util             import strcomp, Language
 from src.utils.spotify_util     import SpotifyArtist
 
-from src.auth.LastFMRequests import LastFMRequests, LastFmArtist
-from src.auth.SpotifyUser    import spotify_user
+from src.auth.LastFMRequests    import LastFMRequests, LastFmArtist, lastfm_requests
+from src.auth.LastFMArtistIndex import lastfm_artist_index
+from src.auth.SpotifyUser       import get_spotify_user
+
+from src.models.pydantic.LastFMArtistLookup import LastFMArtistLookup
 
 class Artist:
     """Representing an artist, at a high level
 
     Attributes:
         name
-        mbid
+        mbid: "" for artists not from musicbrainz
         lastfm: LastFM requests obj
         lastfm_artist: Artist as returned by lastfm
             Requires call: attach_artist_lastfm
@@ -38,17 +41,29 @@ class Artist:
             Requires call: attach_spotify_artist_from_track
         lastfm_tags
             Requires call: artist_in_lastfm_genre
+        mb_work_languages: Language distribution of the artist's musicbrainz works, None if unknown
+            Set by: from_musicbrainz (if the artist document has it)
+        metrics_stored: Were the lastfm attributes (playcount, listeners, likeness, tags) set from the artist's stored metrics
+            instead of lastfm? If so there is no lastfm_artist
+            Set by: from_musicbrainz (if the artist document has fresh ones)
     """
-    def __init__(self, name: str, mbid: str) -> None:
+    def __init__(self, name: str, mbid: str, lastfm: LastFMRequests = None) -> None:
         """Initialize the artist
 
         Args:
             name (str): Artist name
             mbid (str): Artist MBID
+            lastfm (LastFMRequests, optional): LastFM client. Defaults to the shared client.
         """
         self.name   = name
         self.mbid   = mbid
-        self.lastfm = LastFMRequests()
+        self.lastfm = lastfm or lastfm_requests
+
+        self.mb_work_languages: Optional[MusicBrainzWorkLanguages] = None
+        self.metrics_stored = False
+        # Lookup read from the lastfm artist index ahead of time (see prefetch_lastfm_lookups)
+        self._lastfm_lookup: Optional[LastFMArtistLookup] = None
+        self._lastfm_lookup_prefetched = False
 
     @classmethod
     def from_musicbrainz(cls, musicbrainz_artist_object: MusicBrainzArtist) -> 'Artist':
@@ -68,12 +83,63 @@ class Artist:
             mbid = musicbrainz_artist_object.get('id', "")
             if (name and mbid):
                 artist = cls(name, mbid)
+                artist.mb_work_languages = musicbrainz_artist_object.get('work_languages')
+                artist._attach_stored_metrics(musicbrainz_artist_object)
                 return(artist)
             else:
                 raise Exception('Name or ID doesn\'t exist')
         except Exception as e:
             raise Exception(f'Could not create artist from musicbrainz for {name}: {e}')
 
+    @staticmethod
+    def prefetch_lastfm_lookups(artists: list['Artist']) -> None:
+        """Read the lastfm artist index entries of many artists in one query, so that their lastfm lookups
+        go straight to the key known to find them
+
+        Args:
+            artists (list[Artist]): The artists
+        """
+        lookups = lastfm_artist_index.read_many([artist.mbid for artist in artists])
+        for artist in artists:
+            artist._lastfm_lookup            = lookups.get(artist.mbid)
+            artist._lastfm_lookup_prefetched = True
+
+    def _attach_stored_metrics(self, musicbrainz_artist_object: MusicBrainzArtist) -> None:
+        """Helper for from musicbrainz: set the lastfm attributes from the metrics stored on the artist, if they are fresh
+        """
+        metrics: Optional[ArtistMetrics] = musicbrainz_artist_object.get('metrics')
+        updated_at: Optional[datetime]   = musicbrainz_artist_object.get('metrics_updated_at')
+        # Mongo gives back naive UTC datetimes
+        if ((not metrics) or (not updated_at) or (updated_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc) - ARTIST_METRICS_TTL)):
+            return(None)
+
+        self.lastfm_artist_listeners = metrics['lastfm_listeners']
+        self.lastfm_artist_playcount = metrics['lastfm_playcount']
+        self.lastfm_artist_likeness  = metrics['lastfm_likeness']
+        self.lastfm_tags             = metrics['lastfm_tags']
+        self.lastfm_conglomerate     = metrics['lastfm_conglomerate']
+        self.metrics_stored          = True
+
+    def get_lastfm_metrics(self) -> ArtistMetrics:
+        """Get the artist's metrics to store, from their lastfm artist (the spotify ones are unknown until the spotify artist is attached)
+
+        Requires:
+            Artist has associated lastfm artist
+
+        Returns:
+            ArtistMetrics: The metrics
+        """
+        assert(getattr(self, 'lastfm_artist', None))
+        return({
+            'lastfm_listeners'   : self.lastfm_artist_listeners,
+            'lastfm_playcount'   : self.lastfm_artist_playcount,
+            'lastfm_likeness'    : self.lastfm_artist_likeness,
+            'lastfm_tags'        : self._get_tags_from_lastfm_artist(),
+            'lastfm_conglomerate': self.lastfm_page_is_conglomerate(),
+            'spotify_id'         : None,
+            'spotify_followers'  : None
+        })
+
     def _attach_lastfm_artist(self, artist: LastFmArtist) -> LastFmArtist:
         """Helper for attach lastfm artist
         """
@@ -107,7 +173,7 @@ class Artist:
         tag_names = [tag["name"] for tag in tags if "name" in tag]
         self.lastfm_tags = tag_names
 
-        logger.info(f'Artist {self.name} lastfm tags: {self.lastfm_tags}')
+        logger.info('Artist %s lastfm tags: %s', self.name, self.lastfm_tags)
 
         return(self.lastfm_tags)
 
@@ -115,7 +181,7 @@ class Artist:
         """Attach the lastfm artist to the object, along with additional attributes
 
         Raises:
-            Exception: If search by name or mbid doesn't work
+            Exception: If search by name or mbid doesn't work (or didn't, as of the lastfm artist index)
 
         Returns:
             LastFmArtist: The artist object as returned by lastfm
@@ -125,124 +191,33 @@ class Artist:
             "format": "json"
         }
 
-        lastfm_artist = None
-        # Try with musicbrainz id
-        try:
-            logger.info(f'Searching for lastfm artist by mbid {self.mbid}')
-            artist = self.lastfm.get_lastfm_artist_data(baseParams, mbid=self.mbid)
-            lastfm_artist = self._attach_lastfm_artist(artist)
-            if(lastfm_artist):
-                return(lastfm_artist)
-            else:
-                logger.warning('Artist not found')
-        except Exception as e:
-            logger.warning(f'Couldn\'t get lastfm artist by mbid {self.mbid}: {e}')
+        # By the key known to find the artist, else by mbid then by name
+        logger.info('Searching for lastfm artist %s', self.name)
+        artist = lastfm_artist_index.get_artist_data(baseParams, self.mbid, self.name, lambda data: bool(data.get('artist')),
+                                                     self._lastfm_lookup, self._lastfm_lookup_prefetched, self.lastfm)
+        if (artist is None):
+            raise Exception(f'Couldn\'t get lastfm artist for {self.name}')
+        return(self._attach_lastfm_artist(artist))
 
-        if(not lastfm_artist):
-            # Fallback to artist name
-            try:
-                logger.info(f'Searching for lastfm artist by name {self.name}')
-                artist = self.lastfm.get_lastfm_artist_data(baseParams, name = self.name)
-                lastfm_artist = self._attach_lastfm_artist(artist)
-                if(lastfm_artist):
-                    return(lastfm_artist)
-                else:
-                    logger.warning('Artist not found')
-            except Exception as e:
-                logger.warning(f'Couldn\'t get lastfm artist by name {self.name}: {e}')
+    def lastfm_page_is_conglomerate(self) -> bool:
+        """Is the artist's lastfm page a conglomerate for many artists with the same name
+            (the bio starts with e.g. "There are at least 3 bands called ...")
 
-        raise Exception(f'Couldn\'t get lastfm artist for {self.name}')
+        Returns:
+            bool: Is it?
+        """
+        if (self.metrics_stored):
+            return(self.lastfm_conglomerate)
 
-    def lastfm_page_is_conglomerate(self) -> bool:
         if (not hasattr(self, 'lastfm_artist')):
             self.lastfm_artist = self.attach_artist_lastfm()
 
         artist: LastFmArtist = self.lastfm_artist
-        
+
         summary = artist.get('bio', {}).get('summary', '')
         content = artist.get('bio', {}).get('content', '')
 
-        def is_conglomerate_page(input_string):
-            """
-            Determines if the input string matches a specific pattern indicating that
-            a Last.fm page is a conglomerate for many artists.
-
-            The pattern matches phrases starting with "There are" or "There is" followed by expressions like:
-            - "at least x" where x can be a digit or a number word (e.g., "five")
-            - "multiple"
-            - "many"
-            - "several"
-            - "numerous"
-            - "a couple"
-            - "a few"
-
-            Then followed by one or more of the words:
-            - "bands"
-            - "artists"
-            - "groups"
-            - "singers"
-            - "musicians"
-            - "duos"
-
-            Optionally followed by "and/or" and another of the specified words, and ending with "named" or "called",
-            possibly followed by additional words and optional punctuation.
-
-            Parameters:
-            - input_string (str): The string to be checked against the pattern.
-
-            Returns:
-            - bool: True if the input string matches the pattern at the start, False otherwise.
-            """
-
-            # List of number words
-            number_words = [
-                'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
-                'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen',
-                'eighteen', 'nineteen', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy',
-                'eighty', 'ninety', 'hundred', 'thousand', 'million', 'billion', 'trillion'
-            ]
-
-            # Join number words into a regex pattern
-            number_words_pattern = '|'.join(number_words)
-
-            # Regular expression pattern
-            pattern = rf"""
-                ^there\s+(?:is|are)\s+                          # Match 'there is' or 'there are' at the start
-                (?:
-                    (?:at\s+least\s+)?                          # Optional 'at least'
-                    (?:\d+|{number_words_pattern})|             # Digits or number words
-                    multiple|                                   # or 'multiple'
-                    many|                                       # or 'many'
-                    several|                                    # or 'several'
-                    numerous|                                   # or 'numerous'
-                    a\s+couple|                                 # or 'a couple'
-                    a\s+few                                     # or 'a few'
-                )
-                \s+
-                (?:bands|artists|groups|singers|musicians|duos)     # One of the specified words
-                (?:
-                    \s+(?:and|or)\s+                            # 'and' or 'or' with surrounding spaces
-                    (?:bands|artists|groups|singers|musicians|duos) # Another specified word
-                )?
-                \s+
-                (?:named|called)                                # 'named' or 'called'
-                (?:\s+\S+)*                                     # Optionally, additional words after 'named' or 'called'
-                \s*[\.,:]*                                      # Optional trailing punctuation
-            """
-
-            # Compile the regex pattern with IGNORECASE and VERBOSE flags
-            regex = re.compile(pattern, re.IGNORECASE | re.VERBOSE)
-
-            # Strip leading/trailing whitespace from input string
-            input_string = input_string.strip()
-
-            # Attempt to match the pattern at the start of the input string
-            match = regex.match(input_string)
-
-            # Return True if a match is found, False otherwise
-            return bool(match)
-        
-        return(is_conglomerate_page(summary) or is_conglomerate_page(content))
+        return(get_rule('lastfm_conglomerate_page').matches_any((summary, content)))
 
     def artist_in_lastfm_genre(self, genre: str) -> bool:
         """Check if the artist lastfm object is in the genre
@@ -250,15 +225,13 @@ class Artist:
         Returns:
             bool: Is it?
         """
+        if (self.metrics_stored):
+            return(get_lastfm_genre(genre) in self.lastfm_tags)
+
         if (not hasattr(self, 'lastfm_artist')):
             self.lastfm_artist = self.attach_artist_lastfm()
-        
-        if (genre_is_spotify(genre)):
-            converted_genre = convert_genre('SPOTIFY', 'LASTFM', genre)
-        else:
-            converted_genre = convert_genre('MUSICBRAINZ', 'LASTFM', genre)
 
-        return (converted_genre in self._get_tags_from_lastfm_artist())
+        return (get_lastfm_genre(genre) in self._get_tags_from_lastfm_artist())
 
     def get_artist_top_tracks_lastfm(self, limit: int = 5) -> list[Track]:
         """
@@ -276,32 +249,14 @@ class Artist:
             'limit': limit
         }
 
-        tracks = None
-        try:
-            logger.info(f'Attaching top tracks from mbid for {self.name}')
-            data = self.lastfm.get_lastfm_artist_data(baseParams, mbid = self.mbid)
-            tracks = self._attach_top_tracks_lastfm(data)
-            if(tracks):
-                return(tracks)
-            else:
-                logger.warning('No tracks found')
-        except Exception:
-            logger.warning(f'Couldn\'t attach top tracks from mbid for {self.name}')
-        
-        if(not tracks):
-            try:
-                logger.info(f'Attaching top tracks from name for {self.name}')
-                data = self.lastfm.get_lastfm_artist_data(baseParams, name = self.name)
-                tracks = self._attach_top_tracks_lastfm(data)
-                if(tracks):
-                    return(tracks)
-                else:
-                    logger.warning('No tracks found')
-            except Exception:
-                logger.warning(f'Couldn\'t attach top tracks from name for {self.name}')
-
-        logger.error(f'Couldn\'t get lastfm top tracks for {self.name}')
-        return([])
+        # By the key known to find the artist, else by mbid then by name. An artist without top tracks is still found
+        logger.info('Attaching top tracks for %s', self.name)
+        data = lastfm_artist_index.get_artist_data(baseParams, self.mbid, self.name, lambda data: 'toptracks' in data,
+                                                   self._lastfm_lookup, self._lastfm_lookup_prefetched, self.lastfm)
+        if (data is None):
+            logger.error('Couldn\'t get lastfm top tracks for %s', self.name)
+            return([])
+        return(self._attach_top_tracks_lastfm(data))
 
     def attach_spotify_artist(self, artist: SpotifyArtist) -> SpotifyArtist:
         """Attach spotify artist to artist from SpotifyArtist object
@@ -317,7 +272,7 @@ class Artist:
             SpotifyArtist: The same as param
         """
         if(getattr(self, 'spotify_artist', None)):
-            logger.info(f'Artist {self.name} has associated spotify artist')
+            logger.info('Artist %s has associated spotify artist', self.name)
             return(self.spotify_artist)
 
         try:
@@ -327,12 +282,12 @@ class Artist:
             
             self.spotify_artist_id = artist.get('id', '')
 
-            logger.info(f"Spotify Artist ID: {self.spotify_artist_id}")
+            logger.info('Spotify Artist ID: %s', self.spotify_artist_id)
 
             self.spotify_artist    = artist
             self.spotify_followers = int(artist.get('followers', {}).get('total', 0))
 
-            logger.info(f"Retrieved Spotify Artist: {name} (ID: {artist['id']})")
+            logger.info('Retrieved Spotify Artist: %s (ID: %s)', name, artist['id'])
 
             return(self.spotify_artist)
 
@@ -356,14 +311,14 @@ class Artist:
             SpotifyArtist: The artist object, as returned by spotify
         """
         if(getattr(self, 'spotify_artist', None)):
-            logger.info(f'Artist {self.name} has associated spotify artist')
+            logger.info('Artist %s has associated spotify artist', self.name)
             return(self.spotify_artist)
 
         try:
             if(not strcomp(self.name, track.artist)):
                 raise Exception(f'Song {track.name} is by {track.artist}, not {self.name}')
             
-            logger.info(f"Searching Spotify for Track: '{track.name}' by Artist: '{track.artist}'")
+            logger.info("Searching Spotify for Track: '%s' by Artist: '%s'", track.name, track.artist)
 
             spotify_track = track.attach_spotify_track_information()
 
@@ -376,13 +331,13 @@ class Artist:
             if((not hasattr(self, 'spotify_artist_id')) or (not track.artist_id_in_spotify_track(self.spotify_artist_id))):
                 raise Exception(f'Could not find artist {self.name} ({self.spotify_artist_id}) in track {track.name}')
             
-            logger.info(f"Spotify Artist ID: {self.spotify_artist_id}")
+            logger.info('Spotify Artist ID: %s', self.spotify_artist_id)
 
-            spotify_artist         = spotify_user.get_spotify_artist_by_id(self.spotify_artist_id)
+            spotify_artist         = get_spotify_user().get_spotify_artist_by_id(self.spotify_artist_id)
             self.spotify_artist    = spotify_artist
             self.spotify_followers = int(spotify_artist.get('followers', {}).get('total', 0))
 
-            logger.info(f"Retrieved Spotify Artist: {spotify_artist['name']} (ID: {spotify_artist['id']})")
+            logger.info('Retrieved Spotify Artist: %s (ID: %s)', spotify_artist['name'], spotify_artist['id'])
 
             return(self.spotify_artist)
 
@@ -390,21 +345,18 @@ class Artist:
             logger.error(e)
             raise Exception(f"Could not attach spotify artist {self.name} from track {track.name}")
         
-    def get_language_guess_spotify(self) -> str:
+    def get_language_guess_spotify(self) -> dict[Language, int]:
+        """Guess the languages the artist sings in from their spotify top track titles (memoized per artist)
+
+        Returns:
+            dict[Language, int]: Language: number of top tracks in it
+        """
         assert(hasattr(self, 'spotify_artist'))
         # Only 30% to be considered a language the artist sings in since this fn is prone to error
         pct_min=30
 
-        top_tracks = spotify_user.execute('artist_top_tracks', self.spotify_artist_id)
-        track_names = [track.get('name') for track in top_tracks.get('tracks', [])]
-
-        languages = []
-        for name in track_names:
-            try:
-                language = detect(name)
-                languages.append(language)
-            except Exception:
-                continue
-
-        return(filter_low_count_entries(map_language_codes(language_codes=languages, iso639_type=1), pct_min=pct_min))
+        def get_track_names() -> list[str]:
+            top_tracks = get_spotify_user().get_spotify_artist_top_tracks(self.spotify_artist_id)
+            return([track.get('name') for track in top_tracks])
 
+        return(language_identifier.guess_artist_languages(self.spotify_artist_id, get_track_names, pct_min=pct_min))
@@ -8,7 +8,7 @@ from src.models.pydantic.Playlist import Playlist as PlaylistModel
 
 from src.services._shared_classes.PlaylistRequest import PlaylistRequest
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 
 from src.utils.spotify_util import NicheTrack
 
@@ -37,12 +37,12 @@ class Playlist:
             add_to_db (bool, optional): Add the playlist to the db?. Default to true
         """
         playlist_info = req.get_playlist_info()
+        user          = get_spotify_user()
 
-        
         # Create a new playlist with placeholder name and description
-        playlist = spotify_user.execute(
+        playlist = user.execute(
             'user_playlist_create',
-            user          = spotify_user.id,
+            user          = user.id,
             name          = playlist_info['name'],
             public        = req.public,
             description   = playlist_info['description'],
@@ -56,7 +56,7 @@ class Playlist:
         # Spotify API allows adding up to 100 tracks per request
         for i in range(0, len(track_uris), 100):
             batch = track_uris[i:i+100]
-            spotify_user.execute('playlist_add_items', playlist_id=playlist['id'], items=batch)
+            user.execute('playlist_add_items', playlist_id=playlist['id'], items=batch)
 
         # Store playlist information as attributes
         self.id          = playlist['id']
@@ -65,9 +65,9 @@ class Playlist:
         self.description = playlist['description']
         self.length      = len(tracks)
 
-        spotify_user.upload_playlist_cover_image(COVER_IMAGE_PATH, self.id, genre=req.genre)
+        user.upload_playlist_cover_image(COVER_IMAGE_PATH, self.id, genre=req.genre)
 
-        self.user_oid = spotify_user.oid
+        self.user_oid = user.oid
         self.request_oid = req.oid
 
         self.in_db = False
@@ -112,7 +112,7 @@ class Playlist:
         """
         
         # STEP 1: Update plaulist on spotify
-        spotify_user.execute('playlist_add_items', playlist_id=self.id, items=[track.get('spotify_uri', '')])
+        get_spotify_user().execute('playlist_add_items', playlist_id=self.id, items=[track.get('spotify_uri', '')])
         # STEP 2: Update playlist object
         self.length += 1
         # STEP 3: 
@@ -128,7 +128,8 @@ class Playlist:
         """Delete the playlist and all associated info"""
         
         # STEP 1: Delete playlist on spotify
-        spotify_user.execute('user_playlist_unfollow', user=spotify_user.id, playlist_id=self.id)
+        user = get_spotify_user()
+        user.execute('user_playlist_unfollow', user=user.id, playlist_id=self.id)
 
         # STEP 2: Delete link from requests
         db = DB()
@@ -1,16 +1,20 @@
+import threading
+
 from typing import TypedDict
 
-from src.utils.util import NICHEMAP, LANGMAP, NICHE_APP_URL, Language, NicheLevel
+from src.utils.util             import NICHEMAP, LANGMAP, NICHE_APP_URL, Language, NicheLevel
+from src.utils.metrics          import GenerationMetrics
+from src.utils.musicbrainz_util import ArtistMetricsBand, get_lastfm_genre
 
 from src.db.DB                import DB
 from src.db.DAOs.RequestsDAO  import RequestDAO
 from src.db.DAOs.PlaylistsDAO import PlaylistDAO
 
-from src.models.pydantic.Request import Request, Params, Stats
+from src.models.pydantic.Request import Request, Params, StageStats, ServiceStats
 
-from src.services.genre_handling.valid_genres import genres as valid_genres, genre_is_spotify
+from src.services.genre_handling.valid_genres import genre_is_valid, genre_is_spotify
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 class PlaylistInfo(TypedDict):
     """Playlist info obj
 
@@ -20,6 +24,9 @@ class PlaylistInfo(TypedDict):
     name       : str
     description: str
 
+# Stats are written to the db every this many tracks during a generation (see update_stats)
+STATS_FLUSH_EVERY_TRACKS = 5
+
 # Dictionary for maximums and minimums for "nicheness"
 #  All must apply EXCEPT lastfm playcount and listeners, where EITHER may apply
 # All values go up by multiples of 3, except spotify followers min which goes up by y = .0001x^2 + 7500 where every 10 000th x step is the next level up
@@ -90,7 +97,7 @@ class PlaylistRequest:
             public (bool)              : Should the playlist be public?
             add_to_db (bool, optional)  : Add the playlist to the db?. Default to true
         """
-        assert(genre in valid_genres()) # Genre is valid
+        assert(genre_is_valid(genre)) # Genre is valid
 
         self.songs_min_year_created = songs_min_year_created
         self.songs_length_min_secs  = songs_length_min_secs
@@ -98,7 +105,7 @@ class PlaylistRequest:
         self.language               = language # This stays as an enum
         self.genre                  = genre
         self.niche_level            = niche_level
-        self.user_oid               = spotify_user.oid
+        self.user_oid               = get_spotify_user().oid
         self.public                 = public
 
         if (genre_is_spotify(self.genre)):
@@ -121,6 +128,13 @@ class PlaylistRequest:
 
         #self.playlist_min_length = 1
 
+        # Running stats, loaded on the first update (see update_stats)
+        self._stats              = None
+        self._playlist_length    = 0
+        self._stats_dirty        = False
+        self._tracks_since_flush = 0
+        self._stats_lock         = threading.Lock()
+
         self.in_db = False
         if (add_to_db):
             self.add_db_entry()
@@ -159,17 +173,30 @@ class PlaylistRequest:
             request_model (Request): The Request model instance.
             add_to_db (bool, optional): Whether to add the PlaylistRequest to the database. Defaults to False.
 
+        Returns:
+            PlaylistRequest: The created PlaylistRequest instance.
+        """
+        return (cls.from_params(request_model.params, add_to_db))
+
+    @classmethod
+    def from_params(cls, params: Params, add_to_db: bool = True) -> 'PlaylistRequest':
+        """Create a PlaylistRequest instance from the params of a Request model.
+
+        Args:
+            params (Params): The params.
+            add_to_db (bool, optional): Whether to add the PlaylistRequest to the database. Defaults to True.
+
         Returns:
             PlaylistRequest: The created PlaylistRequest instance.
         """
         return (cls(
-            songs_min_year_created = request_model.params.songs_min_year_created,
-            language               = LANGMAP.get(request_model.params.language),
-            niche_level            = NICHEMAP.get(request_model.params.niche_level),
-            songs_length_min_secs  = request_model.params.songs_length_min_secs,
-            songs_length_max_secs  = request_model.params.songs_length_max_secs,
-            genre                  = request_model.params.genre,
-            public                 = request_model.params.public,
+            songs_min_year_created = params.songs_min_year_created,
+            language               = LANGMAP.get(params.language),
+            niche_level            = NICHEMAP.get(params.niche_level),
+            songs_length_min_secs  = params.songs_length_min_secs,
+            songs_length_max_secs  = params.songs_length_max_secs,
+            genre                  = params.genre,
+            public                 = params.public,
             add_to_db              = add_to_db
         ))
 
@@ -183,9 +210,27 @@ class PlaylistRequest:
             'name'       : f'Niche {self.genre} Songs',
             'description': f'Courtesy of the niche app :) ({NICHE_APP_URL})'
         })
+
+    def metrics_band(self) -> ArtistMetricsBand:
+        """Get the metrics an artist must have to be valid for the request (to prefilter artists by their stored metrics)
+
+        Returns:
+            ArtistMetricsBand: the band
+        """
+        return({
+            'lastfm_listeners_min' : self.lastfm_listeners_min,
+            'lastfm_listeners_max' : self.lastfm_listeners_max,
+            'lastfm_playcount_min' : self.lastfm_playcount_min,
+            'lastfm_playcount_max' : self.lastfm_playcount_max,
+            'lastfm_likeness_min'  : self.lastfm_likeness_min,
+            'spotify_followers_min': self.spotify_followers_min,
+            'spotify_followers_max': self.spotify_followers_max,
+            'lastfm_genre'         : get_lastfm_genre(self.genre)
+        })
     
     def update_stats(self, new_track_artist_followers: int = None, percent_artists_valid_new_val: float = None, previous_num_tracks: int = None) -> None:
-        """Update the stats part of the related db entry
+        """Update the stats of the related db entry. Kept in memory and written every STATS_FLUSH_EVERY_TRACKS tracks
+        (call flush_stats at the end of a generation)
 
         Args:
             new_track_artist_followers (int, optional): The number of followers of the artist who made the new track which was just added to the request's related playlist. Defaults to None.
@@ -194,36 +239,72 @@ class PlaylistRequest:
 
         """
         assert(self.in_db)
+        with self._stats_lock:
+            if (self._stats is None):
+                self._load_stats()
+
+            if (percent_artists_valid_new_val):
+                self._stats['percent_artists_valid'] = percent_artists_valid_new_val
+                self._stats_dirty = True
+            if (new_track_artist_followers):
+                # Get the previous number of tracks
+                if (not previous_num_tracks):
+                    previous_num_tracks = self._playlist_length
+                curr_average_followers = self._stats['average_artist_followers']
+                self._stats['average_artist_followers'] = (((curr_average_followers * previous_num_tracks) + new_track_artist_followers) / (previous_num_tracks + 1))
+                self._stats_dirty = True
+                self._tracks_since_flush += 1
+
+            flush = (self._tracks_since_flush >= STATS_FLUSH_EVERY_TRACKS)
+        if (flush):
+            self.flush_stats()
+
+        return(None)
+
+    def _load_stats(self) -> None:
+        """Read the stats the running values start from (hold the stats lock)"""
         db   = DB()
-        rdao = RequestDAO(db)
-        curr = rdao.read_by_id(self.oid)
-
-        # Get the previous number of tracks
-        if(previous_num_tracks):
-            pass
-        elif (curr.playlist_generated):
-            pdao = PlaylistDAO(db)
-            playlist = pdao.read_by_id(curr.playlist_generated)
-            previous_num_tracks = playlist.generated_length
-        else:
-            previous_num_tracks = 0
-
-        curr_average_followers = curr.stats.average_artist_followers or 0
-        curr_pct_valid         = curr.stats.percent_artists_valid or 0
-
-        # Create the appropriate update values for the stats based on args
-        update_val_pct       = curr_pct_valid
-        update_val_followers = curr_average_followers
-        if (percent_artists_valid_new_val):
-            update_val_pct = percent_artists_valid_new_val
-        if (new_track_artist_followers):
-            update_val_followers = (((curr_average_followers * previous_num_tracks) + new_track_artist_followers) / (previous_num_tracks + 1))
-
-        rdao.update(self.oid, {
-            'stats': Stats(
-                percent_artists_valid    = update_val_pct,
-                average_artist_followers = update_val_followers
-            )
+        curr = RequestDAO(db).read_by_id(self.oid)
+        self._stats = {
+            'percent_artists_valid'   : curr.stats.percent_artists_valid or 0,
+            'average_artist_followers': curr.stats.average_artist_followers or 0
+        }
+        self._playlist_length = 0
+        if (curr.playlist_generated):
+            self._playlist_length = PlaylistDAO(db).read_by_id(curr.playlist_generated).generated_length
+
+    def flush_stats(self) -> None:
+        """Write the stats kept in memory to the related db entry, if they changed since the last write"""
+        with self._stats_lock:
+            if (not self._stats_dirty):
+                return(None)
+            stats = dict(self._stats)
+            self._stats_dirty        = False
+            self._tracks_since_flush = 0
+        RequestDAO(DB()).set_stats(self.oid, stats)
+        return(None)
+
+    def record_metrics(self, metrics: GenerationMetrics) -> None:
+        """Store the time spent per stage and the API usage per service of the generation in the stats of the related db entry
+
+        Args:
+            metrics (GenerationMetrics): The generation's metrics
+        """
+        assert(self.in_db)
+        RequestDAO(DB()).set_stats(self.oid, {
+            'generation_secs': round(metrics.elapsed_s, 2),
+            'stages'         : {
+                stage: StageStats(secs=round(secs, 2), items=metrics.stage_items[stage])
+                for stage, secs in metrics.stage_seconds.items()
+            },
+            'services'       : {
+                service: ServiceStats(
+                    calls                = metrics.api_calls[service],
+                    errors               = metrics.api_errors[service],
+                    rate_limit_wait_secs = round(metrics.rate_limit_wait_s[service], 2)
+                )
+                for service in (metrics.api_calls.keys() | metrics.api_errors.keys())
+            }
         })
 
         return(None)
@@ -1,9 +1,13 @@
 from src.utils.util         import convert_ms_to_s
-from src.utils.spotify_util import find_exact_match, SpotifyTrack
+from src.utils.spotify_util import SpotifyTrack, track_resolution_key
 from src.utils.lastfm_util  import LastFMTrack
 from src.utils.logger       import logger
 
-from src.auth.SpotifyUser import spotify_user
+from src.services.text_classification.text_rules import get_rule
+
+from src.auth.SpotifyTrackIndex import spotify_track_index
+
+from src.models.pydantic.SpotifyTrackResolution import SpotifyTrackResolution
 
 class Track:
     """High level Track
@@ -32,6 +36,9 @@ class Track:
         """
         self.name   = name
         self.artist = artist
+        # Resolution read from the track index ahead of time (see prefetch_spotify_resolutions)
+        self._spotify_resolution: SpotifyTrackResolution = None
+        self._spotify_resolution_prefetched = False
 
     @classmethod
     def from_lastfm(cls, lastfm_track: LastFMTrack) -> 'Track':
@@ -54,6 +61,19 @@ class Track:
         except Exception as e:
             raise Exception(f"Couldn't create track {name} by {artist_name} from lastfm: {e}")
 
+    @staticmethod
+    def prefetch_spotify_resolutions(tracks: list['Track']) -> None:
+        """Read the track index entries of many tracks in one query, so that attaching their spotify information
+        only needs a request for the tracks which are not in it
+
+        Args:
+            tracks (list[Track]): The tracks
+        """
+        resolutions = spotify_track_index.read_many([(track.name, track.artist) for track in tracks])
+        for track in tracks:
+            track._spotify_resolution            = resolutions.get(track_resolution_key(track.name, track.artist))
+            track._spotify_resolution_prefetched = True
+
     def _attach_valid_track(self, spotify_track: SpotifyTrack) -> SpotifyTrack:
         """Attach a SpotifyTrack and associated spotify information to the track with no validations"""
         try:
@@ -84,7 +104,7 @@ class Track:
         if ((not artist_spotify_id) or (self.artist_id_in_spotify_track(artist_spotify_id))):
             return (self._attach_valid_track(spotify_track))
         else:
-            logger.error(f"Track {self.name} not by {self.artist} {artist_spotify_id}")
+            logger.error("Track %s not by %s %s", self.name, self.artist, artist_spotify_id)
 
     def attach_spotify_track_information(self, artist_spotify_id: str = "") -> SpotifyTrack:
         """Attach information about the track from spotify
@@ -92,6 +112,8 @@ class Track:
         Args:
             artist_spotify_id (str, Optional): The spotify id of the artist that made the track (for validation purposes). Default ""
 
+        The track is looked up in the track index first, spotify is only searched on a miss.
+
         Raises:
             Exception: Unexpected error
             Exception: Couldn't find track
@@ -103,19 +125,16 @@ class Track:
         if(getattr(self, 'spotify_track', None)):
             return(self.spotify_track)
 
-        spotify_track = None
         try:
-            spotify_tracks = spotify_user.get_spotify_tracks_direct(self.name, self.artist)
+            spotify_track = spotify_track_index.resolve(self.name, self.artist, self._spotify_resolution, self._spotify_resolution_prefetched)
         except Exception as e:
-            logger.warning(f"Couldn't get Spotify track information for '{self.name}' by '{self.artist}' with direct search: {e}")
+            logger.warning("Couldn't get Spotify track information for '%s' by '%s' with direct search: %s", self.name, self.artist, e)
             return
 
-        spotify_track = find_exact_match(spotify_tracks, self.name, self.artist)
-
         if(spotify_track and ((not artist_spotify_id) or self.artist_id_in_spotify_track(artist_spotify_id))):
             return(self._attach_valid_track(spotify_track))
         else:
-            logger.error(f"Track {self.name} not by {self.artist} {artist_spotify_id}")
+            logger.error("Track %s not by %s %s", self.name, self.artist, artist_spotify_id)
             
         raise Exception(f"Couldn\'t find track {self.name} by {self.artist} on Spotify.")
         
@@ -145,9 +164,4 @@ class Track:
         Returns:
             bool: True if original with lyrics, False otherwise.
         """
-        keywords = ['instrumental', 'cover', 'inst.', 'cov.', 'ver.', 'version', "background music", "no vocals",
-        "alternative version", "soundtrack", 'theme', 'star wars']
-        name_lower = self.name.lower()  # Convert to lowercase for case-insensitive comparison
-        return(not any(keyword in name_lower for keyword in keywords))
-
-
+        return(not get_rule('non_original_track_title').matches(self.name))
@@ -2,13 +2,14 @@ from enum   import Enum
 from bidict import bidict
 from numpy  import mean as mean
 
-from src.auth.MusicBrainzRequests import MusicBrainzRequests
+from src.auth.MusicBrainzRequests import MusicBrainzRequests, musicbrainz_requests
 
 from src.services._shared_classes.PlaylistRequest import PlaylistRequest, Language
 from src.services._shared_classes.Artist          import Artist
 from src.services._shared_classes.Track           import Track
 
-from src.utils.logger import logger
+from src.utils.logger           import logger
+from src.utils.musicbrainz_util import work_languages_to_languages
 
 ReasonExcluded = Enum('ReasonExcluded', ['TOO_MANY_SOMETHING', 'NOT_LIKED_ENOUGH', 'WRONG_LANGUAGE', 'TOO_FEW_SOMETHING', 'OTHER'] )
 REASONMAP: bidict = bidict({
@@ -25,15 +26,18 @@ class Validator:
 
     Properties:
         request
+        musicbrainz: MusicBrainz client
     """
 
-    def __init__(self, request: PlaylistRequest) -> None:
+    def __init__(self, request: PlaylistRequest, musicbrainz: MusicBrainzRequests = None) -> None:
         """ Initialize
 
         Args:
             request (PlaylistRequest): Request to validate against
+            musicbrainz (MusicBrainzRequests, optional): MusicBrainz client. Defaults to the shared client.
         """
-        self.request = request
+        self.request     = request
+        self.musicbrainz = musicbrainz or musicbrainz_requests
 
     def artist_likeness_invalid(self, artist: Artist) -> bool:
         """Valid according to request
@@ -70,13 +74,27 @@ class Validator:
             ReasonExcluded | None: Reason excluded if it exists
         """
         if(artist.spotify_followers > self.request.spotify_followers_max):
-            logger.error(f'Artist {artist.name} followers ({artist.spotify_followers}) too high')
+            logger.debug('Artist %s followers (%s) too high', artist.name, artist.spotify_followers)
             return(ReasonExcluded.TOO_MANY_SOMETHING)
         if(artist.spotify_followers < self.request.spotify_followers_min):
-            logger.error(f'Artist {artist.name} followers ({artist.spotify_followers}) too low')
+            logger.debug('Artist %s followers (%s) too low', artist.name, artist.spotify_followers)
             return(ReasonExcluded.TOO_FEW_SOMETHING)
         return(None)
 
+    def artist_languages_musicbrainz(self, artist: Artist) -> dict[Language, int]:
+        """Get the languages the artist sings in from their musicbrainz works. Uses the distribution stored with the artist
+            (see scripts/db/addArtistWorkLanguages.js) and only asks musicbrainz when there is none.
+
+        Args:
+            artist (Artist): The Artist. Must have an mbid.
+
+        Returns:
+            dict[Language, int]: Language: number of works in that language
+        """
+        if (artist.mb_work_languages is None):
+            artist.mb_work_languages = self.musicbrainz.get_artist_work_languages(artist.mbid)
+        return(work_languages_to_languages(artist.mb_work_languages))
+
     def artist_excluded_language(self, artist: Artist, mb_check: bool = True) -> ReasonExcluded | None:
         # Language
         """Return wrong language exclusion if artist is in wrong language
@@ -92,12 +110,11 @@ class Validator:
             return(None)
         elif (mb_check):
             assert(artist.mbid)
-            mb = MusicBrainzRequests()
-            if (self.request.language not in mb.get_artist_languages(artist.mbid)):
-                logger.error(f"Artist does not sing in {self.request.language}")
+            if (self.request.language not in self.artist_languages_musicbrainz(artist)):
+                logger.debug('Artist %s does not sing in %s', artist.name, self.request.language)
                 return(ReasonExcluded.WRONG_LANGUAGE)
         elif (self.request.language not in artist.get_language_guess_spotify()):
-            logger.error(f"SPOTIFY CHECK - Artist does not sing in {self.request.language}")
+            logger.debug('SPOTIFY CHECK - Artist %s does not sing in %s', artist.name, self.request.language)
             return(ReasonExcluded.WRONG_LANGUAGE)
 
         return(None)
@@ -110,17 +127,17 @@ class Validator:
         """
         # CHECK IF ORIGINAL
         if (not track.is_original_with_lyrics()):
-            logger.warning(f'Track {track.name} is a cover, instrumental, or special version of a song')
+            logger.debug('Track %s is a cover, instrumental, or special version of a song', track.name)
             return(False)
 
         # CHECK DURATION
         if((track.track_length_seconds < self.request.songs_length_min_secs) or (track.track_length_seconds > self.request.songs_length_max_secs)):
-            logger.warning(f"Skipping track '{track.name}' due to song length constraints.")
+            logger.debug("Skipping track '%s' due to song length constraints.", track.name)
             return(False)
         
         # CHECK YEAR PUBLISHED
         if(track.track_release_year < self.request.songs_min_year_created):
-            logger.warning(f"Skipping track '{track.name}' due to year published constraints.")
+            logger.debug("Skipping track '%s' due to year published constraints.", track.name)
             return(False)
         return(True)
 
@@ -138,33 +155,34 @@ class Validator:
             ReasonExcluded | None: Reason excluded if it exists
         """
         try:
-            # Attach artist from lastfm
-            artist.attach_artist_lastfm()
-            logger.info(f'Attached lastfm artist {artist.name} from lastfm')
+            # Attach artist from lastfm, unless the metrics stored on the artist are fresh enough to check
+            if (not artist.metrics_stored):
+                artist.attach_artist_lastfm()
+                logger.info('Attached lastfm artist %s from lastfm', artist.name)
 
             # Check artist listener and play and likeness thresholds
             if (self.artist_listeners_and_plays_too_high(artist)):
-                logger.error(f'Artist {artist.name} listeners {artist.lastfm_artist_listeners} and playcount {artist.lastfm_artist_playcount} too high')
+                logger.debug('Artist %s listeners %s and playcount %s too high', artist.name, artist.lastfm_artist_listeners, artist.lastfm_artist_playcount)
                 return(ReasonExcluded.TOO_MANY_SOMETHING)
 
             if (self.artist_listeners_and_plays_too_low(artist)):
-                logger.error(f'Artist {artist.name} listeners {artist.lastfm_artist_listeners} and playcount {artist.lastfm_artist_playcount} too low')
+                logger.debug('Artist %s listeners %s and playcount %s too low', artist.name, artist.lastfm_artist_listeners, artist.lastfm_artist_playcount)
                 return(ReasonExcluded.TOO_FEW_SOMETHING)
 
             if (self.artist_likeness_invalid(artist)):
-                logger.error(f'Artist likeness ({artist.lastfm_artist_likeness}) invalid')
+                logger.debug('Artist %s likeness (%s) invalid', artist.name, artist.lastfm_artist_likeness)
                 return(ReasonExcluded.NOT_LIKED_ENOUGH)
 
             if (not artist.artist_in_lastfm_genre(self.request.genre)):
-                logger.error(f'Artist {artist.name} not in genre {self.request.genre}')
+                logger.debug('Artist %s not in genre %s', artist.name, self.request.genre)
                 return(ReasonExcluded.OTHER)
 
             if (artist.lastfm_page_is_conglomerate()):
-                logger.error(f'Artist {artist.name} lastfm page is a conglomerate page')
+                logger.debug('Artist %s lastfm page is a conglomerate page', artist.name)
                 return(ReasonExcluded.OTHER)
 
             else:
-                logger.info(f'Artist {artist.name} is valid')
+                logger.info('Artist %s is valid', artist.name)
                 # Artist passes all checks
                 return(None)
         except Exception as e:
@@ -183,7 +201,7 @@ class Validator:
         """
         try:
             artist.attach_spotify_artist_from_track(track)
-            logger.info(f'Attached Spotify artist {artist.name} from Last.fm top track')
+            logger.info('Attached Spotify artist %s from Last.fm top track', artist.name)
             return(True)
         except Exception as e:
             logger.error(e)
@@ -1,7 +1,10 @@
 from pathlib import Path
 from typing  import TypedDict
+from types   import MappingProxyType
 
+import os
 import json
+import threading
 
 # Specify the path to your JSON file
 file_path = Path('src/services/genre_handling/genres.json')
@@ -9,17 +12,74 @@ file_path = Path('src/services/genre_handling/genres.json')
 service_genre_names    = 'SPOTIFY'
 service_secondary_name = 'MUSICBRAINZ'
 
+SERVICES = ('SPOTIFY', 'MUSICBRAINZ', 'LASTFM')
+
 class GenreDict(TypedDict):
     SPOTIFY    : str
     MUSICBRAINZ: str
     LASTFM     : str
 
+class GenreIndex:
+    """Immutable lookups over genres.json, built once per version of the file
+
+    Attributes:
+        mtime_ns: Modification time of the file the index was built from
+        genres: Valid genres (spotify genre seed format) in file order
+        valid_genres: Set of genres
+        spotify_genres: Set of spotify genre names
+        conversions: (from_service, to_service): {genre in from_service: genre in to_service}
+    """
+    __slots__ = ('mtime_ns', 'genres', 'valid_genres', 'spotify_genres', 'conversions')
+
+    def __init__(self, data: list[GenreDict], mtime_ns: int) -> None:
+        """Build the index
+
+        Args:
+            data (list[GenreDict]): genres.json contents
+            mtime_ns (int): Modification time of genres.json
+        """
+        self.mtime_ns       = mtime_ns
+        self.genres         = tuple(genre.get(service_genre_names) or genre.get(service_secondary_name) for genre in data)
+        self.valid_genres   = frozenset(self.genres)
+        self.spotify_genres = frozenset(genre['SPOTIFY'] for genre in data if genre.get('SPOTIFY'))
+
+        conversions = {}
+        for from_service in SERVICES:
+            for to_service in SERVICES:
+                mapping = {}
+                for genre in data:
+                    name = genre.get(from_service)
+                    # The first entry for a name wins
+                    if (name and (name not in mapping)):
+                        mapping[name] = genre.get(to_service)
+                conversions[(from_service, to_service)] = MappingProxyType(mapping)
+        self.conversions = MappingProxyType(conversions)
+
+_index: GenreIndex = None
+_index_lock = threading.Lock()
+
+def get_genre_index() -> GenreIndex:
+    """Get the genre index, rebuilding it only if genres.json has changed since it was built
+
+    Returns:
+        GenreIndex: The index
+    """
+    global _index
+    mtime_ns = os.stat(file_path).st_mtime_ns
+    index    = _index
+    if ((index is None) or (index.mtime_ns != mtime_ns)):
+        with _index_lock:
+            if ((_index is None) or (_index.mtime_ns != mtime_ns)):
+                _index = GenreIndex(get_genre_dict_list(), mtime_ns)
+            index = _index
+    return(index)
+
 def genre_is_spotify(genre: str) -> bool:
-    data = get_genre_dict_list()
-    entry = next((item for item in data if item.get('SPOTIFY', '') == genre), None)
-    if(entry):
-        return(True)
-    return(False)
+    return(genre in get_genre_index().spotify_genres)
+
+def genre_is_valid(genre: str) -> bool:
+    """Is the genre valid for requests (spotify genre seed format)"""
+    return(genre in get_genre_index().valid_genres)
 
 def convert_genre(from_service: str, to_service: str, genre: str) -> str:
     """Convert genre name from one service to another
@@ -33,20 +93,17 @@ def convert_genre(from_service: str, to_service: str, genre: str) -> str:
     """
     assert((from_service == 'MUSICBRAINZ') or (from_service == 'SPOTIFY') or (from_service == 'LASTFM'))
     assert((to_service == 'MUSICBRAINZ') or (to_service == 'SPOTIFY') or (to_service == 'LASTFM'))
-    data = get_genre_dict_list()
-    entry = next((item for item in data if item.get(from_service, '') == genre), None)
-    if(entry):
-        return(entry[to_service])
+    return(get_genre_index().conversions[(from_service, to_service)].get(genre))
 
 def get_genre_dict_list() -> list[GenreDict]:
-    """Get the list of dicts of genres
+    """Get the list of dicts of genres (read from the file, use get_genre_index for lookups)
 
     Returns:
         list[GenreDict]: the list of dicts of genres
     """
     with open(file_path, 'r') as file:
         data: list[GenreDict] = json.load(file)
-    
+
     return(data)
 
 def genres() -> list[str]:
@@ -55,14 +112,7 @@ def genres() -> list[str]:
     Returns:
         list[str]: List of genres
     """
-    genre_list = []
-    data = get_genre_dict_list()
-    
-    for genre in data:
-        genre_list.append(genre.get(service_genre_names) or genre.get(service_secondary_name))
-    
-    return (genre_list)
+    return (list(get_genre_index().genres))
 
 if __name__ == '__main__':
     print(genres())
-
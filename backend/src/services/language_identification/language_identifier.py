@@ -0,0 +1,126 @@
+import threading
+
+from collections import OrderedDict
+from typing      import Callable, Iterable, Optional
+
+from langdetect.detector_factory      import DetectorFactory, PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
+
+from src.utils.util import Language, map_language_codes, filter_low_count_entries
+
+# Artists whose verdict is kept in memory
+MAX_ARTIST_VERDICTS = 10000
+
+class LanguageIdentifier:
+    """Identifies the language of short texts (e.g. track titles) with langdetect
+
+    The profiles are loaded once, by the first detection, and detection is seeded so the same text
+    always gets the same language. Verdicts for artists are memoized by spotify artist id.
+
+    Attributes:
+        seed: Seed for langdetect's sampling
+        max_artist_verdicts: Max artist verdicts kept (least recently used are dropped)
+    """
+    def __init__(self, seed: int = 0, max_artist_verdicts: int = MAX_ARTIST_VERDICTS) -> None:
+        """Initialize the identifier (profiles are loaded on first use)
+
+        Args:
+            seed (int, optional): Seed for langdetect's sampling. Defaults to 0.
+            max_artist_verdicts (int, optional): Max artist verdicts kept. Defaults to MAX_ARTIST_VERDICTS.
+        """
+        self.seed                = seed
+        self.max_artist_verdicts = max_artist_verdicts
+        self._factory: DetectorFactory = None
+        self._factory_lock = threading.Lock()
+        self._verdicts: OrderedDict[tuple[str, float], dict[Language, int]] = OrderedDict()
+        self._verdicts_lock = threading.Lock()
+
+    def _get_factory(self) -> DetectorFactory:
+        """Load the language profiles, once
+
+        Returns:
+            DetectorFactory: Factory with the profiles loaded
+        """
+        if (self._factory is None):
+            with self._factory_lock:
+                if (self._factory is None):
+                    factory = DetectorFactory()
+                    factory.load_profile(PROFILES_DIRECTORY)
+                    factory.seed  = self.seed
+                    self._factory = factory
+        return(self._factory)
+
+    def detect(self, text: str) -> Optional[str]:
+        """Identify the language of a text
+
+        Args:
+            text (str): The text
+
+        Returns:
+            Optional[str]: ISO 639-1 code, None if it couldn't be identified
+        """
+        detector = self._get_factory().create()
+        detector.append(text)
+        try:
+            return(detector.detect())
+        except LangDetectException:
+            return(None)
+
+    def detect_many(self, texts: Iterable[str]) -> list[Optional[str]]:
+        """Identify the language of many texts (each distinct text is only classified once)
+
+        Args:
+            texts (Iterable[str]): The texts
+
+        Returns:
+            list[Optional[str]]: ISO 639-1 code for each text, in order, None where it couldn't be identified
+        """
+        texts    = list(texts)
+        detected = {text: self.detect(text) for text in dict.fromkeys(texts) if text}
+        return([detected.get(text) for text in texts])
+
+    def guess_languages(self, texts: Iterable[str], pct_min: float = 30) -> dict[Language, int]:
+        """Guess the languages a set of texts is written in
+
+        Args:
+            texts (Iterable[str]): The texts
+            pct_min (float, optional): Percent of the identified texts a language needs to count. Defaults to 30.
+
+        Returns:
+            dict[Language, int]: Language: number of texts in it
+        """
+        codes = [code for code in self.detect_many(texts) if code]
+        return(filter_low_count_entries(map_language_codes(language_codes=codes, iso639_type=1), pct_min=pct_min))
+
+    def guess_artist_languages(self, spotify_artist_id: str, get_texts: Callable[[], Iterable[str]], pct_min: float = 30) -> dict[Language, int]:
+        """Guess the languages an artist sings in, memoized by artist
+
+        Args:
+            spotify_artist_id (str): The artist's spotify id
+            get_texts (Callable[[], Iterable[str]]): Gets the artist's texts (e.g. top track titles). Only called on a miss
+            pct_min (float, optional): Percent of the identified texts a language needs to count. Defaults to 30.
+
+        Returns:
+            dict[Language, int]: Language: number of texts in it
+        """
+        key = (spotify_artist_id, pct_min)
+        with self._verdicts_lock:
+            verdict = self._verdicts.get(key)
+            if (verdict is not None):
+                self._verdicts.move_to_end(key)
+                return(dict(verdict))
+
+        verdict = self.guess_languages(get_texts(), pct_min=pct_min)
+
+        with self._verdicts_lock:
+            self._verdicts[key] = verdict
+            self._verdicts.move_to_end(key)
+            while (len(self._verdicts) > self.max_artist_verdicts):
+                self._verdicts.popitem(last=False)
+        return(dict(verdict))
+
+# Shared by the whole process
+language_identifier = LanguageIdentifier()
+
+if __name__ == '__main__':
+    print(language_identifier.detect_many(['Ne me quitte pas', 'Here Comes the Sun', 'La Bamba', 'Here Comes the Sun']))
@@ -16,7 +16,7 @@ from src.db.DAOs.RequestsDAO  import RequestDAO
 from src.db.DAOs.PlaylistsDAO import PlaylistDAO
 from src.db.DB                import DB
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 
 # Add songs does not check for likeness or genre as it's methods are incapable of the former, and adherance to the latter is assumed
 
@@ -76,7 +76,7 @@ def artist_valid_for_insert(artist: SpotifyArtist, playlist_tracks: list[NicheTr
     Returns:
         bool: Is it?
     """
-    artist_obj = Artist(artist.get('name', ''), 'no id')
+    artist_obj = Artist(artist.get('name', ''), '')
     artist_obj.attach_spotify_artist(artist)
 
     artist_ids_in_playlist = [track.get('artist_spotify_id', '') for track in playlist_tracks]
@@ -144,7 +144,7 @@ def add_valid_track(track_uri: str, playlist_url: str) -> str | None:
     logger.info(f'Adding track with uri {track_uri}')
     
     # Get the spotify artist
-    spotify_user.execute('playlist_add_items', playlist_id=playlist_id, items=[track_uri])
+    get_spotify_user().execute('playlist_add_items', playlist_id=playlist_id, items=[track_uri])
     return(track_uri)
 
 
@@ -180,7 +180,7 @@ def add_more_songs_for_artist(playlist_url: str, artist_spotify_id: str, num_son
     
 
     # Get the spotify artist
-    top_tracks = spotify_user.execute('artist_top_tracks', artist_spotify_id).get('tracks', [])
+    top_tracks = get_spotify_user().get_spotify_artist_top_tracks(artist_spotify_id)
 
     random.shuffle(top_tracks)
 
@@ -1,4 +1,4 @@
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import spotify_user, get_spotify_user
 from src.utils.spotify_util import extract_id
 from src.utils.logger import logger
 
@@ -16,7 +16,7 @@ def remove_song(track_uri: str, playlist_url: str):
     logger.info(f'Removing track with uri {track_uri}')
 
     # Get the spotify artist
-    spotify_user.execute('playlist_remove_all_occurrences_of_items', playlist_id=playlist_id, items=[track_uri])
+    get_spotify_user().execute('playlist_remove_all_occurrences_of_items', playlist_id=playlist_id, items=[track_uri])
     return(track_uri)
 
 if __name__ == '__main__':
@@ -13,10 +13,9 @@ from src.db.DB                import DB
 
 from src.services.profile.playlists               import get_playlist_tracks
 from src.services.playlist_editor.add_songs       import artist_valid_for_insert, track_valid_for_insert
-from src.services.genre_handling.valid_genres     import genre_is_spotify
 from src.services._shared_classes.PlaylistRequest import PlaylistRequest
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import spotify_user, get_spotify_user
 
 from config.personal_init import token
 
@@ -34,13 +33,13 @@ def _get_random_artist_ids(tracks: list[NicheTrack], num: int = 4) -> list[Spoti
     seed_ids = list(set([track.get('artist_spotify_id', '') for track in tracks_copy]))
     return(random.sample(seed_ids, num) if len(seed_ids) > num else seed_ids)
 
-def get_recommendations(playlist_url: str, num: int = 1) -> list[SpotifyTrack]:
-    """Get num recommendations for the playlist from spotify
+def get_recommendations_for_tracks(playlist_tracks: list[NicheTrack], playlist_request: PlaylistRequest, num: int = 1) -> list[SpotifyTrack]:
+    """Get num recommendations for an in-memory playlist from spotify (no playlist needs to exist on spotify or in the db)
 
     Args:
-        playlist_url (str): Url
+        playlist_tracks (list[NicheTrack]): The tracks in the playlist
+        playlist_request (PlaylistRequest): The request the playlist is for
         num (int, optional): Number of recs to get. Defaults to 1.
-        delete_after(bool, optional): Delete the playlist after? Defaults to False.
 
     Returns:
         list[SpotifyTrack]: The recs
@@ -50,57 +49,52 @@ def get_recommendations(playlist_url: str, num: int = 1) -> list[SpotifyTrack]:
     added_artist_ids = []
     added_track_ids = []
 
-    db = DB()
-    pdao = PlaylistDAO(db)
-    # Get the playlist entry by the link
-    playlist: PlaylistModel = pdao.read_all({'link': playlist_url})[0] # Should be unique anyways
-    rdao = RequestDAO(db)
-    # Get the request from the playlist
-    request: RequestModel = rdao.read_by_id(playlist.request)
-
-    playlist_tracks = get_playlist_tracks(playlist_url)
-    playlist_request = PlaylistRequest.from_model(request_model=request, add_to_db=False)
-
-    if (genre_is_spotify(request.params.genre)):
+    if (playlist_request.genre_is_spotify_seed_genre):
         seed_artists = _get_random_artist_ids(playlist_tracks, artist_seeds_num)
-        seed_genres = [request.params.genre]
+        seed_genres = [playlist_request.genre]
     else:
         seed_artists = _get_random_artist_ids(playlist_tracks, artist_seeds_num + 1)
         seed_genres = []
 
     # Get the max number of recs, shuffle them, add the first num valid ones
 
-    logger.info(f'Getting recommendations for playlist {playlist_url}...')
+    logger.info(f'Getting recommendations for {len(playlist_tracks)} tracks...')
 
     if (seed_genres):
-        recs = spotify_user.execute(
+        recs = get_spotify_user().execute(
             'recommendations',
             seed_artists    = seed_artists,
             seed_genres     = seed_genres,
             limit           = SPOTIFY_MAX_LIMIT_RECS,
-            min_duration_ms = convert_s_to_ms(request.params.songs_length_min_secs),
-            max_duration_ms = convert_s_to_ms(request.params.songs_length_max_secs),
+            min_duration_ms = convert_s_to_ms(playlist_request.songs_length_min_secs),
+            max_duration_ms = convert_s_to_ms(playlist_request.songs_length_max_secs),
         )
     else:
-        recs = spotify_user.execute(
+        recs = get_spotify_user().execute(
             'recommendations',
             seed_artists    = seed_artists,
             limit           = SPOTIFY_MAX_LIMIT_RECS,
-            min_duration_ms = convert_s_to_ms(request.params.songs_length_min_secs),
-            max_duration_ms = convert_s_to_ms(request.params.songs_length_max_secs),
+            min_duration_ms = convert_s_to_ms(playlist_request.songs_length_min_secs),
+            max_duration_ms = convert_s_to_ms(playlist_request.songs_length_max_secs),
         )
 
+    if (not recs):
+        return([])
+
     logger.info(f'Recieved {len(recs.get('tracks'))} recommendations')
 
     rec_tracks = recs.get('tracks', '')
     random.shuffle(rec_tracks)
 
+    # Fetch all the rec artists up front, SPOTIFY_MAX_LIMIT_ARTISTS per request
+    rec_artists = get_spotify_user().get_spotify_artists_by_ids([track.get('artists', [{}])[0].get('id', '') for track in rec_tracks])
+
     for track in rec_tracks:
         if (len(recommended_tracks) >= num):
             break
         logger.info(f'Checking validity for track {track.get('name', '')}')
         track_artist_id = track.get('artists', [{}])[0].get('id', '')
-        track_artist: SpotifyArtist = spotify_user.execute('artist', track_artist_id)
+        track_artist: SpotifyArtist = rec_artists.get(track_artist_id)
 
         if (not track_artist):
             continue
@@ -113,6 +107,29 @@ def get_recommendations(playlist_url: str, num: int = 1) -> list[SpotifyTrack]:
     
     return(recommended_tracks)
 
+def get_recommendations(playlist_url: str, num: int = 1) -> list[SpotifyTrack]:
+    """Get num recommendations for the playlist from spotify
+
+    Args:
+        playlist_url (str): Url
+        num (int, optional): Number of recs to get. Defaults to 1.
+
+    Returns:
+        list[SpotifyTrack]: The recs
+    """
+    db = DB()
+    pdao = PlaylistDAO(db)
+    # Get the playlist entry by the link
+    playlist: PlaylistModel = pdao.read_all({'link': playlist_url})[0] # Should be unique anyways
+    rdao = RequestDAO(db)
+    # Get the request from the playlist
+    request: RequestModel = rdao.read_by_id(playlist.request)
+
+    playlist_tracks = get_playlist_tracks(playlist_url)
+    playlist_request = PlaylistRequest.from_model(request_model=request, add_to_db=False)
+
+    return(get_recommendations_for_tracks(playlist_tracks, playlist_request, num))
+
 if __name__ == '__main__':
     spotify_user.initialize(token)
     print(get_recommendations('https://open.spotify.com/playlist/46r84vZRBBY0NkzA8x06Tr', 1))
\ No newline at end of file
@@ -0,0 +1,325 @@
+import time
+import threading
+
+from collections import OrderedDict, Counter, deque
+from typing      import Optional
+
+from src.services.playlist_maker.entry            import generate
+from src.services.playlist_maker.NicheTrackFinder import GenerationProgress, GenerationCancelled
+from src.services._shared_classes.PlaylistRequest import PlaylistRequest
+from src.services.genre_handling.valid_genres     import genre_is_valid
+
+from src.utils.util     import JobStatus, JOBSTATUSMAP
+from src.utils.settings import get_settings
+from src.utils.logger   import logger
+
+from src.models.pydantic.BaseSchema    import PyObjectId
+from src.models.pydantic.Request       import Params
+from src.models.pydantic.GenerationJob import GenerationJob, JobProgress
+
+from src.db.DB                     import DB
+from src.db.DAOs.GenerationJobsDAO import GenerationJobsDAO
+
+from src.auth.SpotifyUser       import get_spotify_user, use_spotify_user
+from src.auth.SpotifyClientPool import spotify_client_pool
+
+class JobFailedError(Exception):
+    """The generation job failed"""
+
+class _ProgressReporter:
+    """Writes a running job's progress to the db at most once per interval, and picks up cancellations asked for
+    through the db (e.g. by another process) on each write
+
+    Attributes:
+        job_id
+        cancel: Set to cancel the job
+        interval_s: Min seconds between writes
+        last: The last progress reported
+    """
+    def __init__(self, job_id: PyObjectId, cancel: threading.Event, interval_s: float) -> None:
+        self.job_id       = job_id
+        self.cancel       = cancel
+        self.interval_s   = interval_s
+        self.last         = JobProgress()
+        self._dao         = GenerationJobsDAO(DB())
+        self._reported_at = 0.0
+        self._lock        = threading.Lock()
+
+    def report(self, progress: GenerationProgress) -> None:
+        """Progress callback for the generation (called from the pipeline's threads)"""
+        with self._lock:
+            self.last = snapshot = JobProgress(**progress)
+            now = time.monotonic()
+            if (now - self._reported_at < self.interval_s):
+                return(None)
+            self._reported_at = now
+        # Outside the lock, so the other threads reporting don't wait on the db
+        try:
+            if (self._dao.update_progress(self.job_id, snapshot)):
+                self.cancel.set()
+        except Exception as e:
+            logger.warning('Could not save progress of job %s: %s', self.job_id, e)
+
+class GenerationJobScheduler:
+    """Runs playlist generations in the background, on a pool of worker threads.
+
+    Jobs are persisted in the generation_jobs collection, so their status and progress can be polled from the db
+    (e.g. by a web front end, without holding a request open). The API quotas are shared by every generation, so
+    only `workers` jobs run at once and each user has at most `max_running_per_user` of them running. Users with
+    queued jobs are served in turn, so one user's backlog doesn't hold up the others.
+
+    Only one process should run the scheduler (see start): on start, jobs left running are marked as failed and queued
+    jobs are picked up. Any process can submit jobs, the one running the scheduler picks them up from the db every
+    `poll_interval_s`. Generations run as the job's user, with their client from the client pool.
+
+    Attributes:
+        workers: Number of worker threads (generations at once)
+        max_running_per_user: Max generations at once per user
+        progress_interval_s: Min seconds between progress writes of a job
+        poll_interval_s: Seconds between checks for jobs queued by other processes
+    """
+    def __init__(self, workers: int = None, max_running_per_user: int = None, progress_interval_s: float = None,
+                 poll_interval_s: float = None) -> None:
+        """Initialize the scheduler (workers are started by start)
+
+        Args:
+            workers (int, optional): Number of worker threads. Defaults to the JOB_WORKERS setting.
+            max_running_per_user (int, optional): Max generations at once per user. Defaults to the JOB_MAX_RUNNING_PER_USER setting.
+            progress_interval_s (float, optional): Min seconds between progress writes. Defaults to the JOB_PROGRESS_INTERVAL_S setting.
+            poll_interval_s (float, optional): Seconds between checks for queued jobs. Defaults to the JOB_POLL_INTERVAL_S setting.
+        """
+        settings = get_settings()
+        self.workers              = workers or settings.job_workers
+        self.max_running_per_user = max_running_per_user or settings.job_max_running_per_user
+        self.progress_interval_s  = progress_interval_s or settings.job_progress_interval_s
+        self.poll_interval_s      = poll_interval_s or settings.job_poll_interval_s
+        assert((self.workers > 0) and (self.max_running_per_user > 0))
+
+        # user: queued job ids, users in the order they are served in
+        self._queues : OrderedDict[str, deque[PyObjectId]] = OrderedDict()
+        # user: running jobs
+        self._running: Counter = Counter()
+        # job id: set to cancel the job, for the jobs queued or running in this process
+        self._cancel_events: dict[PyObjectId, threading.Event] = {}
+        # job id: set when the job is finished, for the jobs queued or running in this process
+        self._done_events  : dict[PyObjectId, threading.Event] = {}
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """Run the scheduler in this process: start the workers, after failing the jobs left running and queueing the jobs
+        left queued by a previous run, and the poller picking up the jobs queued since"""
+        with self._condition:
+            if (self._threads):
+                return(None)
+            dao = GenerationJobsDAO(DB())
+            interrupted = dao.fail_interrupted()
+            if (interrupted.modified_count):
+                logger.warning('Marked %s interrupted generation jobs as failed', interrupted.modified_count)
+            self._enqueue_queued(dao.read_by_status(JobStatus.QUEUED))
+            for w in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'generation-job-{w}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            thread = threading.Thread(target=self._poll, name='generation-job-poller', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    ## API ##
+
+    def submit(self, params: Params, user_oid: PyObjectId = None) -> PyObjectId:
+        """Queue a playlist generation, to be run by the process running the scheduler (see start)
+
+        Args:
+            params (Params): The request params
+            user_oid (PyObjectId, optional): The user the job is for. Defaults to the Spotify user's.
+
+        Raises:
+            ValueError: If the genre is not valid
+
+        Returns:
+            PyObjectId: The job id
+        """
+        if (not genre_is_valid(params.genre)):
+            raise ValueError(f"'{params.genre}' is not a valid genre.")
+
+        job = GenerationJob(user=user_oid or get_spotify_user().oid, params=params)
+        GenerationJobsDAO(DB()).create(job)
+        with self._condition:
+            # Else the poller of the process running the scheduler picks it up
+            if (self._threads):
+                self._enqueue(job.user, job.id)
+        logger.info('Queued generation job %s (%s)', job.id, params.genre)
+        return(job.id)
+
+    def status(self, job_id: str) -> Optional[GenerationJob]:
+        """Get a job, with its status and progress
+
+        Args:
+            job_id (str): The job id
+
+        Returns:
+            Optional[GenerationJob]: The job, None if there is none with the id
+        """
+        return(GenerationJobsDAO(DB()).read_by_id(job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. A running job stops at its next progress update
+
+        Args:
+            job_id (str): The job id
+
+        Returns:
+            bool: Was there an unfinished job to cancel?
+        """
+        dao = GenerationJobsDAO(DB())
+        job = dao.request_cancel(job_id)
+        if (job is None):
+            return(False)
+
+        with self._condition:
+            queue = self._queues.get(str(job.user))
+            if ((queue is not None) and (job.id in queue)):
+                queue.remove(job.id)
+                if (not queue):
+                    del self._queues[str(job.user)]
+                dao.finish(job.id, JobStatus.CANCELLED)
+                self._finished(job.id)
+            elif (job.id in self._cancel_events):
+                self._cancel_events[job.id].set()
+        logger.info('Cancelled generation job %s', job_id)
+        return(True)
+
+    def result(self, job_id: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Get the playlist url of a job, waiting for it to finish if it runs in this process
+
+        Args:
+            job_id (str): The job id
+            timeout (Optional[float], optional): Max seconds to wait. Defaults to None (no limit).
+
+        Raises:
+            ValueError: If there is no job with the id
+            JobFailedError: If the job failed
+            GenerationCancelled: If the job was cancelled
+
+        Returns:
+            Optional[str]: The playlist url, None if the job is not finished
+        """
+        done = self._done_events.get(PyObjectId(job_id))
+        if (done is not None):
+            done.wait(timeout)
+
+        job = self.status(job_id)
+        if (job is None):
+            raise ValueError(f"No generation job '{job_id}'.")
+        status = JOBSTATUSMAP.get(job.status)
+        if (status == JobStatus.FAILED):
+            raise JobFailedError(job.error)
+        if (status == JobStatus.CANCELLED):
+            raise GenerationCancelled(f'Generation job {job_id} was cancelled')
+        return(job.playlist_url)
+
+    ## WORKERS ##
+
+    def _enqueue(self, user_oid: PyObjectId, job_id: PyObjectId) -> None:
+        """Queue a job (hold the condition)"""
+        self._queues.setdefault(str(user_oid), deque()).append(job_id)
+        self._cancel_events[job_id] = threading.Event()
+        self._done_events[job_id]   = threading.Event()
+        self._condition.notify()
+
+    def _enqueue_queued(self, jobs: list[GenerationJob]) -> None:
+        """Queue the queued jobs read from the db which are not already queued or running here (hold the condition)"""
+        for job in jobs:
+            if (job.id not in self._cancel_events):
+                self._enqueue(job.user, job.id)
+
+    def _finished(self, job_id: PyObjectId) -> None:
+        """Let the waiters of a job know it is finished (hold the condition)"""
+        self._cancel_events.pop(job_id, None)
+        done = self._done_events.pop(job_id, None)
+        if (done is not None):
+            done.set()
+
+    def _pick(self) -> Optional[tuple[str, PyObjectId]]:
+        """Take the next job to run: the oldest job of the first user in turn who is under their running limit (hold the condition)
+
+        Returns:
+            Optional[tuple[str, PyObjectId]]: (user, job id), None if no job can run
+        """
+        for user, queue in self._queues.items():
+            if (self._running[user] >= self.max_running_per_user):
+                continue
+            job_id = queue.popleft()
+            if (queue):
+                # The user's next job waits for the other users' turn
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            self._running[user] += 1
+            return((user, job_id))
+        return(None)
+
+    def _poll(self) -> None:
+        """Poller loop: queue the jobs submitted by other processes"""
+        dao = GenerationJobsDAO(DB())
+        while True:
+            time.sleep(self.poll_interval_s)
+            try:
+                jobs = dao.read_by_status(JobStatus.QUEUED)
+            except Exception as e:
+                logger.warning('Could not read queued generation jobs: %s', e)
+                continue
+            with self._condition:
+                self._enqueue_queued(jobs)
+
+    def _work(self) -> None:
+        """Worker loop"""
+        while True:
+            with self._condition:
+                picked = self._pick()
+                while (picked is None):
+                    self._condition.wait()
+                    picked = self._pick()
+            user, job_id = picked
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error('Generation job %s could not be finished: %s', job_id, e)
+            finally:
+                with self._condition:
+                    self._running[user] -= 1
+                    if (not self._running[user]):
+                        del self._running[user]
+                    self._finished(job_id)
+                    # A job of this user may be able to run now
+                    self._condition.notify_all()
+
+    def _run(self, job_id: PyObjectId) -> None:
+        """Run a job, recording how it ended"""
+        dao = GenerationJobsDAO(DB())
+        job = dao.start(job_id)
+        if (job is None):
+            # Cancelled (possibly by another process) before it started
+            if (dao.request_cancel(job_id)):
+                dao.finish(job_id, JobStatus.CANCELLED)
+            return(None)
+
+        cancel   = self._cancel_events[job_id]
+        reporter = _ProgressReporter(job_id, cancel, self.progress_interval_s)
+        logger.info('Running generation job %s', job_id)
+        try:
+            with use_spotify_user(spotify_client_pool.get(job.user)):
+                req = PlaylistRequest.from_params(job.params)
+                dao.update(job_id, {'request': req.oid})
+                url = generate(req, reporter.report, cancel.is_set)
+            dao.finish(job_id, JobStatus.SUCCEEDED, playlist_url=url, progress=reporter.last)
+            logger.success('Generation job %s finished: %s', job_id, url)
+        except GenerationCancelled:
+            dao.finish(job_id, JobStatus.CANCELLED, progress=reporter.last)
+            logger.info('Generation job %s stopped (cancelled)', job_id)
+        except Exception as e:
+            dao.finish(job_id, JobStatus.FAILED, error=str(e), progress=reporter.last)
+            logger.error('Generation job %s failed: %s', job_id, e)
+
+job_scheduler = GenerationJobScheduler()
@@ -1,31 +1,74 @@
+import time
 import random
+import threading
 
 from numpy    import mean as mean
 from numpy    import ceil
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing   import Iterator, Callable, Optional, TypedDict
 
 from src.services._shared_classes.PlaylistRequest          import PlaylistRequest
-from src.services._shared_classes.Playlist                 import Playlist
 from src.services._shared_classes.Artist                   import Artist
+from src.services._shared_classes.Track                    import Track
 from src.services._shared_classes.Validator                import Validator, REASONMAP, ReasonExcluded
-from src.services.playlist_editor.spotify_recs             import get_recommendations
+from src.services.playlist_editor.spotify_recs             import get_recommendations_for_tracks
 from src.services.genre_handling.valid_genres              import genre_is_spotify
 from src.services.playlist_maker.utils.artists_count_check import average_valid_artists_pct
+from src.services.playlist_maker.utils.exclusion_filter    import ExclusionFilter
 
-from src.utils.util         import load_env, obj_array_to_obj, NICHEMAP, LANGMAP, MIN_SONGS_FOR_PLAYLIST_GEN
+from src.utils.util         import NICHEMAP, LANGMAP, MIN_SONGS_FOR_PLAYLIST_GEN
 from src.utils.spotify_util import NicheTrack, convert_spotify_track_to_niche_track
-from src.utils.logger       import logger
+from src.utils.logger       import logger, LogRollup
+from src.utils.pipeline     import StagedPipeline, Stage
+from src.utils.metrics      import timed_stage
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 
 from src.db.DB                         import DB
 from src.db.DAOs.ArtistsDAO            import ArtistsDAO
-from src.db.DAOs.RequestsCacheDAO      import RequestsCacheDAO
-from src.models.pydantic.RequestsCache import ParamsCache, Excluded
+from src.db.DAOs.ExclusionsDAO         import ExclusionsDAO
+from src.models.pydantic.RequestsCache import ParamsCache
+from src.models.pydantic.Exclusion     import Exclusion
+
+# How long an exclusion holds (after which the artist would Probably not still be excluded if checked again)
+ARTIST_EXCLUSION_TTL = timedelta(days=182)
+# Exclusions which hold for good: artists only get more popular, and don't change the language they sing in
+PERMANENT_EXCLUSION_REASONS = (ReasonExcluded.TOO_MANY_SOMETHING, ReasonExcluded.WRONG_LANGUAGE)
+
+# Number of workers for each stage of the generation pipeline
+#   MusicBrainz allows 1 request per second, so more language check workers would only wait on each other
+PIPELINE_WORKERS = {
+    'lastfm_screen'     : 4,
+    'spotify_resolution': 4,
+    'language_check'    : 2,
+    'track_validation'  : 2
+}
+
+class GenerationProgress(TypedDict):
+    """Progress snapshot of a generation
+
+    Args:
+        TypedDict
+    """
+    tracks_found   : int
+    tracks_target  : Optional[int]
+    artists_checked: int
+    artists_total  : Optional[int]
+    eta_secs       : Optional[float]
+
+class GenerationCancelled(Exception):
+    """The generation was stopped before it finished"""
 
-env    = load_env()
+class _Candidate:
+    """An artist which has passed the lastfm screen and has a spotify artist attached
 
-ARTIST_EXCLUDED_EARLIEST_DATE = datetime.today() - timedelta(days=182)
+    Attributes:
+        artist
+        tracks: The artist's lastfm top tracks, starting from the one the spotify artist was attached from
+    """
+    def __init__(self, artist: Artist, tracks: list[Track]) -> None:
+        self.artist = artist
+        self.tracks = tracks
 
 class NicheTrackFinder:
     """Niche Track Finder
@@ -33,67 +76,97 @@ class NicheTrackFinder:
     Attributes:
         request
         user
-        artistsDAO
-        requestsCacheDAO
-        requestsCacheOID
-        requests_cache
-        excluded_artists
+        exclusionsDAO
+        params: The params exclusions are kept for
+        excluded_artists: The artists excluded for the params, as of the start of the request
+        artists_checked: Number of artists screened in the current generation
+        rejections: Rolls up the rejected artists by reason for the logs
+        on_progress: Called with a progress snapshot as artists are checked and tracks are found (from the pipeline's threads)
+        should_stop: Polled during the generation, which is cancelled once it returns True
     """
-    def __init__(self, request: PlaylistRequest) -> None:
+    def __init__(self, request: PlaylistRequest, on_progress: Optional[Callable[[GenerationProgress], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None) -> None:
         """Initialize the finder
 
         Args:
             request (PlaylistRequest): The playlist request
+            on_progress (Optional[Callable[[GenerationProgress], None]], optional): Progress callback. Must be thread safe. Defaults to None.
+            should_stop (Optional[Callable[[], bool]], optional): Cancellation check. Defaults to None.
         """
-        self.request   = request
+        self.request     = request
+        self.on_progress = on_progress
+        self.should_stop = should_stop or (lambda: False)
 
         db                    = DB()
 
         self.validator        = Validator(request)
-        # NTF Can own its own requests cache dao
-        self.requestsCacheDAO = RequestsCacheDAO(db)
-
-        # Create an entry in requests cache for params if it doesnt exist
-        self.requests_cache = self.requestsCacheDAO.create_if_not_exists(
-            ParamsCache(
-                language    = LANGMAP.inv.get(self.request.language),
-                genre       = self.request.genre,
-                niche_level = NICHEMAP.inv.get(self.request.niche_level)
-            )
+        # NTF Can own its own exclusions dao
+        self.exclusionsDAO    = ExclusionsDAO(db)
+        self.params           = ParamsCache(
+            language    = LANGMAP.inv.get(self.request.language),
+            genre       = self.request.genre,
+            niche_level = NICHEMAP.inv.get(self.request.niche_level)
         )
-        # Get the id of the entry and a reference of the entry
-        try:
-            self.requestsCacheOID = self.requests_cache.inserted_id
-            self.requests_cache = self.requestsCacheDAO.read_by_id(self.requestsCacheOID)
-        except Exception:
-            self.requestsCacheOID = self.requests_cache.id
-        
-        # Create a lookup for excluded artists so we don't have to query the db
-        self.excluded_artists = obj_array_to_obj([excl.model_dump(by_alias=True) for excl in self.requests_cache.excluded], 'mbid')
 
-    def _fetch_artists_from_musicbrainz(self) -> list[Artist]:
-        """Get artists from musicbrainz in the requested genre"""
+        # Create a lookup for excluded artists so we don't have to query the db per artist
+        self.excluded_artists = self._load_exclusions()
+        # New exclusions and artist metrics, written a chunk at a time (see _flush_writes)
+        self._pending_exclusions: dict[str, Exclusion] = {}
+        self._pending_metrics   : dict[str, dict[str, any]] = {}
+        self._writes_lock = threading.Lock()
+
+        self.artists_checked = 0
+        self._progress_lock  = threading.Lock()
+        self._tracks_found   = 0
+        self._tracks_target  = None
+        self._artists_total  = None
+        self._started_at     = time.monotonic()
+        self._pipeline       = None
+        # Rejected artists are summarized periodically rather than logged one by one
+        self.rejections      = LogRollup('Artists rejected')
+
+    def _fetch_artists_from_musicbrainz(self, chunk_size: int = 25) -> Iterator[list[Artist]]:
+        """Lazily get artists from musicbrainz in the requested genre, in random order and in chunks"""
         try:
-            artist_list = []
-            db                    = DB()
-            artistsDAO            = ArtistsDAO(db)
-            artists = artistsDAO.get_artists_in_genre(self.request.genre)
-            
-            for artist in artists:
-                try:
-                    a = Artist.from_musicbrainz(artist)
-                    if a:
-                        artist_list.append(a)
-                except Exception as e:
-                    logger.error(f"Could not create artist: {e}")
-            return(artist_list)
+            db         = DB()
+            artistsDAO = ArtistsDAO(db)
+            # Artists whose stored metrics put them outside the request's band are skipped by the db
+            chunks     = artistsDAO.iter_artist_chunks_in_genre(self.request.genre, chunk_size, self.request.metrics_band())
+            while True:
+                with timed_stage('mb_artist_fetch'):
+                    artists = next(chunks, None)
+                    if (artists is None):
+                        break
+                    artist_list = []
+                    for artist in artists:
+                        try:
+                            a = Artist.from_musicbrainz(artist)
+                            if a:
+                                artist_list.append(a)
+                        except Exception as e:
+                            logger.error('Could not create artist: %s', e)
+                yield(artist_list)
 
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return([])
-        
+            logger.error('Unexpected error: %s', e)
+
+    def _count_artists_from_musicbrainz(self) -> int:
+        """Count the artists in the requested genre which may be valid for the request"""
+        return(ArtistsDAO(DB()).count_artists_in_genre(self.request.genre, self.request.metrics_band()))
+
+    def _load_exclusions(self) -> ExclusionFilter:
+        """Load the mbids excluded for the request params, with one query"""
+        try:
+            excluded = ExclusionFilter(self.exclusionsDAO.read_mbids(self.params.key()))
+        except Exception as e:
+            # The artists are checked again
+            logger.warning('Could not read exclusions: %s', e)
+            excluded = ExclusionFilter()
+        logger.debug('Loaded %s exclusions (%s bytes)', len(excluded), excluded.nbytes)
+        return(excluded)
+
     def _artist_cached_invalid(self, artist: Artist) -> bool:
-        """Check the previously excluded artists to check if the artist has been previously excluded within the correct timeframe or for the right reason
+        """Check if the artist has been excluded for the request params, and the exclusion still holds (see ARTIST_EXCLUSION_TTL)
 
         Args:
             artist (Artist): The artist to check
@@ -101,55 +174,88 @@ class NicheTrackFinder:
         Returns:
             bool: Were they excluded?
         """
-        artist_cached_entry = self.excluded_artists.get(artist.mbid, None)
-
-        # If the artist has been cached for this request as invalid 
-        #   AND (either they were excluded within the heuristic timeframe (where they would Probably still be excluded if checked again) OR
-        #        they were excluded for being too popular OR for not singing in the requested language)
-        #   then they are still invalid
-        if (
-            (artist_cached_entry) and (
-                (artist_cached_entry.get('date_excluded') > ARTIST_EXCLUDED_EARLIEST_DATE) or
-                (
-                    (artist_cached_entry.get('reason_excluded') == REASONMAP.get(ReasonExcluded.TOO_MANY_SOMETHING)) or
-                    (artist_cached_entry.get('reason_excluded') == REASONMAP.get(ReasonExcluded.WRONG_LANGUAGE))
-                )
-            )
-        ):
-            return(True)
-        
-        return(False)
+        # Stale exclusions are expired by the db
+        return(artist.mbid in self.excluded_artists)
 
-    def _create_excluded_object(self, artist: Artist, reason: ReasonExcluded) -> Excluded:
-        """Create an Excluded object
+    def _create_excluded_object(self, artist: Artist, reason: ReasonExcluded) -> Exclusion:
+        """Create an Exclusion object
 
         Args:
             artist (Artist): The artist to exclude
             reason (ReasonExcluded): The reason to exclude them
 
         Returns:
-            Excluded: The Excluded object
+            Exclusion: The Exclusion object
         """
-        return (Excluded(
+        date_excluded = datetime.now(timezone.utc)
+        return (Exclusion(
+            params_key=self.params.key(),
+            params=self.params,
             name=artist.name,
             mbid=artist.mbid,
-            reason_excluded=REASONMAP.get(reason)
+            reason_excluded=REASONMAP.get(reason),
+            date_excluded=date_excluded,
+            expires_at=None if (reason in PERMANENT_EXCLUSION_REASONS) else date_excluded + ARTIST_EXCLUSION_TTL
         ))
     
     def _add_excluded_entry(self, artist: Artist, reason: ReasonExcluded) -> None:
-        """Add an entry in requests cache for the artist
+        """Add an exclusion for the artist (written with the chunk's other exclusions, see _flush_writes)
 
         Args:
             artist (Artist): The artist
             reason (ReasonExcluded): Reason excluded
         """
-        self.requestsCacheDAO.check_and_update_or_add_excluded(
-            cache_id=self.requestsCacheOID,
-            excluded=self._create_excluded_object(artist, reason)
-        )
+        self.rejections.add(REASONMAP.get(reason))
+        exclusion = self._create_excluded_object(artist, reason)
+        with self._writes_lock:
+            self._pending_exclusions[artist.mbid] = exclusion
+
+    def _add_artist_metrics(self, artist: Artist, fields: dict[str, any]) -> None:
+        """Add metrics to store on the artist's document (written with the chunk's other metrics, see _flush_writes)
+
+        Args:
+            artist (Artist): The artist
+            fields (dict[str, any]): The fields to set
+        """
+        with self._writes_lock:
+            self._pending_metrics.setdefault(artist.mbid, {}).update(fields)
+
+    def _add_lastfm_metrics(self, artist: Artist) -> None:
+        """Store the metrics of an artist who was checked with lastfm, so the next requests can check them without it"""
+        if ((artist.metrics_stored) or (not getattr(artist, 'lastfm_artist', None))):
+            return(None)
+        try:
+            metrics = artist.get_lastfm_metrics()
+        except Exception as e:
+            logger.warning('Could not get the metrics of %s: %s', artist.name, e)
+            return(None)
+        # The spotify metrics are reset along with the lastfm ones, so all of them are as of metrics_updated_at
+        fields = {f'metrics.{key}': value for key, value in metrics.items()}
+        fields['metrics_updated_at'] = datetime.now(timezone.utc)
+        self._add_artist_metrics(artist, fields)
+
+    def _flush_writes(self) -> None:
+        """Write the new exclusions and artist metrics, with one bulk write each"""
+        with self._writes_lock:
+            exclusions = list(self._pending_exclusions.values())
+            metrics    = self._pending_metrics
+            self._pending_exclusions = {}
+            self._pending_metrics    = {}
+        try:
+            self.exclusionsDAO.upsert_many(exclusions)
+        except Exception as e:
+            logger.warning('Could not write %s exclusions: %s', len(exclusions), e)
+        try:
+            ArtistsDAO(DB()).update_metrics_many(metrics)
+        except Exception as e:
+            logger.warning('Could not write the metrics of %s artists: %s', len(metrics), e)
 
     def _add_from_recs(self, curr_tracks: list[NicheTrack], num_tracks: int) -> bool:
-        """Fill the playlist up with spotify recs"""
+        """Fill the playlist up with spotify recs (recommendations are made from the tracks in memory, nothing is written to spotify)"""
+        with timed_stage('recommendation_fill'):
+            return(self._add_from_recs_untimed(curr_tracks, num_tracks))
+
+    def _add_from_recs_untimed(self, curr_tracks: list[NicheTrack], num_tracks: int) -> bool:
         FETCH_SIZES  = 6
         max_attempts = 16
         min_size     = self.request.playlist_min_length - len(curr_tracks)
@@ -160,35 +266,30 @@ class NicheTrackFinder:
         if (max_size - min_size < 1):
             return(True)
 
-        # Create playlist object to facilitate recommendations
-        pl = Playlist(curr_tracks, self.request)
-
         attempt = 1
         # Get recommendations (valid ones that can be added to the playlist right away)
-        # Add them to the list, as well as the playlist to be considered for random artist seed
-        # max 10 attempts
+        # Add them to the list, to be considered for random artist seed and duplicates in the next attempts
+        # max 16 attempts
         while added_num < max_size and attempt <= max_attempts:
-            recs = get_recommendations(pl.url, min(FETCH_SIZES, max_size - added_num))
-            for track in recs:
+            recs = get_recommendations_for_tracks(curr_tracks + added, self.request, min(FETCH_SIZES, max_size - added_num))
+            rec_niche_tracks: list[NicheTrack] = [convert_spotify_track_to_niche_track(track) for track in recs]
+            # One request for all the rec artists' followers
+            rec_artists = get_spotify_user().get_spotify_artists_by_ids([niche_track.get('artist_spotify_id', '') for niche_track in rec_niche_tracks])
+            for niche_track in rec_niche_tracks:
                 if(added_num >= max_size):
                     break
-                niche_track: NicheTrack = convert_spotify_track_to_niche_track(track)
 
-                artist           = spotify_user.execute('artist', niche_track.get('artist_spotify_id', None))
+                artist           = rec_artists.get(niche_track.get('artist_spotify_id', ''), {})
                 artist_followers = artist.get('followers', {}).get('total', 0)
 
-                logger.success(f'Adding track {niche_track.get('track', '')} by {niche_track.get('artist', '')} from spotify recommendations')
+                logger.success('Adding track %s by %s from spotify recommendations', niche_track.get('track', ''), niche_track.get('artist', ''))
 
                 self.request.update_stats(new_track_artist_followers=artist_followers, previous_num_tracks=len(curr_tracks) + len(added))
                 added.append(niche_track)
                 added_num += 1
-                pl.add_track(niche_track)
 
             attempt += 1
 
-        # Delete all traces of playlist created to interface with get_recommendations
-        pl.delete()
-
         if(added_num < min_size):
             return(False)
         else:
@@ -196,6 +297,33 @@ class NicheTrackFinder:
             curr_tracks.extend(added)
             return(True)
 
+    def _artist_valid_lastfm(self, artist: Artist) -> bool:
+        """Check the artist against the cache and the lastfm checks, adding an excluded entry if needed
+
+        Args:
+            artist (Artist): The artist
+
+        Returns:
+            bool: Is the artist valid?
+        """
+        # Check if artist is invalid in cache
+        if (self._artist_cached_invalid(artist)):
+            logger.debug('Artist %s has been previously cached as invalid for this request', artist.name)
+            self.rejections.add('Previously excluded')
+            return(False)
+
+        # Check if artist is excluded
+        excluded_reason = self.validator.artist_excluded_reason_lastfm(artist)
+        self._add_lastfm_metrics(artist)
+        if ((excluded_reason) and (excluded_reason != ReasonExcluded.OTHER)):
+            self._add_excluded_entry(artist, excluded_reason)
+            return(False)
+        # For other, it may be an error or something we dont want to put a excluded entry for
+        elif (excluded_reason):
+            self.rejections.add('Other')
+            return(False)
+        return(True)
+
     def fetch_valid_artists(self, artists: list[Artist]) -> list[Artist]:
         """From the list of artists, return the valid ones for the request
 
@@ -205,37 +333,128 @@ class NicheTrackFinder:
         Returns:
             list[Artist]: The valid list
         """
-        valid_artists: list[Artist] = []
-        for artist in artists:
-            # Check if artist is invalid in cache
-            if (not artist):
-                continue
-            elif (self._artist_cached_invalid(artist)):
-                logger.error(f'Artist {artist.name} has been previously cached as invalid for this request')
-                continue
-            else:
-                # Check if artist is excluded
-                excluded_reason = self.validator.artist_excluded_reason_lastfm(artist)
-                if ((excluded_reason) and (excluded_reason != ReasonExcluded.OTHER)):
-                    self._add_excluded_entry(artist, excluded_reason)
-                    continue
-                # For other, it may be an error or something we dont want to put a excluded entry for
-                elif (excluded_reason):
-                    continue
-                else:
-                    valid_artists.append(artist)
+        valid_artists: list[Artist] = [artist for artist in artists if (artist and self._artist_valid_lastfm(artist))]
         random.shuffle(valid_artists)
         return(valid_artists)
 
+    ## GENERATION PIPELINE STAGES ##
+    # Each stage takes the output of the previous one and returns None to drop the artist
+
+    @staticmethod
+    def _timed(name: str, fn: Callable[[any], any]) -> Callable[[any], any]:
+        """Time each call of a stage function as an item of the stage (see metrics)"""
+        def timed(item: any) -> any:
+            with timed_stage(name):
+                return(fn(item))
+        return(timed)
+
+    def _stage_lastfm_screen(self, artist: Artist) -> Artist | None:
+        """Stage 1: Screen the artist with lastfm stats"""
+        valid = self._artist_valid_lastfm(artist)
+        with self._progress_lock:
+            self.artists_checked += 1
+        self._report_progress()
+        return(artist if (valid) else None)
+
+    def _stage_spotify_resolution(self, artist: Artist) -> _Candidate | None:
+        """Stage 2: Attach the spotify artist from the artist's lastfm top tracks and check spotify stats"""
+        top_tracks = artist.get_artist_top_tracks_lastfm()
+        # One track index query for all of them, spotify is only searched for the tracks not in it
+        Track.prefetch_spotify_resolutions(top_tracks)
+        for i, track in enumerate(top_tracks):
+            # Get the spotify artist from the lastfm top tracks (so that we decrease the chance of getting the wrong artist from name search alone)
+            if (not self.validator.attached_spotify_artist_from_track(artist, track)):
+                continue
+            self._add_artist_metrics(artist, {'metrics.spotify_id': artist.spotify_artist_id, 'metrics.spotify_followers': artist.spotify_followers})
+            # Discard artist if excluded by spotify metrics
+            artist_exclusion_spotify = self.validator.artist_excluded_reason_spotify(artist)
+            if ((artist_exclusion_spotify) and (artist_exclusion_spotify != ReasonExcluded.OTHER)):
+                self._add_excluded_entry(artist, artist_exclusion_spotify)
+                return(None)
+            # Tracks before this one could not be found on spotify
+            return(_Candidate(artist, top_tracks[i:]))
+        return(None)
+
+    def _stage_language_check(self, candidate: _Candidate) -> _Candidate | None:
+        """Stage 3: Check the artist sings in the requested language"""
+        artist_exclusion_language = self.validator.artist_excluded_language(candidate.artist)
+        if (artist_exclusion_language):
+            self._add_excluded_entry(candidate.artist, artist_exclusion_language)
+            return(None)
+        return(candidate)
+
+    def _stage_track_validation(self, candidate: _Candidate) -> tuple[NicheTrack, int] | None:
+        """Stage 4: Find the first of the artist's top tracks which is valid for the request
+
+        Returns:
+            tuple[NicheTrack, int] | None: The track and the artist's follower count
+        """
+        artist = candidate.artist
+        for track in candidate.tracks:
+            try:
+                # Attach the track's spotify information
+                track.attach_spotify_track_information(artist.spotify_artist_id)
+                logger.info('Attached spotify track info for %s', track.name)
+
+                # Ensure track length and type valid
+                if (self.validator.validate_track(track)):
+                    niche_track: NicheTrack = {
+                        'artist'             : artist.name,
+                        'artist_spotify_id'  : artist.spotify_artist_id,
+                        'track'              : track.name,
+                        'spotify_uri'        : track.spotify_uri,
+                        'spotify_url'        : track.spotify_url,
+                    }
+                    return((niche_track, artist.spotify_followers))
+            except Exception as e:
+                logger.error('Error processing tracks for artist %s: %s', artist.name, e)
+                continue
+        return(None)
+
+    def _iter_artists(self, artist_chunks: Iterator[list[Artist]]) -> Iterator[Artist]:
+        """Feed the artists to the pipeline, one random chunk at a time, stopping it if the generation is cancelled.
+        The exclusions and artist metrics gathered so far are written before each chunk"""
+        for i, artists in enumerate(artist_chunks):
+            logger.info('Checking chunk %s', i)
+            self._flush_writes()
+            # One query for the chunk's lastfm lookup keys
+            Artist.prefetch_lastfm_lookups(artists)
+            for artist in artists:
+                if (self.should_stop()):
+                    self._pipeline.stop()
+                    return(None)
+                yield(artist)
+
+    def _report_progress(self) -> None:
+        """Pass a progress snapshot to the progress callback, if any"""
+        if (self.on_progress is None):
+            return(None)
+        with self._progress_lock:
+            artists_checked = self.artists_checked
+            tracks_found    = self._tracks_found
+        eta_secs = None
+        if (tracks_found and self._tracks_target):
+            eta_secs = round((time.monotonic() - self._started_at) * max(self._tracks_target - tracks_found, 0) / tracks_found, 1)
+        self.on_progress({
+            'tracks_found'   : tracks_found,
+            'tracks_target'  : self._tracks_target,
+            'artists_checked': artists_checked,
+            'artists_total'  : self._artists_total,
+            'eta_secs'       : eta_secs
+        })
+
     def find_niche_tracks(self) -> list[NicheTrack]:
         """Make the playlist
 
+        Artists are validated by a pipeline of stages (lastfm screen, spotify resolution, language check, track validation),
+        each with its own worker pool, so that many artists are in flight across the different services at once.
+
+        Raises:
+            GenerationCancelled: If should_stop returned True before the generation finished
+
         Returns:
             list[NicheTrack]: List of niche tracks
         """
-        artists_song_count = {}
-        artist_max_songs = 1
-
         # TODO - explain - here - do expls and docs for scripts then merge branch and onto middlewares / frontend / frontend learning
         desired_valid_artists_multiple_of_min_len = 5
 
@@ -247,7 +466,7 @@ class NicheTrackFinder:
 
         artist_increment_count = 25
 
-        artists_list = self._fetch_artists_from_musicbrainz()
+        artists_count = self._count_artists_from_musicbrainz()
 
         # TODO - explain
         if (not genre_is_spotify(self.request.genre)):
@@ -259,7 +478,7 @@ class NicheTrackFinder:
             else:
                 valid_pct_av = previous_valid_pcts
             
-            expected_num_artists_valid = len(artists_list) * (valid_pct_av/100)
+            expected_num_artists_valid = artists_count * (valid_pct_av/100)
             # 100 - dsc = 20, sc = 1
             # 50  - dsc = 10, sc = .5
             # 25  - dsc = 5, sc = .25
@@ -269,99 +488,66 @@ class NicheTrackFinder:
             desired_song_count_from_mb_artists = max(int(ceil(self.request.playlist_min_length * rep_song_scalar) + 0.00001), MIN_SONGS_FOR_PLAYLIST_GEN)
 
 
-        # Using list comprehension with padding to split into groups of 25
-        artists_sublists = [artists_list[i:i+artist_increment_count] if len(artists_list[i:i+artist_increment_count]) == artist_increment_count else artists_list[i:i+artist_increment_count] + [None]*(artist_increment_count - len(artists_list[i:i+artist_increment_count])) for i in range(0, len(artists_list), artist_increment_count)]
-        # Generate random offsets of artists to search
-        offsets_list = list(range(0, len(artists_sublists)))
-        random.shuffle(offsets_list)
+        self.artists_checked = 0
+        self._tracks_found   = 0
+        self._tracks_target  = desired_song_count_from_mb_artists
+        self._artists_total  = artists_count
+        self._started_at     = time.monotonic()
+        self._pipeline = pipeline = StagedPipeline([
+            Stage(name, self._timed(name, fn), workers=PIPELINE_WORKERS[name]) for name, fn in [
+                ('lastfm_screen',      self._stage_lastfm_screen),
+                ('spotify_resolution', self._stage_spotify_resolution),
+                ('language_check',     self._stage_language_check),
+                ('track_validation',   self._stage_track_validation)
+            ]
+        ])
+
+        # Artists are streamed from the db in random chunks of 25 as the pipeline takes them
+        results = pipeline.run(self._iter_artists(self._fetch_artists_from_musicbrainz(artist_increment_count)))
+        try:
+            for niche_track, artist_followers in results:
+                niche_tracks.append(niche_track)
 
-        for i in range(len(offsets_list)):
-            if(len(niche_tracks) >= desired_song_count_from_mb_artists):
-                break
+                # Update variables related to the generation
+                with self._progress_lock:
+                    self._tracks_found    = len(niche_tracks)
+                    percent_artists_valid = (len(niche_tracks) / max(self.artists_checked, 1)) * 100
+                self._report_progress()
 
-            logger.info(f'artists checked: {i * artist_increment_count}')
+                # Update the stats of the request
+                self.request.update_stats(new_track_artist_followers=artist_followers, previous_num_tracks=len(niche_tracks)-1)
 
-            # Get random subset of artists
-            random_offset = offsets_list[i]
-            artists: list[Artist] = artists_sublists[random_offset]
+                logger.success('ADDED NICHE TRACK: %s - %s', niche_track['artist'], niche_track['track'],
+                               extra={'fields': {'tracks_added': len(niche_tracks), 'percent_artists_valid': percent_artists_valid}})
+                logger.success('TRACKS ADDED: %s', len(niche_tracks))
+                logger.success('RATIO: %s%%', percent_artists_valid)
 
-            logger.info(f'Checking offset {random_offset} of {len(offsets_list)}')
+                if ((len(niche_tracks) >= desired_song_count_from_mb_artists) or (self.should_stop())):
+                    break
+        finally:
+            # Stops the workers still in flight
+            results.close()
+            self._flush_writes()
+            self.rejections.flush()
 
-            valid_artists = self.fetch_valid_artists(artists)
+        logger.info('artists checked: %s', self.artists_checked)
 
-            for artist in valid_artists:
-                if(len(niche_tracks) >= desired_song_count_from_mb_artists):
-                    break
+        if (self.should_stop()):
+            self.request.flush_stats()
+            raise GenerationCancelled(f'Cancelled after {len(niche_tracks)} tracks')
 
-                # Check the artist's top tracks
-                top_tracks = artist.get_artist_top_tracks_lastfm()
-                for track in top_tracks:
-                    # Enough tracks or max tracks for artist
-                    if (len(niche_tracks) >= self.request.playlist_min_length) or (artists_song_count.get(artist.mbid, 0) >= artist_max_songs):
-                        logger.warning('Playlist or artist song count reached')
-                        break
-                    try:
-                        # Get the spotify artist from the lastfm top tracks (so that we decrease the chance of getting the wrong artist from name search alone)
-                        # Attach the spotify artist from the track and ensure it was attached
-                        if (self.validator.attached_spotify_artist_from_track(artist, track)):
-                            # Discard artist if excluded by spotify metrics
-                            # I know this runs for every track but I attach the artist from the track and I'm not setting globals:)
-                            artist_exclusion_spotify = self.validator.artist_excluded_reason_spotify(artist)
-                            artist_exclusion_language = self.validator.artist_excluded_language(artist)
-                            if ((artist_exclusion_spotify) and (artist_exclusion_spotify != ReasonExcluded.OTHER)):
-                                self._add_excluded_entry(artist, artist_exclusion_spotify)
-                                break
-                            elif (artist_exclusion_language):
-                                self._add_excluded_entry(artist, artist_exclusion_language)
-                                break
-                            else:
-                                # Artist is valid. If it was previously excluded  delete that entry
-                                self.requestsCacheDAO.delete_excluded_entry(self.requestsCacheOID, artist.mbid)
-
-                            # Attach the track's spotify information
-                            track.attach_spotify_track_information(artist.spotify_artist_id)
-                            logger.info(f'Attached spotify track info for {track.name}')
-                            
-                            # Ensure track length and type valid
-                            if (self.validator.validate_track(track)):
-                                # Add track to niche_tracks
-                                niche_track: NicheTrack = {
-                                    'artist'             : artist.name,
-                                    'artist_spotify_id'  : artist.spotify_artist_id,
-                                    'track'              : track.name,
-                                    'spotify_uri'        : track.spotify_uri,
-                                    'spotify_url'        : track.spotify_url,
-                                }
-                                niche_tracks.append(niche_track)
-
-                                # Update variables related to the generation
-                                artists_song_count[artist.mbid] = artists_song_count.get(artist.mbid, 0) + 1
-                                artist_followers = artist.spotify_followers
-                                percent_artists_valid = (len(niche_tracks) / ((i + 1) * artist_increment_count)) * 100
-
-                                # Update the stats of the request
-                                self.request.update_stats(new_track_artist_followers=artist_followers, previous_num_tracks=len(niche_tracks)-1)
-
-                                logger.success(f"ADDED NICHE TRACK: {artist.name} - {track.name}")
-                                logger.success(f"TRACKS ADDED: {len(niche_tracks)}")
-                                logger.success(f"RATIO: {percent_artists_valid}%")
-
-                    except Exception as e:
-                        logger.error(f"Error processing tracks for artist {artist.name}: {e}")
-                        continue
-
-        # Update the valid percent stat of the request
+        # Update the valid percent stat of the request, and write the stats kept so far
         self.request.update_stats(percent_artists_valid_new_val=percent_artists_valid)
+        self.request.flush_stats()
 
         # If not enough songs to extend playlist raise an error, else try to extend the playlist. If that doesnt work, throw an error
         if (len(niche_tracks) < MIN_SONGS_FOR_PLAYLIST_GEN):
             raise Exception("Not enough songs")
         else:
-            logger.info(f'Playlist length {len(niche_tracks)}, fetching from spotify recommendations')
-            if(not self._add_from_recs(niche_tracks, self.request.playlist_max_length - len(niche_tracks))):
+            logger.info('Playlist length %s, fetching from spotify recommendations', len(niche_tracks))
+            added = self._add_from_recs(niche_tracks, self.request.playlist_max_length - len(niche_tracks))
+            self.request.flush_stats()
+            if(not added):
                 raise Exception("Not enough songs")
 
         return(niche_tracks)
-    
-            
-
@@ -1,10 +1,15 @@
 import time
 
-from src.services.playlist_maker.NicheTrackFinder          import NicheTrackFinder
+from typing import Callable, Optional
+
+from src.services.playlist_maker.NicheTrackFinder          import NicheTrackFinder, GenerationProgress
 from src.services.playlist_maker.utils.artists_count_check import likely_under_count_playlist
 from src.services._shared_classes.PlaylistRequest          import PlaylistRequest, Language, NicheLevel
 from src.services._shared_classes.Playlist                 import Playlist
 
+from src.utils.metrics import GenerationMetrics, collect_metrics, timed_stage
+from src.utils.logger  import logger
+
 from src.auth.SpotifyUser import spotify_user
 
 from config.personal_init import token
@@ -23,11 +28,38 @@ def do(year_min: int, language: Language, niche_level: NicheLevel, sec_min: int,
     Returns:
         str: Playlist url
     """
-    t0     = time.time()
-    req    = PlaylistRequest(year_min, language, niche_level, sec_min, sec_max, genre, True)
-    finder = NicheTrackFinder(req)
-    songs  = finder.find_niche_tracks()
-    pl     = Playlist(songs, req)
+    return(generate(PlaylistRequest(year_min, language, niche_level, sec_min, sec_max, genre, True)))
+
+def generate(req: PlaylistRequest, on_progress: Optional[Callable[[GenerationProgress], None]] = None,
+             should_stop: Optional[Callable[[], bool]] = None) -> str:
+    """Generate the playlist for a request (in the db), return the url
+
+    Args:
+        req (PlaylistRequest): The request
+        on_progress (Optional[Callable[[GenerationProgress], None]], optional): Progress callback (see NicheTrackFinder). Defaults to None.
+        should_stop (Optional[Callable[[], bool]], optional): Cancellation check (see NicheTrackFinder). Defaults to None.
+
+    Raises:
+        GenerationCancelled: If should_stop returned True before the playlist was made
+
+    Returns:
+        str: Playlist url
+    """
+    t0      = time.time()
+    metrics = GenerationMetrics()
+    try:
+        with collect_metrics(metrics):
+            finder = NicheTrackFinder(req, on_progress, should_stop)
+            songs  = finder.find_niche_tracks()
+            with timed_stage('playlist_write'):
+                pl = Playlist(songs, req)
+    finally:
+        # Failed and cancelled generations too, they are the ones to look into
+        if (req.in_db):
+            try:
+                req.record_metrics(metrics)
+            except Exception as e:
+                logger.warning('Could not record the metrics of request %s: %s', req.oid, e)
     t1     = time.time()
     total  = (t1-t0)/60
     pl.add_generated_time(total)
@@ -57,8 +57,8 @@ def likely_under_count_playlist(request: PlaylistRequest, size: int = MIN_SONGS_
 
     adao = ArtistsDAO(db)
 
-    # Get artists in the genre
-    artists_count = adao.count_artists_in_genre(request.genre)
+    # Get artists in the genre (which may be valid for the request)
+    artists_count = adao.count_artists_in_genre(request.genre, request.metrics_band())
 
     avg = average_valid_artists_pct(request) / 100
 
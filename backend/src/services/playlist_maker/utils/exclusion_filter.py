@@ -0,0 +1,31 @@
+from array  import array
+from bisect import bisect_left
+from typing import Iterable
+
+class ExclusionFilter:
+    """Compact, read only set of the mbids excluded for a request: a sorted array of their 64 bit hashes, so 8 bytes
+    an mbid (vs a few hundred for a dict of exclusion dicts), with a binary search per lookup.
+
+    Two mbids with the same hash make a false positive (an artist skipped as excluded), which at 64 bits is negligible
+    (~n / 2^64 per lookup). Hashes are salted per process, so a filter can't be shared between processes.
+    """
+    def __init__(self, mbids: Iterable[str] = ()) -> None:
+        """Build the filter
+
+        Args:
+            mbids (Iterable[str], optional): The excluded mbids (e.g. streamed from a cursor). Defaults to ().
+        """
+        self._hashes = array('q', sorted(map(hash, mbids)))
+
+    def __contains__(self, mbid: str) -> bool:
+        h = hash(mbid)
+        i = bisect_left(self._hashes, h)
+        return((i < len(self._hashes)) and (self._hashes[i] == h))
+
+    def __len__(self) -> int:
+        return(len(self._hashes))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the hashes in bytes"""
+        return(self._hashes.itemsize * len(self._hashes))
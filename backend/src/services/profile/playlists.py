@@ -5,7 +5,7 @@ from src.db.DAOs.PlaylistsDAO import PlaylistDAO
 
 from src.models.pydantic.Playlist import Playlist
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 
 from src.utils.spotify_util import NicheTrack, extract_id
 
@@ -34,7 +34,7 @@ def get_playlist_tracks(playlist_link: str) -> List[NicheTrack]:
     
     # Step 2: Retrieve All Tracks from the Playlist
     try:
-        tracks = spotify_user.fetch_all_playlist_tracks(playlist_id)
+        tracks = get_spotify_user().fetch_all_playlist_tracks(playlist_id)
     except Exception as e:
         print(f"Error fetching playlist tracks: {e}")
         return []
@@ -71,7 +71,7 @@ def get_generated_playlists() -> list[Playlist]:
         list[Playlist]: The playlists
     """
     
-    return(PlaylistDAO(DB()).read_by_user(user_id=spotify_user.oid))
+    return(PlaylistDAO(DB()).read_by_user(user_id=get_spotify_user().oid))
 
 if __name__ == '__main__':
     print(len(get_generated_playlists()))
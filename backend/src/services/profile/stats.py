@@ -4,7 +4,7 @@ from src.db.DAOs.PlaylistsDAO import PlaylistDAO
 
 from src.models.pydantic.Request import Request
 
-from src.auth.SpotifyUser import spotify_user
+from src.auth.SpotifyUser import get_spotify_user
 
 def get_requests() -> list[Request]:
     """Get all requests generated by a user
@@ -15,7 +15,7 @@ def get_requests() -> list[Request]:
     
     return(RequestDAO(DB()).read_all(
         {
-            'user': spotify_user.oid
+            'user': get_spotify_user().oid
         }
     ))
 
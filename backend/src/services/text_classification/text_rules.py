@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing  import TypedDict, Iterable
+from types   import MappingProxyType
+
+import re
+import json
+
+# Specify the path to your JSON file
+file_path = Path('src/services/text_classification/rules.json')
+
+class TextRuleDict(TypedDict):
+    description: str
+    anchored   : bool
+    max_chars  : int
+    pattern    : str
+    terms      : dict[str, list[str]]
+
+def _term_pattern(terms: list[str]) -> str:
+    """Alternation matching any of the terms literally (whitespace matches any whitespace)
+
+    Args:
+        terms (list[str]): The terms
+
+    Returns:
+        str: The pattern
+    """
+    # Longest first so the alternation doesn't have to backtrack from a shorter prefix
+    ordered = sorted(set(terms), key=len, reverse=True)
+    return('(?:' + '|'.join(r'\s+'.join(re.escape(word) for word in term.split()) for term in ordered) + ')')
+
+class TextRule:
+    """A text classifier compiled from a rule in rules.json
+
+    Attributes:
+        name
+        anchored: Only match at the start of the (stripped) text
+        max_chars: Only look at this many characters of the text (0 for all of it)
+        regex: Compiled pattern
+    """
+    __slots__ = ('name', 'anchored', 'max_chars', 'regex')
+
+    def __init__(self, name: str, rule: TextRuleDict) -> None:
+        """Compile the rule
+
+        Args:
+            name (str): Rule name
+            rule (TextRuleDict): Rule as in rules.json. {term_list} in the pattern is replaced with an alternation of its terms
+        """
+        terms          = {term_list: _term_pattern(values) for term_list, values in rule.get('terms', {}).items()}
+        self.name      = name
+        self.anchored  = rule.get('anchored', False)
+        self.max_chars = rule.get('max_chars', 0)
+        self.regex     = re.compile(rule['pattern'].format(**terms), re.IGNORECASE)
+
+    def matches(self, text: str) -> bool:
+        """Does the text match the rule
+
+        Args:
+            text (str): Text to classify
+
+        Returns:
+            bool: Does it?
+        """
+        if (not text):
+            return(False)
+        if (self.anchored):
+            text = text.lstrip()
+        if (self.max_chars):
+            text = text[:self.max_chars]
+        if (self.anchored):
+            return(self.regex.match(text) is not None)
+        return(self.regex.search(text) is not None)
+
+    def matches_many(self, texts: Iterable[str]) -> list[bool]:
+        """Classify many texts
+
+        Args:
+            texts (Iterable[str]): Texts to classify
+
+        Returns:
+            list[bool]: Whether each text matches, in order
+        """
+        return([self.matches(text) for text in texts])
+
+    def matches_any(self, texts: Iterable[str]) -> bool:
+        """Does any of the texts match the rule (stops at the first one that does)
+
+        Args:
+            texts (Iterable[str]): Texts to classify
+
+        Returns:
+            bool: Does it?
+        """
+        return(any(self.matches(text) for text in texts))
+
+def load_rules() -> MappingProxyType:
+    """Compile every rule in rules.json
+
+    Returns:
+        MappingProxyType: rule name: TextRule
+    """
+    with open(file_path, 'r') as file:
+        data: dict[str, TextRuleDict] = json.load(file)
+
+    return(MappingProxyType({name: TextRule(name, rule) for name, rule in data.items()}))
+
+# Compiled once per process
+rules = load_rules()
+
+def get_rule(name: str) -> TextRule:
+    """Get a compiled rule
+
+    Args:
+        name (str): Rule name, as in rules.json
+
+    Returns:
+        TextRule: The rule
+    """
+    return(rules[name])
+
+if __name__ == '__main__':
+    print(get_rule('lastfm_conglomerate_page').matches('There are at least five artists named Nova: 1) ...'))
+    print(get_rule('non_original_track_title').matches_many(['Song (Instrumental)', 'Song']))
@@ -0,0 +1,61 @@
+import threading
+import requests
+
+from urllib3.util import Retry
+
+from src.utils.http_recording import RecordingAdapter
+
+# Enough connections for every worker of the generation pipeline to keep one open per host
+HTTP_POOL_SIZE = 16
+# (connect, read) in seconds
+HTTP_TIMEOUT   = (3.05, 20)
+HTTP_RETRIES   = 3
+# Retries wait backoff * 2^(retry - 1) seconds (or Retry-After when the API sends it)
+HTTP_BACKOFF   = 0.5
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: requests.Session = None
+_session_lock = threading.Lock()
+
+def build_session(pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES, backoff_factor: float = HTTP_BACKOFF) -> requests.Session:
+    """Build a keep-alive session with a connection pool and retries with backoff. Requests go through
+        the recording layer (see http_recording), which sends them as-is unless recording or replaying
+
+    Args:
+        pool_size (int, optional): Connections kept open per host. Defaults to HTTP_POOL_SIZE.
+        retries (int, optional): Retries for connection errors and retryable statuses. Defaults to HTTP_RETRIES.
+        backoff_factor (float, optional): Backoff between retries. Defaults to HTTP_BACKOFF.
+
+    Returns:
+        requests.Session: The session
+    """
+    retry = Retry(
+        total                      = retries,
+        backoff_factor             = backoff_factor,
+        status_forcelist           = RETRY_STATUSES,
+        allowed_methods            = frozenset(['GET']),
+        respect_retry_after_header = True,
+        # Let the caller's raise_for_status deal with the final response
+        raise_on_status            = False
+    )
+    adapter = RecordingAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return(session)
+
+def get_session() -> requests.Session:
+    """Get the process-wide session shared by the API clients
+
+    Returns:
+        requests.Session: The session
+    """
+    global _session
+    if (_session is None):
+        with _session_lock:
+            if (_session is None):
+                _session = build_session()
+    return(_session)
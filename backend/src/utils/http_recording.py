@@ -0,0 +1,161 @@
+import os
+import json
+import base64
+import hashlib
+import tempfile
+import threading
+import requests
+
+from collections         import Counter
+from pathlib             import Path
+from urllib.parse        import urlsplit, parse_qsl, urlencode
+from requests.adapters   import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.utils.settings import get_settings
+from src.utils.metrics  import record_api_error
+
+# live: send requests; record: send requests and save the responses as fixtures; replay: serve fixtures, never send
+HTTP_MODES = ('live', 'record', 'replay')
+
+# Query params left out of fixture keys (so fixtures don't hold secrets and match whatever key replays them)
+SECRET_PARAMS = frozenset(['api_key'])
+# Hosts which are never recorded (token exchanges)
+UNRECORDED_HOSTS = frozenset(['accounts.spotify.com'])
+# Response headers kept in fixtures (bodies are stored decoded)
+RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+class FixtureMissingError(requests.ConnectionError):
+    """No fixture for a request in replay mode"""
+
+class _RecordingState:
+    """Process-wide recording mode and call accounting. Starts from the HTTP_MODE and HTTP_FIXTURES_DIR settings
+
+    Attributes:
+        mode: One of HTTP_MODES
+        fixtures_dir: Where fixtures are saved to and served from
+        calls: host: requests sent (or served from fixtures)
+        misses: host: requests with no fixture in replay mode
+    """
+    def __init__(self) -> None:
+        settings          = get_settings()
+        assert(settings.http_mode in HTTP_MODES)
+        self.mode         = settings.http_mode
+        self.fixtures_dir = Path(settings.http_fixtures_dir)
+        self.calls        = Counter()
+        self.misses       = Counter()
+        self.lock         = threading.Lock()
+
+_state = _RecordingState()
+
+def configure_http_recording(mode: str, fixtures_dir: str | Path = None) -> None:
+    """Set the recording mode for every session built by src.utils.http (takes effect on the next request)
+
+    Args:
+        mode (str): One of HTTP_MODES
+        fixtures_dir (str | Path, optional): Fixtures directory. Defaults to the current one.
+    """
+    assert(mode in HTTP_MODES)
+    _state.mode = mode
+    if (fixtures_dir):
+        _state.fixtures_dir = Path(fixtures_dir)
+
+def get_http_call_counts() -> tuple[Counter, Counter]:
+    """Get (calls, fixture misses) by host since the last reset"""
+    with _state.lock:
+        return(Counter(_state.calls), Counter(_state.misses))
+
+def reset_http_call_counts() -> None:
+    with _state.lock:
+        _state.calls.clear()
+        _state.misses.clear()
+
+def fixture_key(request: requests.PreparedRequest) -> str:
+    """Key identifying a request: method, url with sorted query (secrets removed) and a hash of the body
+
+    Args:
+        request (requests.PreparedRequest): The request
+
+    Returns:
+        str: The key
+    """
+    url   = urlsplit(request.url)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(url.query, keep_blank_values=True) if k not in SECRET_PARAMS))
+    body  = request.body or b''
+    if (isinstance(body, str)):
+        body = body.encode('utf-8')
+    return(f'{request.method} {url.scheme}://{url.netloc}{url.path}?{query} {hashlib.sha1(body).hexdigest()}')
+
+def _fixture_path(request: requests.PreparedRequest) -> Path:
+    host = urlsplit(request.url).netloc
+    return(_state.fixtures_dir / host / f'{hashlib.sha1(fixture_key(request).encode('utf-8')).hexdigest()}.json')
+
+def _save_fixture(request: requests.PreparedRequest, response: requests.Response) -> None:
+    """Save a response as the fixture for its request (atomically, so concurrent workers never read half a file)"""
+    path = _fixture_path(request)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fixture = {
+        'key'    : fixture_key(request),
+        'status' : response.status_code,
+        'reason' : response.reason,
+        'headers': {header: response.headers[header] for header in RECORDED_HEADERS if header in response.headers},
+        'body'   : base64.b64encode(response.content).decode('ascii')
+    }
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(fixture, file)
+    os.replace(tmp, path)
+
+def _load_fixture(request: requests.PreparedRequest) -> requests.Response:
+    """Build the recorded response for a request
+
+    Raises:
+        FixtureMissingError: If there is no fixture for the request
+    """
+    path = _fixture_path(request)
+    try:
+        with open(path, 'r') as file:
+            fixture = json.load(file)
+    except FileNotFoundError:
+        raise FixtureMissingError(f'No fixture for {fixture_key(request)}', request=request)
+
+    response = requests.Response()
+    response.status_code       = fixture['status']
+    response.reason            = fixture.get('reason')
+    response.headers           = CaseInsensitiveDict(fixture['headers'])
+    response._content          = base64.b64decode(fixture['body'])
+    response._content_consumed = True
+    response.url               = request.url
+    response.request           = request
+    response.encoding          = requests.utils.get_encoding_from_headers(response.headers)
+    return(response)
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter which, depending on the recording mode, also saves responses as fixtures or serves them instead of sending
+    """
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        mode = _state.mode
+        host = urlsplit(request.url).netloc
+        try:
+            if ((mode == 'live') or ((mode == 'record') and (host in UNRECORDED_HOSTS))):
+                response = super().send(request, **kwargs)
+            elif (mode == 'record'):
+                response = super().send(request, **kwargs)
+                _save_fixture(request, response)
+            else:
+                try:
+                    response = _load_fixture(request)
+                except FixtureMissingError:
+                    with _state.lock:
+                        _state.misses[host] += 1
+                    raise
+        except Exception:
+            record_api_error(host)
+            raise
+
+        if (response.status_code >= 400):
+            record_api_error(host)
+
+        with _state.lock:
+            _state.calls[host] += 1
+        return(response)
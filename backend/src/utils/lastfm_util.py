@@ -1,2 +1,24 @@
+from typing   import Optional
+from datetime import timedelta
+
 LastFmArtist = dict[str, any]
 LastFMTrack  = dict[str, any]
+
+# How long responses are cached for, by method. Methods not in here are not cached
+LASTFM_CACHE_TTLS: dict[str, timedelta] = {
+    'artist.getInfo'     : timedelta(days=7),
+    'artist.gettoptracks': timedelta(days=30)
+}
+
+# How long the lookup mode (mbid or name) which finds an artist on lastfm is remembered for (see LastFMArtistIndex).
+#   Artists found neither way are retried sooner, in case they are added or their mbid is linked
+LASTFM_LOOKUP_FOUND_TTL     = timedelta(days=90)
+LASTFM_LOOKUP_NOT_FOUND_TTL = timedelta(days=14)
+# The method whose misses mean lastfm doesn't have the artist (others, e.g. artist.gettoptracks, can miss on artists it has)
+LASTFM_LOOKUP_METHOD        = 'artist.getInfo'
+
+def lastfm_response_artist_name(data: dict) -> Optional[str]:
+    """Get the artist's name as lastfm has it, from an artist.getInfo or artist.gettoptracks response"""
+    if ('artist' in data):
+        return(data['artist'].get('name'))
+    return(data.get('toptracks', {}).get('@attr', {}).get('artist'))
@@ -1,6 +1,16 @@
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
 import colorlog
 
+from collections      import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+from src.utils.settings import get_settings
+
 # Define the SUCCESS level as 25 (between INFO and WARNING)
 SUCCESS_LEVEL = 25
 logging.addLevelName(SUCCESS_LEVEL, "SUCCESS")
@@ -13,29 +23,202 @@ def success(self, message, *args, **kwargs):
 # Add the success method to the Logger class
 logging.Logger.success = success
 
-# Create a handler
+LOG_FORMATS = ('color', 'plain', 'json')
+
+LOG_COLORS = {
+    'DEBUG':    'cyan',
+    'INFO':     'green',
+    'SUCCESS':  'bold_green',  # Custom color for SUCCESS
+    'WARNING':  'yellow',
+    'ERROR':    'red',
+    'CRITICAL': 'red,bg_white',
+}
+
+def _suppressed_suffix(record: logging.LogRecord) -> str:
+    suppressed = getattr(record, 'suppressed', 0)
+    return(f' ({suppressed} similar messages suppressed)' if (suppressed) else '')
+
+class TextFormatter(colorlog.ColoredFormatter):
+    """Level and message, colored or not, noting how many similar messages the rate limit dropped"""
+    def format(self, record: logging.LogRecord) -> str:
+        return(super().format(record) + _suppressed_suffix(record))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line. Fields passed with extra={'fields': {...}} are added to the object"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time'   : self.formatTime(record),
+            'level'  : record.levelname,
+            'thread' : record.threadName,
+            'message': record.getMessage()
+        }
+        if (getattr(record, 'suppressed', 0)):
+            entry['suppressed'] = record.suppressed
+        entry.update(getattr(record, 'fields', {}))
+        if (record.exc_info):
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return(json.dumps(entry, ensure_ascii=False, default=str))
+
+def build_formatter(log_format: str) -> logging.Formatter:
+    """Build the formatter for a log format
+
+    Args:
+        log_format (str): One of LOG_FORMATS
+
+    Returns:
+        logging.Formatter: The formatter
+    """
+    assert(log_format in LOG_FORMATS)
+    if (log_format == 'json'):
+        return(JsonFormatter())
+    return(TextFormatter(
+        "%(log_color)s%(levelname)-8s%(reset)s - %(message)s",
+        datefmt=None,
+        reset=True,
+        log_colors=LOG_COLORS,
+        no_color=(log_format == 'plain')
+    ))
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records as they are, so that messages are only formatted on the listener thread
+    (QueueHandler would format them in the logging thread)"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return(record)
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most `limit` records with the same message template per `interval_s`. Errors are never dropped.
+    When a window with dropped records is over, one record with the template carries how many were (record.suppressed).
+
+    Messages are templates only when logged %-style (logger.info('Artist %s', name)), so f-string messages are never grouped.
+    Windows are removed once over, so one-off messages don't pile up.
+
+    Attributes:
+        limit
+        interval_s
+    """
+    def __init__(self, limit: int, interval_s: float) -> None:
+        super().__init__()
+        self.limit      = limit
+        self.interval_s = interval_s
+        # (level, template): [window start, records let through, records dropped, logger name]
+        self._windows: dict[tuple[int, str], list] = {}
+        self._swept_at = time.monotonic()
+        self._lock     = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if ((record.levelno >= logging.ERROR) or record.exc_info):
+            return(True)
+        key = (record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            # Sweep at most once per interval, so the cost per record stays constant
+            over   = self._sweep(now) if (now - self._swept_at >= self.interval_s) else []
+            window = self._windows.get(key)
+            if ((window is not None) and (now - window[0] >= self.interval_s)):
+                over.append((key, self._windows.pop(key)))
+                window = None
+            if (window is None):
+                self._windows[key] = [now, 1, 0, record.name]
+                passed = True
+            elif (window[1] < self.limit):
+                window[1] += 1
+                passed = True
+            else:
+                window[2] += 1
+                passed = False
+        # Before the record is handled, so the counts come in order
+        self._report(over)
+        return(passed)
+
+    def flush(self) -> None:
+        """Report the records dropped in the current windows (e.g. on exit)"""
+        with self._lock:
+            over = self._sweep(float('inf'))
+        self._report(over)
+
+    def _sweep(self, now: float) -> list[tuple[tuple[int, str], list]]:
+        """Remove the windows which are over, returning them (hold the lock)"""
+        over = [(key, window) for key, window in self._windows.items() if (now - window[0] >= self.interval_s)]
+        for key, _ in over:
+            del self._windows[key]
+        self._swept_at = min(now, time.monotonic())
+        return(over)
+
+    def _report(self, over: list[tuple[tuple[int, str], list]]) -> None:
+        """Log how many records were dropped in the windows which are over (straight to the handlers, past this filter)"""
+        for (levelno, template), window in over:
+            if (not window[2]):
+                continue
+            owner  = logging.getLogger(window[3])
+            record = owner.makeRecord(owner.name, levelno, __file__, 0, template, (), None)
+            record.suppressed = window[2]
+            owner.callHandlers(record)
+
+class LogRollup:
+    """Counts a frequent kind of event (e.g. artist rejections by reason) and logs one summary line per interval
+    instead of a line per event
+
+    Attributes:
+        name: What is counted (start of the summary line)
+        interval_s
+        level
+    """
+    def __init__(self, name: str, interval_s: float = 30, level: int = logging.INFO) -> None:
+        self.name       = name
+        self.interval_s = interval_s
+        self.level      = level
+        self._counts    = Counter()
+        self._started   = time.monotonic()
+        self._lock      = threading.Lock()
+
+    def add(self, key: str, n: int = 1) -> None:
+        """Count an event, logging the summary if the interval is over"""
+        with self._lock:
+            self._counts[key] += n
+            if (time.monotonic() - self._started < self.interval_s):
+                return(None)
+            counts, elapsed = self._reset()
+        self._log(counts, elapsed)
+
+    def flush(self) -> None:
+        """Log the summary of what was counted since the last one"""
+        with self._lock:
+            counts, elapsed = self._reset()
+        self._log(counts, elapsed)
+
+    def _reset(self) -> tuple[Counter, float]:
+        counts, elapsed = self._counts, time.monotonic() - self._started
+        self._counts  = Counter()
+        self._started = time.monotonic()
+        return(counts, elapsed)
+
+    def _log(self, counts: Counter, elapsed: float) -> None:
+        if (not counts):
+            return(None)
+        logger.log(self.level, '%s in the last %.0fs: %s', self.name, elapsed,
+                   ', '.join(f'{key}: {count}' for key, count in counts.most_common()),
+                   extra={'fields': {'rollup': self.name, 'counts': dict(counts)}})
+
+settings = get_settings()
+
+# Create a handler (written to by the listener thread)
 handler = logging.StreamHandler()
-handler.setLevel(logging.INFO)
-
-# Create a formatter with colors, including the custom SUCCESS level
-formatter = colorlog.ColoredFormatter(
-    "%(log_color)s%(levelname)-8s%(reset)s - %(message)s",
-    datefmt=None,
-    reset=True,
-    log_colors={
-        'DEBUG':    'cyan',
-        'INFO':     'green',
-        'SUCCESS':  'bold_green',  # Custom color for SUCCESS
-        'WARNING':  'yellow',
-        'ERROR':    'red',
-        'CRITICAL': 'red,bg_white',
-    }
-)
-
-# Set formatter to handler
-handler.setFormatter(formatter)
+handler.setLevel(settings.log_level)
+handler.setFormatter(build_formatter(settings.log_format))
+
+# Records are queued by the logging threads and formatted and written by the listener
+log_queue = queue.SimpleQueue()
+listener  = QueueListener(log_queue, handler, respect_handler_level=True)
+listener.start()
+# Write what is still queued on exit
+atexit.register(listener.stop)
 
 # Get the root logger
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.addHandler(handler)
+logger.setLevel(settings.log_level)
+logger.addHandler(DeferredQueueHandler(log_queue))
+if (settings.log_rate_limit):
+    rate_limit_filter = RateLimitFilter(settings.log_rate_limit, settings.log_rate_interval_s)
+    logger.addFilter(rate_limit_filter)
+    # Registered after the listener's stop, so it runs before it
+    atexit.register(rate_limit_filter.flush)
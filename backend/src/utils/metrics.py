@@ -0,0 +1,109 @@
+import time
+import threading
+
+from collections import Counter
+from contextlib  import contextmanager
+from contextvars import ContextVar
+from typing      import Iterator, Optional
+
+from src.utils.util import RequestType
+
+# Service by API host (for accounting at the HTTP layer)
+API_HOSTS: dict[str, RequestType] = {
+    'ws.audioscrobbler.com': RequestType.LASTFM,
+    'musicbrainz.org'      : RequestType.MUSICBRAINZ,
+    'api.spotify.com'      : RequestType.SPOTIFY
+}
+
+class GenerationMetrics:
+    """Where the time of one generation went, and how it used the APIs. Safe to share between threads.
+
+    Stage times are busy time summed over the stage's workers, so stages running in parallel can add up to more than the wall time.
+
+    Attributes:
+        started_at: time.monotonic() when created
+        stage_seconds: stage: busy seconds
+        stage_items: stage: items processed
+        api_calls: service: requests sent
+        api_errors: service: failed requests (error status or no response)
+        rate_limit_wait_s: service: seconds spent waiting on the rate limiter
+    """
+    def __init__(self) -> None:
+        self.started_at        = time.monotonic()
+        self.stage_seconds     = Counter()
+        self.stage_items       = Counter()
+        self.api_calls         = Counter()
+        self.api_errors        = Counter()
+        self.rate_limit_wait_s = Counter()
+        self._lock             = threading.Lock()
+
+    @property
+    def elapsed_s(self) -> float:
+        return(time.monotonic() - self.started_at)
+
+    def add_stage_time(self, stage: str, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            self.stage_items[stage]   += items
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Time a block of work as one item of a stage"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(stage, time.perf_counter() - t0)
+
+    def add_api_call(self, type: RequestType, waited_s: float = 0) -> None:
+        with self._lock:
+            self.api_calls[type.name]         += 1
+            self.rate_limit_wait_s[type.name] += waited_s
+
+    def add_api_error(self, type: RequestType) -> None:
+        with self._lock:
+            self.api_errors[type.name] += 1
+
+_current_metrics: ContextVar[Optional[GenerationMetrics]] = ContextVar('generation_metrics', default=None)
+
+def get_current_metrics() -> Optional[GenerationMetrics]:
+    """Get the metrics of the generation running in this context, if any"""
+    return(_current_metrics.get())
+
+@contextmanager
+def collect_metrics(metrics: GenerationMetrics) -> Iterator[GenerationMetrics]:
+    """Record the work done in this context (and in pipeline threads started from it) to the metrics
+
+    Args:
+        metrics (GenerationMetrics): The metrics
+
+    Yields:
+        Iterator[GenerationMetrics]: The metrics
+    """
+    token = _current_metrics.set(metrics)
+    try:
+        yield(metrics)
+    finally:
+        _current_metrics.reset(token)
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time a block of work as one item of a stage of the current generation (no-op outside of one)"""
+    metrics = _current_metrics.get()
+    if (metrics is None):
+        yield
+        return
+    with metrics.timed(stage):
+        yield
+
+def record_api_call(type: RequestType, waited_s: float = 0) -> None:
+    """Count a request (and its rate limit wait) for the current generation"""
+    metrics = _current_metrics.get()
+    if (metrics is not None):
+        metrics.add_api_call(type, waited_s)
+
+def record_api_error(host: str) -> None:
+    """Count a failed request to an API host for the current generation"""
+    metrics = _current_metrics.get()
+    if ((metrics is not None) and (host in API_HOSTS)):
+        metrics.add_api_error(API_HOSTS[host])
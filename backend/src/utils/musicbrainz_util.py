@@ -1,10 +1,73 @@
-from src.services.genre_handling.valid_genres import convert_genre
+from typing   import Optional, TypedDict
+from datetime import timedelta
+
+from src.services.genre_handling.valid_genres import convert_genre, genre_is_spotify
+from src.utils.util                           import Language, map_language_code_counts, filter_low_count_entries
+
 MusicBrainzArtist = dict[str, any]
+# ISO 639-3 code: number of the artist's works in that language
+MusicBrainzWorkLanguages = dict[str, int]
 
 MUSICBRAINZ_API_URL              = 'https://musicbrainz.org/ws/2/'
 MUSICBRAINZ_MAX_LIMIT_PAGINATION = 100
 
+# How long an artist's work languages are stored for (artists rarely add works in new languages)
+MUSICBRAINZ_LANGUAGES_TTL = timedelta(days=180)
+
+# How long the metrics stored on an artist are trusted for, after which the artist is checked over the network again
+ARTIST_METRICS_TTL = timedelta(days=30)
+
+class ArtistMetrics(TypedDict):
+    """Raw metrics of an artist, stored on their artists document (under metrics, along with metrics_updated_at)
+    so that requests can skip the artists outside their niche level band without any api calls
+
+    Args:
+        TypedDict
+    """
+    lastfm_listeners   : int
+    lastfm_playcount   : int
+    lastfm_likeness    : float
+    lastfm_tags        : list[str]
+    lastfm_conglomerate: bool
+    # None until the artist is found on spotify
+    spotify_id         : Optional[str]
+    spotify_followers  : Optional[int]
+
+class ArtistMetricsBand(TypedDict):
+    """The metrics an artist must have to be valid for a request (see PlaylistRequest.metrics_band)
+
+    Args:
+        TypedDict
+    """
+    lastfm_listeners_min : int
+    lastfm_listeners_max : int
+    lastfm_playcount_min : int
+    lastfm_playcount_max : int
+    lastfm_likeness_min  : float
+    spotify_followers_min: int
+    spotify_followers_max: int
+    # The request's genre as a lastfm tag
+    lastfm_genre         : str
+
 def get_mb_genre(spotify_genre: str = "") -> str:
     return(convert_genre('SPOTIFY', 'MUSICBRAINZ', spotify_genre))
 
+def get_lastfm_genre(genre: str) -> str:
+    """Get the lastfm tag of a genre, from its spotify or musicbrainz name"""
+    if (genre_is_spotify(genre)):
+        return(convert_genre('SPOTIFY', 'LASTFM', genre))
+    return(convert_genre('MUSICBRAINZ', 'LASTFM', genre))
+
+
+
+def work_languages_to_languages(work_languages: MusicBrainzWorkLanguages, pct_min: int = 50) -> dict[Language, int]:
+    """Get the languages that an artist sings in from their work language distribution
+
+    Args:
+        work_languages (MusicBrainzWorkLanguages): The artist's work languages
+        pct_min (int, optional): The percentage of their works that must be sung in a language to count the language. Defaults to 50.
 
+    Returns:
+        dict[Language, int]: Language: number of works in that language
+    """
+    return(filter_low_count_entries(map_language_code_counts(work_languages), pct_min = pct_min))
@@ -0,0 +1,161 @@
+import queue
+import threading
+import contextvars
+
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.utils.logger import logger
+
+# Marks the end of the stream for a stage's workers
+_DONE = object()
+
+# How often blocked workers wake up to check if the pipeline was stopped
+_POLL_INTERVAL_S = 0.1
+
+class Stage:
+    """A pipeline stage: a function run by its own pool of workers, fed by its own bounded queue
+
+    Attributes:
+        name
+        fn: Called with one item. Returns the item to pass downstream, or None to drop it
+        workers: Number of worker threads
+        queue_size: Max number of items waiting for this stage
+    """
+    def __init__(self, name: str, fn: Callable[[any], Optional[any]], workers: int = 1, queue_size: int = 0) -> None:
+        """Initialize the stage
+
+        Args:
+            name (str): Stage name (for logging)
+            fn (Callable[[any], Optional[any]]): The work done for each item
+            workers (int, optional): Number of worker threads. Defaults to 1.
+            queue_size (int, optional): Max items queued for the stage. Defaults to 2 * workers.
+        """
+        assert(workers > 0)
+        self.name       = name
+        self.fn         = fn
+        self.workers    = workers
+        self.queue_size = queue_size or (2 * workers)
+
+class StagedPipeline:
+    """Runs items through a series of stages, each with its own worker pool and bounded queue,
+    so that items can be in flight in every stage at once.
+
+    Items leave the last stage in completion order, not input order.
+
+    Attributes:
+        stages
+    """
+    def __init__(self, stages: list[Stage]) -> None:
+        """Initialize the pipeline
+
+        Args:
+            stages (list[Stage]): The stages, in order
+        """
+        assert(stages)
+        self.stages   = stages
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def stop(self) -> None:
+        """Stop the pipeline. Workers finish the item they are on and then exit."""
+        self._stopped.set()
+
+    @property
+    def stopped(self) -> bool:
+        return(self._stopped.is_set())
+
+    def _put(self, q: queue.Queue, item: any) -> bool:
+        """Put into a bounded queue, giving up if the pipeline is stopped
+
+        Returns:
+            bool: Was the item put?
+        """
+        while (not self.stopped):
+            try:
+                q.put(item, timeout=_POLL_INTERVAL_S)
+                return(True)
+            except queue.Full:
+                continue
+        return(False)
+
+    def _get(self, q: queue.Queue) -> any:
+        """Get from a queue, returning _DONE if the pipeline is stopped"""
+        while (not self.stopped):
+            try:
+                return(q.get(timeout=_POLL_INTERVAL_S))
+            except queue.Empty:
+                continue
+        return(_DONE)
+
+    def _feed(self, items: Iterable, out_q: queue.Queue, next_workers: int) -> None:
+        """Push the input items into the first stage"""
+        try:
+            for item in items:
+                if (not self._put(out_q, item)):
+                    break
+        except Exception as e:
+            logger.error(f'Pipeline input failed: {e}')
+        finally:
+            for _ in range(next_workers):
+                self._put(out_q, _DONE)
+
+    def _work(self, stage: Stage, in_q: queue.Queue, out_q: queue.Queue, remaining: list[int], lock: threading.Lock, next_workers: int) -> None:
+        """Worker loop for a stage"""
+        while True:
+            item = self._get(in_q)
+            if (item is _DONE):
+                break
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                logger.error(f'Stage {stage.name} failed: {e}')
+                continue
+            if (result is not None):
+                self._put(out_q, result)
+
+        # The last worker of the stage to finish closes the stream for the next stage
+        with lock:
+            remaining[0] -= 1
+            last = (remaining[0] == 0)
+        if (last):
+            for _ in range(next_workers):
+                self._put(out_q, _DONE)
+
+    def _start_thread(self, name: str, target: Callable, *args) -> None:
+        # Workers run in a copy of the caller's context (e.g. to record to the caller's generation metrics)
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(target, *args), name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def run(self, items: Iterable) -> Iterator[any]:
+        """Run the items through the pipeline
+
+        Args:
+            items (Iterable): The input items. Consumed lazily, so it may be a generator
+
+        Yields:
+            Iterator[any]: Results of the last stage
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        # Results are drained by the caller, so no bound is needed
+        queues.append(queue.Queue())
+
+        self._start_thread('pipeline-feed', self._feed, items, queues[0], self.stages[0].workers)
+
+        for i, stage in enumerate(self.stages):
+            next_workers = self.stages[i + 1].workers if (i + 1 < len(self.stages)) else 1
+            remaining    = [stage.workers]
+            lock         = threading.Lock()
+            for w in range(stage.workers):
+                self._start_thread(f'pipeline-{stage.name}-{w}', self._work, stage, queues[i], queues[i + 1], remaining, lock, next_workers)
+
+        try:
+            while True:
+                result = self._get(queues[-1])
+                if (result is _DONE):
+                    break
+                yield(result)
+        finally:
+            self.stop()
+            for thread in self._threads:
+                thread.join()
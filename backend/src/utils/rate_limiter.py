@@ -0,0 +1,116 @@
+import time
+import asyncio
+import threading
+
+from src.utils.util    import RequestType
+from src.utils.metrics import record_api_call
+
+class TokenBucket:
+    """Token bucket rate limiter. Safe to share between threads and asyncio tasks.
+
+    Tokens refill continuously at `rate` per second up to `burst`. Acquiring only blocks
+    when the bucket is empty, so a lone request is sent right away.
+
+    Attributes:
+        rate: Tokens added per second
+        burst: Max tokens the bucket can hold
+    """
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Initialize the bucket (full)
+
+        Args:
+            rate (float): Requests per second
+            burst (int, optional): Max requests that can be sent back to back. Defaults to 1.
+        """
+        assert((rate > 0) and (burst >= 1))
+        self.rate    = rate
+        self.burst   = burst
+        self._tokens = float(burst)
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, going into debt if there is none
+
+        Returns:
+            float: Seconds the caller must wait before the token is theirs
+        """
+        with self._lock:
+            now          = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last   = now
+            self._tokens -= 1
+            if (self._tokens >= 0):
+                return(0)
+            return(-self._tokens / self.rate)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent
+
+        Returns:
+            float: Seconds waited
+        """
+        wait = self._reserve()
+        if (wait):
+            time.sleep(wait)
+        return(wait)
+
+    async def acquire_async(self) -> float:
+        """Wait (without blocking the event loop) until a request may be sent
+
+        Returns:
+            float: Seconds waited
+        """
+        wait = self._reserve()
+        if (wait):
+            await asyncio.sleep(wait)
+        return(wait)
+
+# (requests per second, burst) as per rate limiting guidelines
+API_RATE_LIMITS: dict[RequestType, tuple[float, int]] = {
+    RequestType.LASTFM     : (5, 5),
+    RequestType.MUSICBRAINZ: (1, 1),
+    RequestType.SPOTIFY    : (4, 8)
+}
+
+# One bucket per service for the whole process
+rate_limiters: dict[RequestType, TokenBucket] = {
+    request_type: TokenBucket(rate, burst) for request_type, (rate, burst) in API_RATE_LIMITS.items()
+}
+
+def throttle(type: RequestType) -> float:
+    """Wait for the service's rate limit before sending a request. So no get IP banned.
+        The request and the wait are counted for the current generation (see metrics).
+
+    Args:
+        type (RequestType): The type of API request.
+
+    Returns:
+        float: Seconds waited
+    """
+    waited = rate_limiters[type].acquire()
+    record_api_call(type, waited)
+    return(waited)
+
+async def throttle_async(type: RequestType) -> float:
+    """throttle for asyncio callers
+
+    Args:
+        type (RequestType): The type of API request.
+
+    Returns:
+        float: Seconds waited
+    """
+    waited = await rate_limiters[type].acquire_async()
+    record_api_call(type, waited)
+    return(waited)
+
+def configure_rate_limit(type: RequestType, rate: float, burst: int = 1) -> None:
+    """Replace the rate limit for a service (e.g. once authenticated with a higher quota)
+
+    Args:
+        type (RequestType): The type of API request.
+        rate (float): Requests per second
+        burst (int, optional): Max requests that can be sent back to back. Defaults to 1.
+    """
+    rate_limiters[type] = TokenBucket(rate, burst)
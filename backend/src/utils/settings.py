@@ -0,0 +1,88 @@
+import os
+
+from dataclasses import dataclass
+from functools   import cache
+from dotenv      import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, read from the environment (and .env)
+
+    Load with get_settings() so the .env file is only read once per process
+    """
+    # SPOTIFY
+    spotify_client_id    : str
+    spotify_client_secret: str
+    spotify_redirect_uri : str
+    spotify_scope        : str
+    spotify_cache_path   : str
+    # LASTFM
+    lastfm_api_key: str
+    # APPLICATION (MUSICBRAINZ)
+    application_name   : str
+    application_version: str
+    application_contact: str
+    mb_client_id       : str
+    mb_client_secret   : str
+    # HTTP RECORDING (see http_recording)
+    http_mode        : str
+    http_fixtures_dir: str
+    # LOGGING (see logger)
+    log_level          : str
+    log_format         : str
+    log_rate_limit     : int
+    log_rate_interval_s: float
+    # GENERATION JOBS (see GenerationJobScheduler)
+    job_workers             : int
+    job_max_running_per_user: int
+    job_progress_interval_s : float
+    job_poll_interval_s     : float
+
+    @property
+    def musicbrainz_user_agent(self) -> str:
+        return(f'{self.application_name}/{self.application_version} ( {self.application_contact} )')
+
+def load_settings() -> Settings:
+    """Read the settings (re-reads .env, prefer get_settings)
+
+    Returns:
+        Settings: The settings
+    """
+    load_dotenv()
+    return(Settings(
+        spotify_client_id     = os.getenv('SPOTIFY_CLIENT_ID'),
+        spotify_client_secret = os.getenv('SPOTIFY_CLIENT_SECRET'),
+        spotify_redirect_uri  = os.getenv('SPOTIFY_REDIRECT_URI'),
+        spotify_scope         = "user-top-read user-follow-read playlist-modify-public playlist-modify-private ugc-image-upload",
+        spotify_cache_path    = ".cache",
+        lastfm_api_key        = os.getenv('LASTFM_API_KEY'),
+        application_name      = os.getenv("APPLICATION_NAME"),
+        application_version   = os.getenv("APPLICATION_VERSION"),
+        application_contact   = os.getenv("APPLICATION_CONTACT"),
+        mb_client_id          = os.getenv("MB_CLIENT_ID"),
+        mb_client_secret      = os.getenv("MB_CLIENT_SECRET"),
+        http_mode             = os.getenv("HTTP_MODE", "live"),
+        http_fixtures_dir     = os.getenv("HTTP_FIXTURES_DIR", "fixtures/http"),
+        log_level             = os.getenv("LOG_LEVEL", "INFO").upper(),
+        # color, plain or json
+        log_format            = os.getenv("LOG_FORMAT", "color"),
+        # Max messages with the same template per interval (0 for no limit)
+        log_rate_limit        = int(os.getenv("LOG_RATE_LIMIT", "20")),
+        log_rate_interval_s   = float(os.getenv("LOG_RATE_INTERVAL_S", "10")),
+        # Generations run at once (they share the API quotas)
+        job_workers              = int(os.getenv("JOB_WORKERS", "2")),
+        job_max_running_per_user = int(os.getenv("JOB_MAX_RUNNING_PER_USER", "1")),
+        # Min seconds between progress writes of a running job
+        job_progress_interval_s  = float(os.getenv("JOB_PROGRESS_INTERVAL_S", "5")),
+        # Seconds between checks for jobs queued by other processes
+        job_poll_interval_s      = float(os.getenv("JOB_POLL_INTERVAL_S", "5"))
+    ))
+
+@cache
+def get_settings() -> Settings:
+    """Get the settings shared by the whole process (loaded on first call)
+
+    Returns:
+        Settings: The settings
+    """
+    return(load_settings())
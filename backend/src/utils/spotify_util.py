@@ -1,6 +1,7 @@
 import re
 
 from typing       import Optional, TypedDict
+from datetime     import timedelta
 from urllib.parse import urlparse, parse_qs
 
 from src.utils.util import strcomp
@@ -11,9 +12,24 @@ SpotifyArtistID           = str
 SpotifyGenreInterestCount = dict[str, int|float]
 
 SPOTIFY_MAX_LIMIT_PAGINATION = 50
+SPOTIFY_MAX_LIMIT_ARTISTS    = 50
 SPOTIFY_MAX_SEEDS_RECS = 5
 SPOTIFY_MAX_LIMIT_RECS = 100
 
+# How long track resolutions are kept in the track index (tracks which were not found may be released or renamed)
+SPOTIFY_TRACK_FOUND_TTL     = timedelta(days=90)
+SPOTIFY_TRACK_NOT_FOUND_TTL = timedelta(days=7)
+
+# How long entities are cached for, by kind (see SpotifyEntityCache)
+#   Artist objects carry follower counts, which the niche checks read, so they are kept for less long
+SPOTIFY_CACHE_TTLS: dict[str, timedelta] = {
+    'artist'           : timedelta(hours=12),
+    'artist_top_tracks': timedelta(days=7)
+}
+
+class SpotifyTrackNotFoundError(Exception):
+    """Spotify has no track matching a search"""
+
 class NicheTrack(TypedDict):
     """Niche track obj
 
@@ -124,6 +140,54 @@ def find_exact_match(tracks: list[SpotifyTrack], name: str, artist: str) -> Spot
                     return (track)  # Exact match found
     return (None)  # No exact match found
 
+def track_resolution_key(name: str, artist: str) -> str:
+    """Key of a (track name, artist) pair in the track index, normalized the way find_exact_match compares them
+
+    Args:
+        name (str): Track name
+        artist (str): Artist name
+
+    Returns:
+        str: The key
+    """
+    return(f'{artist.strip().lower()}\t{name.strip().lower()}')
+
+def compact_spotify_track(track: SpotifyTrack) -> dict[str, any]:
+    """Keep the fields of a track which the generation reads, for the track index
+
+    Args:
+        track (SpotifyTrack): Track as returned by spotify
+
+    Returns:
+        dict[str, any]: name, uri, url, duration_ms, release_year and artists (id and name)
+    """
+    return({
+        'name'        : track.get('name', ''),
+        'uri'         : track.get('uri', ''),
+        'url'         : track.get('external_urls', {}).get('spotify', ''),
+        'duration_ms' : track.get('duration_ms', 0),
+        'release_year': int(track.get('album', {}).get('release_date', '1900')[:4]),
+        'artists'     : [{'id': artist.get('id', ''), 'name': artist.get('name', '')} for artist in track.get('artists', [])]
+    })
+
+def expand_compact_track(compact: dict[str, any]) -> SpotifyTrack:
+    """Rebuild a (partial) SpotifyTrack from the fields kept by compact_spotify_track
+
+    Args:
+        compact (dict[str, any]): The compact track
+
+    Returns:
+        SpotifyTrack: The track, with the fields the generation reads
+    """
+    return({
+        'name'         : compact['name'],
+        'uri'          : compact['uri'],
+        'external_urls': {'spotify': compact['url']},
+        'duration_ms'  : compact['duration_ms'],
+        'album'        : {'release_date': str(compact['release_year'])},
+        'artists'      : [dict(artist) for artist in compact['artists']]
+    })
+
 def extract_id(playlist_link: str, type: str) -> Optional[str]:
     """
     Extracts the Spotify playlist ID from a playlist URL.
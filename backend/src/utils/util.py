@@ -1,10 +1,9 @@
-import os
-import time
 import pycountry
 
-from dotenv import load_dotenv
-from enum   import Enum
-from bidict import bidict
+from enum      import Enum
+from bidict    import bidict
+from functools import cache
+from types     import MappingProxyType
 
 NICHE_APP_URL = 'http://niche-app.net'
 
@@ -25,16 +24,18 @@ NICHEMAP: bidict = bidict({
     'Only Kinda': NicheLevel.ONLY_KINDA
 })
 
-# Request type for API hits
+# Request type for API hits (rate limits are in rate_limiter)
 RequestType = Enum('RequestTypes', ['LASTFM', 'MUSICBRAINZ', 'SPOTIFY'])
 
-# As per rate limiting guidelines
-global API_SLEEP_LENGTHS
-API_SLEEP_LENGTHS = {
-    RequestType.LASTFM     : 0.2,
-    RequestType.MUSICBRAINZ: 1,
-    RequestType.SPOTIFY    : 0.25
-}
+# Status of a background generation job
+JobStatus = Enum('JobStatus', ['QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED'])
+JOBSTATUSMAP: bidict = bidict({
+    'queued'   : JobStatus.QUEUED,
+    'running'  : JobStatus.RUNNING,
+    'succeeded': JobStatus.SUCCEEDED,
+    'failed'   : JobStatus.FAILED,
+    'cancelled': JobStatus.CANCELLED
+})
 
 def merge_dicts_with_weight(dicts: list[dict[any, int|float]], weights: list[int]) -> dict[any, int|float]:
     """Merge a list of dictionaries into one, considering the weight of each.
@@ -55,38 +56,6 @@ def merge_dicts_with_weight(dicts: list[dict[any, int|float]], weights: list[int
     
     return(merged_dict)
 
-def load_env() -> dict[str, str]:
-    """Load environment.
-
-    Returns:
-        dict[str, str]: Environment.
-    """
-    load_dotenv()
-    return({
-        #SPOTIFY
-        "SPOTIFY_CLIENT_ID"    : os.getenv('SPOTIFY_CLIENT_ID'),
-        "SPOTIFY_CLIENT_SECRET": os.getenv('SPOTIFY_CLIENT_SECRET'),
-        "SPOTIFY_REDIRECT_URI" : os.getenv('SPOTIFY_REDIRECT_URI'),
-        "SCOPE"                : "user-top-read user-follow-read playlist-modify-public playlist-modify-private ugc-image-upload",
-        "CACHE_PATH"           : ".cache",
-        #LASTFM
-        "LASTFM_API_KEY": os.getenv('LASTFM_API_KEY'),
-        #APPLICATION(MUSICBRAINZ)
-        "APPLICATION_NAME"   : os.getenv("APPLICATION_NAME"),
-        "APPLICATION_VERSION": os.getenv("APPLICATION_VERSION"),
-        "APPLICATION_CONTACT": os.getenv("APPLICATION_CONTACT"),
-        "MB_CLIENT_ID"       : os.getenv("MB_CLIENT_ID"),
-        "MB_CLIENT_SECRET"   : os.getenv("MB_CLIENT_SECRET")
-    })
-
-def sleep(type: RequestType) -> None:
-    """Schleep based on request type. So no get IP banned.
-
-    Args:
-        type (RequestType): The type of API request.
-    """
-    time.sleep(API_SLEEP_LENGTHS[type])
-
 def convert_ms_to_s(ms: int) -> int:
     """Convert ms to s
 
@@ -131,6 +100,25 @@ def convert_language_to_language_enum(language: str) -> Language:
         return(LANGMAP.get(language))
     return(Language.OTHER)
 
+@cache
+def language_code_table(iso639_type: int = 3) -> MappingProxyType:
+    """Table of every ISO 639 code known to pycountry to its Language (built once per type)
+
+    Args:
+        iso639_type: The iso 639 type. Defaults to 3. Must be 1 or 3
+
+    Returns:
+        MappingProxyType: code: Language
+    """
+    assert((iso639_type == 1) or (iso639_type == 3))
+    attribute = 'alpha_3' if (iso639_type == 3) else 'alpha_2'
+    table: dict[str, Language] = {}
+    for language in pycountry.languages:
+        code = getattr(language, attribute, None)
+        if (code):
+            table[code] = convert_language_to_language_enum(language.name)
+    return(MappingProxyType(table))
+
 def map_language_codes(language_codes: list[str], iso639_type: int = 3) -> dict[Language, int]:
     """
     Maps ISO 639 language codes to full language names and counts occurrences.
@@ -142,27 +130,34 @@ def map_language_codes(language_codes: list[str], iso639_type: int = 3) -> dict[
     Returns:
         A dictionary where keys are language names and values are counts.
     """
-    language_counts: dict[str, int] = {}
+    table = language_code_table(iso639_type)
+    language_counts: dict[Language, int] = {}
     for code in language_codes:
-        try:
-            if(iso639_type == 3):
-                language = pycountry.languages.get(alpha_3=code)
-            else:
-                language = pycountry.languages.get(alpha_2=code)
-            if language and hasattr(language, 'name'):
-                language_name = language.name
-            else:
-                # Handle special cases or unknown codes
-                language_name = code
-        except KeyError:
-            language_name = code
-
-        as_language_enum = convert_language_to_language_enum(language_name)
+        # Unknown codes are treated as the language name
+        as_language_enum = table.get(code) or convert_language_to_language_enum(code)
         # Count the occurrence
         language_counts[as_language_enum] = language_counts.get(as_language_enum, 0) + 1
     
     return(language_counts)
 
+def map_language_code_counts(language_code_counts: dict[str, int], iso639_type: int = 3) -> dict[Language, int]:
+    """Same as map_language_codes, for codes that are already counted
+
+    Args:
+        language_code_counts: code: occurrences
+        iso639_type: The iso 639 type. Defaults to 3. Must be 1 or 3
+
+    Returns:
+        A dictionary where keys are language names and values are counts.
+    """
+    table = language_code_table(iso639_type)
+    language_counts: dict[Language, int] = {}
+    for code, count in language_code_counts.items():
+        as_language_enum = table.get(code) or convert_language_to_language_enum(code)
+        language_counts[as_language_enum] = language_counts.get(as_language_enum, 0) + count
+
+    return(language_counts)
+
 def filter_low_count_entries(dic: dict[any, float], pct_min: float = 0, count_min: float = 0) -> dict[any, float]:
     """Filter low values from a dict
 